@@ -0,0 +1,215 @@
+"""Persisted per-member availability bitmaps.
+
+Each (user, UTC day) document in `availability_bitmaps` holds two packed
+bitsets of BITMAP_TICKS_PER_DAY bits: `calendar`, rewritten whenever fresh
+busy data is fetched for the whole day, and `events`, OR-ed into as events are
+booked through the app. A member is busy in a tick if either bit is set, so
+scoring a group only unpacks and window-sums bits and never touches the raw
+busy blocks.
+"""
+import asyncio
+import logging
+from datetime import datetime, timezone, timedelta
+from typing import Awaitable, Callable, Dict, List, Tuple
+
+import numpy as np
+from pymongo import UpdateOne
+from pymongo.errors import DuplicateKeyError
+
+from scheduling import parse_iso, rasterize_busy, to_micros
+
+BITMAP_TICK = timedelta(minutes=5)
+BITMAP_TICK_US = to_micros(BITMAP_TICK)
+BITMAP_TICKS_PER_DAY = 24 * 60 // 5
+BITMAP_BYTES = BITMAP_TICKS_PER_DAY // 8
+
+EMPTY_BITMAP = bytes(BITMAP_BYTES)
+
+# Attempts per member day when concurrent bookings race on the same bitmap
+MAX_EVENT_UPDATE_ATTEMPTS = 5
+
+logger = logging.getLogger(__name__)
+
+GroupBusyFetcher = Callable[[List[str], str, str], Awaitable[Tuple[Dict[str, List[Dict]], List[str]]]]
+
+
+def as_utc(dt: datetime) -> datetime:
+    """Aware UTC datetime; naive values are taken as UTC"""
+    if dt.tzinfo is None:
+        return dt.replace(tzinfo=timezone.utc)
+    return dt.astimezone(timezone.utc)
+
+
+def is_aligned(start_dt: datetime, duration_delta: timedelta, granularity_delta: timedelta) -> bool:
+    """Whether slots starting at start_dt fall exactly on bitmap ticks"""
+    start_us = to_micros(as_utc(start_dt) - _day_floor(start_dt))
+    return all(value % BITMAP_TICK_US == 0 for value in (
+        start_us, to_micros(duration_delta), to_micros(granularity_delta)
+    ))
+
+
+def _day_floor(dt: datetime) -> datetime:
+    dt = as_utc(dt)
+    return dt.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def _days(start_dt: datetime, end_dt: datetime) -> List[datetime]:
+    """UTC midnights of every day touched by [start_dt, end_dt)"""
+    day = _day_floor(start_dt)
+    days = []
+    while day < end_dt:
+        days.append(day)
+        day += timedelta(days=1)
+    return days
+
+
+def _day_key(day: datetime) -> str:
+    return day.date().isoformat()
+
+
+def _pack(bits: np.ndarray) -> bytes:
+    return np.packbits(bits).tobytes()
+
+
+class AvailabilityBitmapStore:
+    def __init__(self, db, ttl: float = 900):
+        self.db = db
+        self.ttl = ttl
+
+    def _is_fresh(self, doc, now: datetime) -> bool:
+        if doc is None or "calendar_updated_at" not in doc:
+            return False
+        updated = datetime.fromisoformat(doc["calendar_updated_at"])
+        return (now - updated).total_seconds() < self.ttl
+
+    async def busy_matrix(self, user_ids: List[str], start_dt: datetime, end_dt: datetime,
+                          fetch: GroupBusyFetcher) -> Tuple[np.ndarray, List[str], List[str]]:
+        """Busy ticks for [start_dt, end_dt) per member, refreshing stale days first.
+
+        Returns the members x ticks matrix, the member id of each row and the
+        members whose stale bitmaps could not be refreshed (left out of the rows).
+        """
+        start_dt, end_dt = as_utc(start_dt), as_utc(end_dt)
+        days = _days(start_dt, end_dt)
+        day_keys = [_day_key(day) for day in days]
+        docs = await self.db.availability_bitmaps.find(
+            {"user_id": {"$in": user_ids}, "day": {"$in": day_keys}},
+            {"_id": 0, "user_id": 1, "day": 1, "calendar": 1, "calendar_updated_at": 1, "events": 1}
+        ).to_list(None)
+        by_key = {(doc["user_id"], doc["day"]): doc for doc in docs}
+
+        now = datetime.now(timezone.utc)
+        stale = [u for u in user_ids if not all(self._is_fresh(by_key.get((u, d)), now) for d in day_keys)]
+        degraded: List[str] = []
+        if stale:
+            # Fetch whole days so every touched bitmap can be rewritten completely
+            busy_times, degraded = await fetch(
+                stale, days[0].isoformat(), (days[-1] + timedelta(days=1)).isoformat()
+            )
+            by_key.update(await self.store_calendar(busy_times, days))
+
+        rows = [u for u in user_ids if u not in degraded]
+        buffer = b"".join(
+            _merge_bits(by_key.get((user_id, key))) for user_id in rows for key in day_keys
+        )
+        bits = np.unpackbits(np.frombuffer(buffer, dtype=np.uint8)).astype(bool)
+        bits = bits.reshape(len(rows), len(days) * BITMAP_TICKS_PER_DAY)
+
+        first = to_micros(start_dt - days[0]) // BITMAP_TICK_US
+        last = -(-to_micros(end_dt - days[0]) // BITMAP_TICK_US)
+        return bits[:, first:last], rows, degraded
+
+    async def store_calendar(self, busy_times: Dict[str, List[Dict]],
+                             days: List[datetime]) -> Dict[Tuple[str, str], Dict]:
+        """Rewrite the calendar bits of whole days from freshly fetched busy blocks"""
+        if not busy_times or not days:
+            return {}
+        ticks = len(days) * BITMAP_TICKS_PER_DAY
+        busy = rasterize_busy(busy_times, days[0], BITMAP_TICK_US, ticks)
+        now = datetime.now(timezone.utc).isoformat()
+
+        updates = []
+        stored = {}
+        for row, user_id in enumerate(busy_times):
+            for index, day in enumerate(days):
+                key = _day_key(day)
+                calendar = _pack(busy[row, index * BITMAP_TICKS_PER_DAY:(index + 1) * BITMAP_TICKS_PER_DAY])
+                updates.append(UpdateOne(
+                    {"user_id": user_id, "day": key},
+                    {"$set": {"calendar": calendar, "calendar_updated_at": now},
+                     "$setOnInsert": {"events": EMPTY_BITMAP}},
+                    upsert=True
+                ))
+                stored[(user_id, key)] = {"calendar": calendar, "calendar_updated_at": now}
+
+        # Keep event bits we already hold for these days
+        existing = await self.db.availability_bitmaps.find(
+            {"user_id": {"$in": list(busy_times)}, "day": {"$in": [_day_key(d) for d in days]}},
+            {"_id": 0, "user_id": 1, "day": 1, "events": 1}
+        ).to_list(None)
+        for doc in existing:
+            stored[(doc["user_id"], doc["day"])]["events"] = doc.get("events", EMPTY_BITMAP)
+
+        await self.db.availability_bitmaps.bulk_write(updates, ordered=False)
+        return stored
+
+    async def add_event(self, user_ids: List[str], start: str, end: str):
+        """OR a newly booked event into each member's event bits.
+
+        Each day's write is compare-and-set on `events_version`, so two
+        bookings for the same member and day never drop each other's bits.
+        """
+        start_dt = as_utc(parse_iso(start))
+        end_dt = as_utc(parse_iso(end))
+        event = {user_id: [{"start": start_dt.isoformat(), "end": end_dt.isoformat()}] for user_id in user_ids}
+        days = _days(start_dt, end_dt)
+        if not user_ids or not days:
+            return
+
+        day_keys = [_day_key(day) for day in days]
+        busy = rasterize_busy(event, days[0], BITMAP_TICK_US, len(days) * BITMAP_TICKS_PER_DAY)
+        added: Dict[Tuple[str, str], np.ndarray] = {}
+        for row, user_id in enumerate(user_ids):
+            for index, key in enumerate(day_keys):
+                bits = busy[row, index * BITMAP_TICKS_PER_DAY:(index + 1) * BITMAP_TICKS_PER_DAY]
+                if bits.any():
+                    added[(user_id, key)] = np.packbits(bits)
+
+        pending = list(added)
+        for _ in range(MAX_EVENT_UPDATE_ATTEMPTS):
+            if not pending:
+                return
+            existing = await self.db.availability_bitmaps.find(
+                {"user_id": {"$in": list({u for u, _ in pending})}, "day": {"$in": list({d for _, d in pending})}},
+                {"_id": 0, "user_id": 1, "day": 1, "events": 1, "events_version": 1}
+            ).to_list(None)
+            current = {(doc["user_id"], doc["day"]): doc for doc in existing}
+            results = await asyncio.gather(*(
+                self._or_events(key, current.get(key, {}), added[key]) for key in pending
+            ))
+            pending = [key for key, updated in zip(pending, results) if not updated]
+        if pending:
+            logger.warning(f"Event bits for {len(pending)} member days lost to concurrent bookings")
+
+    async def _or_events(self, key: Tuple[str, str], doc: Dict, bits: np.ndarray) -> bool:
+        user_id, day = key
+        version = doc.get("events_version")
+        old = np.frombuffer(doc.get("events", EMPTY_BITMAP), dtype=np.uint8)
+        try:
+            result = await self.db.availability_bitmaps.update_one(
+                {"user_id": user_id, "day": day, "events_version": version},
+                {"$set": {"events": (old | bits).tobytes(), "events_version": (version or 0) + 1}},
+                upsert=True
+            )
+        except DuplicateKeyError:
+            # Another booking created the day's document first
+            return False
+        return result.matched_count == 1 or result.upserted_id is not None
+
+
+def _merge_bits(doc) -> bytes:
+    if doc is None:
+        return EMPTY_BITMAP
+    calendar = np.frombuffer(doc.get("calendar", EMPTY_BITMAP), dtype=np.uint8)
+    events = np.frombuffer(doc.get("events", EMPTY_BITMAP), dtype=np.uint8)
+    return (calendar | events).tobytes()
@@ -0,0 +1,180 @@
+"""In-process cache for calendar busy times.
+
+Each user's cached data is a list of disjoint time segments with the busy
+blocks fetched for them. Requests only fetch the parts of their range that no
+fresh segment covers. Overlapping or adjacent segments fetched at about the
+same time are merged; each segment expires on its own fetch time.
+"""
+import asyncio
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, Dict, Iterable, List, NamedTuple, Tuple
+
+from scheduling import parse_iso
+
+BusyFetcher = Callable[[str, str, str], Awaitable[List[Dict]]]
+
+# Adjacent segments are coalesced only if fetched within this share of the TTL,
+# which bounds how much earlier the merged segment expires than its newest part
+MERGE_WINDOW_FRACTION = 0.1
+
+
+class Segment(NamedTuple):
+    start: datetime
+    end: datetime
+    blocks: List[Tuple[datetime, datetime, Dict]]  # parsed start, parsed end, original block
+    fetched_at: float
+
+
+def to_utc(value: str) -> datetime:
+    """Parse an ISO timestamp as an aware UTC datetime (naive values are taken as UTC)"""
+    dt = parse_iso(value)
+    if dt.tzinfo is None:
+        return dt.replace(tzinfo=timezone.utc)
+    return dt.astimezone(timezone.utc)
+
+
+class BusyTimeCache:
+    def __init__(self, ttl: float = 300, max_users: int = 10000,
+                 clock: Callable[[], float] = time.monotonic):
+        self.ttl = ttl
+        self.max_users = max_users
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: "OrderedDict[str, List[Segment]]" = OrderedDict()
+        # Bumped by invalidate() per user and by clear() for everyone; a fetch
+        # that straddles a bump holds pre-invalidation data and isn't stored
+        self._generations: Dict[str, int] = {}
+        self._epoch = 0
+
+    async def get(self, user_id: str, time_min: str, time_max: str, fetch: BusyFetcher) -> List[Dict]:
+        """Busy blocks overlapping [time_min, time_max), fetching only uncovered sub-ranges"""
+        if self.ttl <= 0:
+            return await fetch(user_id, time_min, time_max)
+
+        start, end = to_utc(time_min), to_utc(time_max)
+        segments = self._fresh_segments(user_id)
+        missing = _uncovered(start, end, segments)
+        if not missing:
+            self.hits += 1
+        else:
+            self.misses += 1
+            generation = self._generation(user_id)
+            fetched = await asyncio.gather(*(
+                fetch(user_id, gap_start.isoformat(), gap_end.isoformat()) for gap_start, gap_end in missing
+            ))
+            now = self.clock()
+            # Re-read: the entry may have been refreshed or invalidated while we fetched
+            segments = self._fresh_segments(user_id)
+            for (gap_start, gap_end), blocks in zip(missing, fetched):
+                segments.append(Segment(gap_start, gap_end, _parse_blocks(blocks), now))
+            segments = _merge(segments, self.ttl * MERGE_WINDOW_FRACTION)
+            if self._generation(user_id) == generation:
+                self._store(user_id, segments)
+
+        return _blocks_within(start, end, segments)
+
+    def invalidate(self, user_ids: Iterable[str], time_min: str, time_max: str):
+        """Drop cached segments overlapping [time_min, time_max] for the given users"""
+        start, end = to_utc(time_min), to_utc(time_max)
+        for user_id in user_ids:
+            self._generations[user_id] = self._generations.get(user_id, 0) + 1
+            segments = self._entries.get(user_id)
+            if segments is None:
+                continue
+            kept = [s for s in segments if s.end < start or s.start > end]
+            if kept:
+                self._entries[user_id] = kept
+            else:
+                del self._entries[user_id]
+
+    def clear(self):
+        self._entries.clear()
+        self._generations.clear()
+        self._epoch += 1
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "users": len(self._entries),
+        }
+
+    def _generation(self, user_id: str) -> Tuple[int, int]:
+        return self._epoch, self._generations.get(user_id, 0)
+
+    def _fresh_segments(self, user_id: str) -> List[Segment]:
+        segments = self._entries.get(user_id)
+        if segments is None:
+            return []
+        self._entries.move_to_end(user_id)
+        cutoff = self.clock() - self.ttl
+        return [s for s in segments if s.fetched_at > cutoff]
+
+    def _store(self, user_id: str, segments: List[Segment]):
+        self._entries[user_id] = segments
+        self._entries.move_to_end(user_id)
+        while len(self._entries) > self.max_users:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+
+def _parse_blocks(blocks: List[Dict]) -> List[Tuple[datetime, datetime, Dict]]:
+    return [(to_utc(b['start']), to_utc(b['end']), b) for b in blocks]
+
+
+def _uncovered(start: datetime, end: datetime, segments: List[Segment]) -> List[Tuple[datetime, datetime]]:
+    """Sub-ranges of [start, end) not covered by the (disjoint) segments"""
+    gaps = []
+    cursor = start
+    for segment in sorted(segments, key=lambda s: s.start):
+        if segment.end <= cursor:
+            continue
+        if segment.start >= end:
+            break
+        if segment.start > cursor:
+            gaps.append((cursor, segment.start))
+        cursor = max(cursor, segment.end)
+    if cursor < end:
+        gaps.append((cursor, end))
+    return gaps
+
+
+def _merge(segments: List[Segment], window: float) -> List[Segment]:
+    """Merge overlapping and adjacent segments fetched within `window` seconds of each other.
+
+    A merged segment keeps the oldest fetch time so it expires no later than
+    any of its parts. Segments fetched further apart stay separate, so a
+    fresh fetch doesn't expire early along with an older neighbour.
+    """
+    merged: List[Segment] = []
+    for segment in sorted(segments, key=lambda s: s.start):
+        if (merged and segment.start <= merged[-1].end
+                and abs(segment.fetched_at - merged[-1].fetched_at) <= window):
+            last = merged[-1]
+            seen = {(b[0], b[1]) for b in last.blocks}
+            blocks = last.blocks + [b for b in segment.blocks if (b[0], b[1]) not in seen]
+            merged[-1] = Segment(last.start, max(last.end, segment.end), blocks,
+                                 min(last.fetched_at, segment.fetched_at))
+        else:
+            merged.append(segment)
+    return merged
+
+
+def _blocks_within(start: datetime, end: datetime, segments: List[Segment]) -> List[Dict]:
+    result = []
+    seen = set()
+    for segment in segments:
+        if segment.end <= start or segment.start >= end:
+            continue
+        for busy_start, busy_end, block in segment.blocks:
+            if busy_start < end and busy_end > start and (busy_start, busy_end) not in seen:
+                seen.add((busy_start, busy_end))
+                result.append(block)
+    return result
@@ -0,0 +1,103 @@
+"""Materialized busy timelines for events booked through the app.
+
+Each user document carries `busy_timeline`, the sorted, merged UTC intervals
+of the events booked for them here, so a fresh booking counts as busy before
+the external calendar syncs it. `BusyTimelineStore.add` folds a new event
+into every member's timeline as it is created. Intervals that have ended are
+pruned on each write so the list only holds upcoming bookings.
+
+The scheduler already reads the members' user documents for their time
+zones, and takes the timeline from the same read; `union_busy` merges it
+with the provider's busy blocks in one pass over both sorted lists.
+"""
+import asyncio
+import heapq
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from busy_cache import to_utc
+
+logger = logging.getLogger(__name__)
+
+Interval = Tuple[datetime, datetime]
+
+# Attempts per member when concurrent bookings race on the same timeline
+MAX_UPDATE_ATTEMPTS = 5
+
+
+def parse_timeline(blocks: Iterable[Dict]) -> List[Interval]:
+    return [(to_utc(block["start"]), to_utc(block["end"])) for block in blocks]
+
+
+def format_timeline(intervals: Iterable[Interval]) -> List[Dict]:
+    return [{"start": start.isoformat(), "end": end.isoformat()} for start, end in intervals]
+
+
+def coalesce(intervals: Iterable[Interval]) -> List[Interval]:
+    """Merge overlapping or touching intervals of a start-sorted sequence"""
+    merged: List[Interval] = []
+    for start, end in intervals:
+        if end <= start:
+            continue
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def add_interval(timeline: List[Interval], start: datetime, end: datetime,
+                 prune_before: Optional[datetime] = None) -> List[Interval]:
+    """timeline with [start, end) merged in and intervals ending before prune_before dropped"""
+    kept = [i for i in timeline if prune_before is None or i[1] > prune_before]
+    return coalesce(heapq.merge(kept, [(start, end)]))
+
+
+def union_busy(provider_blocks: List[Dict], timeline: List[Dict], time_min: str, time_max: str) -> List[Dict]:
+    """Provider busy blocks merged with the booked intervals overlapping [time_min, time_max).
+
+    Returns the provider blocks untouched when nothing booked overlaps the range.
+    """
+    range_start, range_end = to_utc(time_min), to_utc(time_max)
+    booked = [(s, e) for s, e in parse_timeline(timeline) if s < range_end and e > range_start]
+    if not booked:
+        return provider_blocks
+    busy = sorted(parse_timeline(provider_blocks))
+    return format_timeline(coalesce(heapq.merge(busy, booked)))
+
+
+class BusyTimelineStore:
+    def __init__(self, db, retention: timedelta = timedelta(0)):
+        self.db = db
+        self.retention = retention
+
+    async def add(self, user_ids: List[str], start: str, end: str):
+        """Merge [start, end) into each user's timeline.
+
+        Updates are compare-and-set on `busy_timeline_version`, so two bookings
+        for the same member never drop each other's interval.
+        """
+        interval = (to_utc(start), to_utc(end))
+        pending = list(user_ids)
+        for _ in range(MAX_UPDATE_ATTEMPTS):
+            if not pending:
+                return
+            users = await self.db.users.find(
+                {"id": {"$in": pending}}, {"_id": 0, "id": 1, "busy_timeline": 1, "busy_timeline_version": 1}
+            ).to_list(len(pending))
+            prune_before = datetime.now(timezone.utc) - self.retention
+            results = await asyncio.gather(*(self._update(user, interval, prune_before) for user in users))
+            pending = [user["id"] for user, updated in zip(users, results) if not updated]
+        if pending:
+            logger.warning(f"Busy timeline update for {len(pending)} users lost to concurrent bookings")
+
+    async def _update(self, user: Dict, interval: Interval, prune_before: datetime) -> bool:
+        version = user.get("busy_timeline_version")
+        timeline = add_interval(parse_timeline(user.get("busy_timeline", [])), *interval, prune_before)
+        result = await self.db.users.update_one(
+            {"id": user["id"], "busy_timeline_version": version},
+            {"$set": {"busy_timeline": format_timeline(timeline), "busy_timeline_version": (version or 0) + 1}}
+        )
+        return result.matched_count == 1
@@ -0,0 +1,115 @@
+"""Calendar providers for member busy times.
+
+A provider answers `busy_times(user_id, time_min, time_max)` with busy blocks
+({"start", "end"} ISO strings) and is chosen by CALENDAR_BACKEND:
+
+- "google": the FreeBusy API through GoogleCalendarClient
+- "synthetic": seeded made-up calendars for demos, benchmarks and load tests
+- "fixture": busy blocks read from a JSON file
+
+The synthetic calendars depend only on the seed, the user and the date, so
+every call (and every partial fetch by the busy-time cache) agrees.
+"""
+import json
+import random
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Dict, List, Optional, Protocol
+
+from scheduling import parse_iso
+
+CALENDAR_PROVIDERS = ("google", "synthetic", "fixture")
+
+# Busy block lengths in minutes and their relative weights
+BLOCK_MINUTES = (15, 30, 45, 60, 90, 120, 180)
+BLOCK_WEIGHTS = (1, 4, 2, 6, 3, 2, 1)
+
+
+class CalendarProvider(Protocol):
+    async def busy_times(self, user_id: str, time_min: str, time_max: str) -> List[Dict]:
+        ...
+
+    async def aclose(self):
+        ...
+
+
+def _utc(value: str) -> datetime:
+    dt = parse_iso(value)
+    return dt.replace(tzinfo=timezone.utc) if dt.tzinfo is None else dt.astimezone(timezone.utc)
+
+
+def _clip(blocks: List[Dict], start: datetime, end: datetime) -> List[Dict]:
+    """Blocks overlapping [start, end), cut to it"""
+    clipped = []
+    for block in blocks:
+        block_start, block_end = _utc(block["start"]), _utc(block["end"])
+        if block_end > start and block_start < end:
+            clipped.append({"start": max(block_start, start).isoformat(), "end": min(block_end, end).isoformat()})
+    return clipped
+
+
+def day_busy_blocks(seed: str, day_start: datetime, density: int) -> List[Dict]:
+    """One day of busy blocks, mostly during the day with some evening and overnight ones.
+
+    Roughly `density` blocks on average; they depend only on the seed and the date.
+    """
+    rng = random.Random(f"{seed}:{day_start.date().isoformat()}")
+    blocks = []
+    for _ in range(rng.randint(0, 2 * density)):
+        hour = rng.gauss(13, 3.5) % 24
+        start = day_start + timedelta(minutes=int(hour * 4) * 15)
+        end = start + timedelta(minutes=rng.choices(BLOCK_MINUTES, BLOCK_WEIGHTS)[0])
+        blocks.append({"start": start.isoformat(), "end": end.isoformat()})
+    return blocks
+
+
+def synthetic_busy_blocks(seed: str, time_min: str, time_max: str, density: int) -> List[Dict]:
+    """The `day_busy_blocks` calendar for `seed`, cut to [time_min, time_max)"""
+    start, end = _utc(time_min), _utc(time_max)
+    # Start a day early so blocks running past midnight are included
+    day = start.replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=1)
+    blocks = []
+    while day < end:
+        blocks.extend(day_busy_blocks(seed, day, density))
+        day += timedelta(days=1)
+    return _clip(blocks, start, end)
+
+
+class SyntheticCalendarProvider:
+    def __init__(self, seed: int = 0, density: int = 4):
+        self.seed = seed
+        self.density = density
+
+    async def busy_times(self, user_id: str, time_min: str, time_max: str) -> List[Dict]:
+        return synthetic_busy_blocks(f"{self.seed}:{user_id}", time_min, time_max, self.density)
+
+    async def aclose(self):
+        pass
+
+
+class FixtureCalendarProvider:
+    """Busy blocks from a JSON object of user id -> blocks; "*" applies to unlisted users"""
+
+    def __init__(self, path: str):
+        with open(Path(path)) as f:
+            self.calendars: Dict[str, List[Dict]] = json.load(f)
+
+    async def busy_times(self, user_id: str, time_min: str, time_max: str) -> List[Dict]:
+        blocks = self.calendars.get(user_id, self.calendars.get("*", []))
+        return _clip(blocks, _utc(time_min), _utc(time_max))
+
+    async def aclose(self):
+        pass
+
+
+def build_calendar_provider(kind: str, google_client, seed: int = 0, density: int = 4,
+                            fixture_path: Optional[str] = None) -> CalendarProvider:
+    if kind == "google":
+        return google_client
+    if kind == "synthetic":
+        return SyntheticCalendarProvider(seed, density)
+    if kind == "fixture":
+        if not fixture_path:
+            raise ValueError("The fixture calendar provider needs CALENDAR_FIXTURE")
+        return FixtureCalendarProvider(fixture_path)
+    raise ValueError(f"Unknown calendar provider: {kind} (expected one of {', '.join(CALENDAR_PROVIDERS)})")
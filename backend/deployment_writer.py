@@ -0,0 +1,128 @@
+"""Write-behind batching for deployment records.
+
+CI posts a record per deploy status transition, and those posts arrive in
+bursts after merges. DeploymentWriter queues them in memory and writes them
+with one unordered `insert_many` when `batch_size` records are waiting or
+`flush_interval` seconds after the first one arrives, whichever comes first.
+Past `max_queue` pending records it raises DeploymentQueueFull, and the API
+answers 503 so CI backs off.
+
+A record posted with an idempotency key is written at most once. A retry
+whose key is still queued, or already stored, gets the original record's id
+back, and the unique partial index on `idempotency_key` settles races
+between workers.
+
+Records are lost if the process dies between accepting and flushing them,
+so the server flushes on shutdown and before serving deployment reads.
+"""
+import asyncio
+import logging
+from typing import Dict, List, Optional, Tuple
+
+from pymongo.errors import BulkWriteError, PyMongoError
+
+logger = logging.getLogger(__name__)
+
+DUPLICATE_KEY = 11000
+
+
+class DeploymentQueueFull(Exception):
+    """Raised when max_queue records are already waiting to be written"""
+
+
+class DeploymentWriter:
+    def __init__(self, db, batch_size: int = 100, flush_interval: float = 0.5, max_queue: int = 10_000):
+        self.db = db
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.max_queue = max_queue
+        self.pending: List[Dict] = []
+        # Idempotency key -> record id, for records not yet written
+        self.pending_keys: Dict[str, str] = {}
+        self.written = 0
+        self.duplicates = 0
+        self.rejected = 0
+        self._scheduled = False
+        self._lock = asyncio.Lock()
+
+    async def submit(self, record: Dict, idempotency_key: Optional[str] = None) -> Tuple[str, bool]:
+        """Queue a record; (record id, False) instead if the key was already seen.
+
+        Raises DeploymentQueueFull rather than growing past max_queue.
+        """
+        if idempotency_key:
+            existing = await self._known_id(idempotency_key)
+            if existing is not None:
+                self.duplicates += 1
+                return existing, False
+        if len(self.pending) >= self.max_queue:
+            self.rejected += 1
+            raise DeploymentQueueFull(f"{len(self.pending)} deployment records waiting to be written")
+
+        if idempotency_key:
+            record = {**record, "idempotency_key": idempotency_key}
+            self.pending_keys[idempotency_key] = record["id"]
+        self.pending.append(record)
+        self._schedule()
+        return record["id"], True
+
+    async def _known_id(self, idempotency_key: str) -> Optional[str]:
+        if idempotency_key in self.pending_keys:
+            return self.pending_keys[idempotency_key]
+        stored = await self.db.deployments.find_one({"idempotency_key": idempotency_key}, {"_id": 0, "id": 1})
+        # A concurrent submit may have queued the key while we were reading
+        if stored is None:
+            return self.pending_keys.get(idempotency_key)
+        return stored["id"]
+
+    def _schedule(self):
+        loop = asyncio.get_running_loop()
+        if len(self.pending) >= self.batch_size:
+            asyncio.ensure_future(self.flush())
+        elif not self._scheduled:
+            self._scheduled = True
+            loop.call_later(self.flush_interval, lambda: asyncio.ensure_future(self.flush()))
+
+    async def flush(self):
+        """Write everything queued so far in batch_size chunks.
+
+        On a Mongo error the unwritten records stay queued for the next flush.
+        """
+        async with self._lock:
+            self._scheduled = False
+            while self.pending:
+                batch = self.pending[:self.batch_size]
+                try:
+                    await self.db.deployments.insert_many(batch, ordered=False)
+                    self.written += len(batch)
+                except BulkWriteError as e:
+                    self._count_bulk_errors(e, len(batch))
+                except PyMongoError as e:
+                    logger.warning(f"Deployment batch of {len(batch)} failed, retrying later: {e}")
+                    if not self._scheduled:
+                        self._scheduled = True
+                        asyncio.get_running_loop().call_later(
+                            self.flush_interval, lambda: asyncio.ensure_future(self.flush())
+                        )
+                    return
+                del self.pending[:len(batch)]
+                for record in batch:
+                    self.pending_keys.pop(record.get("idempotency_key"), None)
+
+    def _count_bulk_errors(self, error: BulkWriteError, size: int):
+        write_errors = error.details.get("writeErrors", [])
+        duplicates = sum(1 for e in write_errors if e.get("code") == DUPLICATE_KEY)
+        self.duplicates += duplicates
+        self.written += size - len(write_errors)
+        if len(write_errors) > duplicates:
+            logger.error(f"Dropped {len(write_errors) - duplicates} invalid deployment records: "
+                         f"{[e.get('errmsg') for e in write_errors if e.get('code') != DUPLICATE_KEY]}")
+
+    def stats(self) -> dict:
+        return {
+            "pending": len(self.pending),
+            "max_queue": self.max_queue,
+            "written": self.written,
+            "duplicates": self.duplicates,
+            "rejected": self.rejected,
+        }
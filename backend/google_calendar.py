@@ -0,0 +1,261 @@
+"""Google Calendar availability client.
+
+One httpx.AsyncClient is shared for the lifetime of the app so connections
+(and HTTP/2 streams, when `h2` is installed) are reused across requests.
+Concurrent `busy_times` calls for the same range are coalesced into FreeBusy
+queries of up to FREEBUSY_MAX_ITEMS calendars each.
+"""
+import asyncio
+import logging
+from datetime import datetime, timezone, timedelta
+from typing import Dict, List, Optional, Tuple, Union
+
+import httpx
+
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# FreeBusy accepts at most 50 calendars per query
+FREEBUSY_MAX_ITEMS = 50
+# Refresh access tokens this long before they expire
+TOKEN_REFRESH_MARGIN = timedelta(minutes=5)
+
+
+class CalendarError(Exception):
+    """Raised when a calendar's availability could not be retrieved"""
+
+
+class GoogleCalendarClient:
+    def __init__(self, db, client_id: str, client_secret: str,
+                 api_base: str = "https://www.googleapis.com",
+                 token_url: str = "https://oauth2.googleapis.com/token",
+                 batch_window: float = 0.0,
+                 timeout: float = 10.0,
+                 max_connections: int = 20):
+        self.db = db
+        self.client_id = client_id
+        self.client_secret = client_secret
+        self.api_base = api_base.rstrip('/')
+        self.token_url = token_url
+        self.batch_window = batch_window
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self._http: Optional[httpx.AsyncClient] = None
+        self._pending: Dict[Tuple[str, str], Dict[str, asyncio.Future]] = {}
+        self._refresh_locks: Dict[str, asyncio.Lock] = {}
+        self._fresh_tokens: Dict[str, Dict] = {}
+
+    @property
+    def http(self) -> httpx.AsyncClient:
+        """The shared connection pool, created on first use"""
+        if self._http is None or self._http.is_closed:
+            self._http = httpx.AsyncClient(
+                http2=HTTP2_AVAILABLE,
+                timeout=self.timeout,
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections,
+                    keepalive_expiry=60
+                )
+            )
+        return self._http
+
+    async def aclose(self):
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+
+    # ===== OAuth =====
+    async def exchange_code(self, code: str, redirect_uri: str) -> httpx.Response:
+        return await self.http.post(
+            self.token_url,
+            data={
+                "code": code,
+                "client_id": self.client_id,
+                "client_secret": self.client_secret,
+                "redirect_uri": redirect_uri,
+                "grant_type": "authorization_code"
+            }
+        )
+
+    async def get_user_info(self, access_token: str) -> httpx.Response:
+        return await self.http.get(
+            f"{self.api_base}/oauth2/v2/userinfo",
+            headers={"Authorization": f"Bearer {access_token}"}
+        )
+
+    async def fresh_token(self, token_doc: Dict) -> Dict:
+        """Return token_doc, refreshing and persisting it if it expires soon"""
+        user_id = token_doc["user_id"]
+        token_doc = self._latest_token(token_doc)
+        if not _expires_soon(token_doc):
+            return token_doc
+
+        lock = self._refresh_locks.setdefault(user_id, asyncio.Lock())
+        async with lock:
+            # Another request may have refreshed it while we waited
+            token_doc = self._latest_token(token_doc)
+            if not _expires_soon(token_doc):
+                return token_doc
+            if not token_doc.get("refresh_token"):
+                raise CalendarError(f"Token for user {user_id} expired and has no refresh token")
+
+            response = await self.http.post(
+                self.token_url,
+                data={
+                    "client_id": self.client_id,
+                    "client_secret": self.client_secret,
+                    "refresh_token": token_doc["refresh_token"],
+                    "grant_type": "refresh_token"
+                }
+            )
+            if response.status_code != 200:
+                raise CalendarError(f"Token refresh failed for user {user_id}: {response.status_code}")
+
+            tokens = response.json()
+            expiry = datetime.now(timezone.utc) + timedelta(seconds=tokens.get("expires_in", 3600))
+            update = {"access_token": tokens["access_token"], "expiry": expiry.isoformat()}
+            await self.db.oauth_tokens.update_one({"user_id": user_id}, {"$set": update})
+
+            token_doc = {**token_doc, **update}
+            self._fresh_tokens[user_id] = token_doc
+            return token_doc
+
+    def _latest_token(self, token_doc: Dict) -> Dict:
+        """Prefer a token we refreshed ourselves unless the stored one is newer"""
+        refreshed = self._fresh_tokens.get(token_doc["user_id"])
+        if refreshed and _parse_expiry(refreshed) > _parse_expiry(token_doc):
+            return refreshed
+        return token_doc
+
+    # ===== FreeBusy =====
+    async def free_busy(self, access_token: str, calendar_ids: List[str],
+                        time_min: str, time_max: str) -> Dict[str, Dict]:
+        """Query FreeBusy for any number of calendars, FREEBUSY_MAX_ITEMS per request"""
+        chunks = [calendar_ids[i:i + FREEBUSY_MAX_ITEMS]
+                  for i in range(0, len(calendar_ids), FREEBUSY_MAX_ITEMS)]
+        responses = await asyncio.gather(*(
+            self.http.post(
+                f"{self.api_base}/calendar/v3/freeBusy",
+                json={
+                    "timeMin": time_min,
+                    "timeMax": time_max,
+                    "items": [{"id": calendar_id} for calendar_id in chunk]
+                },
+                headers={"Authorization": f"Bearer {access_token}"}
+            )
+            for chunk in chunks
+        ))
+
+        calendars = {}
+        for response in responses:
+            if response.status_code != 200:
+                raise CalendarError(f"FreeBusy query failed: {response.status_code}")
+            calendars.update(response.json().get("calendars", {}))
+        return calendars
+
+    async def busy_times(self, user_id: str, time_min: str, time_max: str) -> List[Dict]:
+        """Busy blocks for one user; concurrent calls are answered by shared batches"""
+        loop = asyncio.get_running_loop()
+        key = (time_min, time_max)
+        batch = self._pending.get(key)
+        if batch is None:
+            batch = self._pending[key] = {}
+            loop.call_later(self.batch_window, lambda: asyncio.ensure_future(self._flush(key)))
+
+        future = batch.get(user_id)
+        if future is None:
+            future = batch[user_id] = loop.create_future()
+        # Shield so one caller timing out doesn't cancel the answer for the others
+        return await asyncio.shield(future)
+
+    async def _flush(self, key: Tuple[str, str]):
+        batch = self._pending.pop(key)
+        try:
+            results = await self._fetch_batch(list(batch), *key)
+        except Exception as e:
+            results = {user_id: e for user_id in batch}
+
+        for user_id, future in batch.items():
+            if future.done():
+                continue
+            result = results[user_id]
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+    async def _fetch_batch(self, user_ids: List[str], time_min: str,
+                           time_max: str) -> Dict[str, Union[List[Dict], Exception]]:
+        """Answer a batch with as few FreeBusy calls as possible.
+
+        Every member's primary calendar is queried by email with one member's
+        credentials; calendars that credential cannot see fall back to a query
+        with the member's own token.
+        """
+        token_docs = await self.db.oauth_tokens.find(
+            {"user_id": {"$in": user_ids}},
+            {"_id": 0, "user_id": 1, "access_token": 1, "refresh_token": 1, "expiry": 1}
+        ).to_list(len(user_ids))
+        tokens = {doc["user_id"]: doc for doc in token_docs}
+        results: Dict[str, Union[List[Dict], Exception]] = {
+            user_id: [] for user_id in user_ids if user_id not in tokens
+        }
+        if not tokens:
+            return results
+
+        users = await self.db.users.find(
+            {"id": {"$in": list(tokens)}}, {"_id": 0, "id": 1, "email": 1}
+        ).to_list(len(tokens))
+        emails = {user["id"]: user["email"] for user in users if user.get("email")}
+
+        calendars = {}
+        for user_id in tokens:
+            if user_id not in emails:
+                continue
+            try:
+                querier = await self.fresh_token(tokens[user_id])
+                calendars = await self.free_busy(querier["access_token"], list(emails.values()),
+                                                 time_min, time_max)
+                break
+            except (CalendarError, httpx.HTTPError) as e:
+                logger.warning(f"Batched FreeBusy with credentials of user {user_id} failed: {e}")
+
+        fallback = []
+        for user_id in tokens:
+            calendar = calendars.get(emails.get(user_id))
+            if calendar is None or calendar.get("errors"):
+                fallback.append(user_id)
+            else:
+                results[user_id] = calendar.get("busy", [])
+
+        own = await asyncio.gather(
+            *(self._fetch_own(tokens[user_id], time_min, time_max) for user_id in fallback),
+            return_exceptions=True
+        )
+        results.update(zip(fallback, own))
+        return results
+
+    async def _fetch_own(self, token_doc: Dict, time_min: str, time_max: str) -> List[Dict]:
+        token_doc = await self.fresh_token(token_doc)
+        calendars = await self.free_busy(token_doc["access_token"], ["primary"], time_min, time_max)
+        calendar = calendars.get("primary")
+        if calendar is None or calendar.get("errors"):
+            raise CalendarError(f"No availability for user {token_doc['user_id']}")
+        return calendar.get("busy", [])
+
+
+def _parse_expiry(token_doc: Dict) -> datetime:
+    expiry = datetime.fromisoformat(token_doc["expiry"].replace('Z', '+00:00'))
+    if expiry.tzinfo is None:
+        expiry = expiry.replace(tzinfo=timezone.utc)
+    return expiry
+
+
+def _expires_soon(token_doc: Dict) -> bool:
+    return _parse_expiry(token_doc) - datetime.now(timezone.utc) < TOKEN_REFRESH_MARGIN
@@ -0,0 +1,113 @@
+"""MongoDB index declarations and startup query-plan checks.
+
+Every index the API relies on is declared here. `ensure_indexes` creates them
+idempotently (create_indexes is a no-op for existing identical indexes), and
+`verify_query_plans` explains the hot queries and warns about any that would
+scan a whole collection.
+"""
+import logging
+from typing import Dict, List, Tuple
+
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from pymongo.errors import OperationFailure
+
+logger = logging.getLogger(__name__)
+
+INDEXES: Dict[str, List[IndexModel]] = {
+    "users": [
+        IndexModel([("id", ASCENDING)], unique=True, name="id_unique"),
+        IndexModel([("email", ASCENDING)], unique=True, name="email_unique"),
+        # Password users have no google_id, so only enforce uniqueness where it is set
+        IndexModel([("google_id", ASCENDING)], unique=True, name="google_id_unique",
+                   partialFilterExpression={"google_id": {"$type": "string"}}),
+    ],
+    "groups": [
+        IndexModel([("id", ASCENDING)], unique=True, name="id_unique"),
+        IndexModel([("owner_id", ASCENDING), ("created_at", ASCENDING), ("id", ASCENDING)], name="owner_page"),
+        IndexModel([("member_ids", ASCENDING), ("created_at", ASCENDING), ("id", ASCENDING)], name="member_page"),
+    ],
+    "group_invitations": [
+        IndexModel([("group_id", ASCENDING), ("email", ASCENDING)], unique=True, name="group_email_unique"),
+        IndexModel([("email", ASCENDING)], name="email"),
+    ],
+    "availability_bitmaps": [
+        IndexModel([("user_id", ASCENDING), ("day", ASCENDING)], unique=True, name="user_day_unique"),
+    ],
+    "passwords": [
+        IndexModel([("user_id", ASCENDING)], unique=True, name="user_id_unique"),
+    ],
+    "oauth_tokens": [
+        IndexModel([("user_id", ASCENDING)], unique=True, name="user_id_unique"),
+    ],
+    "events": [
+        IndexModel([("id", ASCENDING)], unique=True, name="id_unique"),
+        IndexModel([("group_id", ASCENDING), ("start", ASCENDING)], name="group_start"),
+    ],
+    "deployments": [
+        # id breaks created_at ties so keyset pages and latest-per-environment need no sort stage
+        IndexModel([("environment", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)],
+                   name="environment_page"),
+        IndexModel([("created_at", DESCENDING), ("id", DESCENDING)], name="recent_page"),
+        # Records posted with an Idempotency-Key are stored at most once
+        IndexModel([("idempotency_key", ASCENDING)], unique=True, name="idempotency_key_unique",
+                   partialFilterExpression={"idempotency_key": {"$type": "string"}}),
+    ],
+}
+
+# (collection, filter, sort) for the queries the request handlers run most
+HOT_QUERIES: List[Tuple[str, Dict, List[Tuple[str, int]]]] = [
+    ("users", {"id": "x"}, []),
+    ("users", {"email": "x@example.com"}, []),
+    ("users", {"google_id": "x"}, []),
+    ("users", {"id": {"$in": ["x", "y"]}}, []),
+    ("groups", {"id": "x"}, []),
+    ("groups", {"$or": [{"owner_id": "x"}, {"member_ids": "x"}]}, [("created_at", ASCENDING), ("id", ASCENDING)]),
+    ("group_invitations", {"email": "x@example.com"}, []),
+    ("availability_bitmaps", {"user_id": {"$in": ["x", "y"]}, "day": {"$in": ["2025-01-01"]}}, []),
+    ("passwords", {"user_id": "x"}, []),
+    ("oauth_tokens", {"user_id": {"$in": ["x", "y"]}}, []),
+    ("events", {"group_id": "x"}, []),
+    ("deployments", {"environment": "production"}, [("created_at", DESCENDING), ("id", DESCENDING)]),
+    ("deployments", {}, [("created_at", DESCENDING), ("id", DESCENDING)]),
+    ("deployments", {"created_at": {"$gte": "2025-01-01"}}, []),
+    ("deployments", {"idempotency_key": "x"}, []),
+]
+
+
+async def ensure_indexes(db):
+    """Create all declared indexes; failures are logged so startup can continue"""
+    for collection, models in INDEXES.items():
+        try:
+            await db[collection].create_indexes(models)
+        except OperationFailure as e:
+            # Typically existing duplicates blocking a unique index
+            logger.error(f"Could not create indexes on {collection}: {e}")
+
+
+async def verify_query_plans(db) -> List[str]:
+    """Explain the hot queries and warn about collection scans; returns the offenders"""
+    collscans = []
+    for collection, query, sort in HOT_QUERIES:
+        cursor = db[collection].find(query)
+        if sort:
+            cursor = cursor.sort(sort)
+        try:
+            plan = await cursor.explain()
+        except OperationFailure as e:
+            logger.warning(f"Could not explain query on {collection}: {e}")
+            continue
+        if _has_stage(plan.get("queryPlanner", {}).get("winningPlan", {}), "COLLSCAN"):
+            description = f"{collection}.find({query}) sort={sort}"
+            logger.warning(f"Query falls back to COLLSCAN: {description}")
+            collscans.append(description)
+    return collscans
+
+
+def _has_stage(plan, stage: str) -> bool:
+    if isinstance(plan, dict):
+        if plan.get("stage") == stage:
+            return True
+        return any(_has_stage(value, stage) for value in plan.values())
+    if isinstance(plan, list):
+        return any(_has_stage(item, stage) for item in plan)
+    return False
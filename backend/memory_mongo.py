@@ -0,0 +1,517 @@
+"""In-memory stand-in for the parts of Motor the API uses.
+
+Good enough for tests, benchmarks and load runs without a MongoDB server:
+equality, $in/$nin, comparison, $exists, $or/$and filters; $set,
+$setOnInsert, $addToSet ($each), $push, $pull and $inc updates; projections,
+sorting, skip/limit and bulk_write; and aggregation pipelines of $match,
+$sort, $group, $project, $replaceRoot, $skip and $limit with the handful of
+expression operators the API uses. It is not a general Mongo emulator.
+"""
+import asyncio
+import copy
+import itertools
+import math
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from pymongo import DeleteOne, InsertOne, UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+
+_MISSING = object()
+
+
+def _get(doc: Dict, path: str) -> Any:
+    value: Any = doc
+    for part in path.split('.'):
+        if isinstance(value, dict) and part in value:
+            value = value[part]
+        else:
+            return _MISSING
+    return value
+
+
+def _compare(value, op, operand) -> bool:
+    if value is _MISSING or value is None:
+        return False
+    try:
+        if op == "$gt":
+            return value > operand
+        if op == "$gte":
+            return value >= operand
+        if op == "$lt":
+            return value < operand
+        if op == "$lte":
+            return value <= operand
+    except TypeError:
+        return False
+    raise ValueError(f"Unsupported operator {op}")
+
+
+def _match_value(value, condition) -> bool:
+    if isinstance(condition, dict) and condition and all(k.startswith('$') for k in condition):
+        for op, operand in condition.items():
+            candidates = value if isinstance(value, list) else [value]
+            if op == "$in":
+                if not any(c in operand for c in candidates) and not (value is _MISSING and None in operand):
+                    return False
+            elif op == "$nin":
+                if any(c in operand for c in candidates):
+                    return False
+            elif op == "$ne":
+                if operand in candidates:
+                    return False
+            elif op == "$exists":
+                if (value is not _MISSING) != bool(operand):
+                    return False
+            elif op in ("$gt", "$gte", "$lt", "$lte"):
+                if not any(_compare(c, op, operand) for c in candidates):
+                    return False
+            else:
+                raise ValueError(f"Unsupported operator {op}")
+        return True
+    if isinstance(value, list) and not isinstance(condition, list):
+        return condition in value
+    if value is _MISSING:
+        return condition is None
+    return value == condition
+
+
+def matches(doc: Dict, query: Dict) -> bool:
+    for key, condition in query.items():
+        if key == "$or":
+            if not any(matches(doc, q) for q in condition):
+                return False
+        elif key == "$and":
+            if not all(matches(doc, q) for q in condition):
+                return False
+        elif not _match_value(_get(doc, key), condition):
+            return False
+    return True
+
+
+def _project(doc: Dict, projection: Optional[Dict]) -> Dict:
+    doc = copy.deepcopy(doc)
+    if not projection:
+        return doc
+    include = {k for k, v in projection.items() if v and k != "_id"}
+    if include:
+        result = {k: doc[k] for k in include if k in doc}
+        if projection.get("_id", 1) and "_id" in doc:
+            result["_id"] = doc["_id"]
+        return result
+    for key, value in projection.items():
+        if not value:
+            doc.pop(key, None)
+    return doc
+
+
+def _sort_key(value):
+    # None/missing sort first, as in Mongo
+    if value is _MISSING or value is None:
+        return (0, 0)
+    return (1, value)
+
+
+class MemoryCursor:
+    def __init__(self, docs: List[Dict], projection: Optional[Dict]):
+        self._docs = docs
+        self._projection = projection
+        self._sort: List[Tuple[str, int]] = []
+        self._skip = 0
+        self._limit = 0
+
+    def sort(self, key_or_list, direction: int = 1):
+        if isinstance(key_or_list, str):
+            self._sort = [(key_or_list, direction)]
+        else:
+            self._sort = list(key_or_list)
+        return self
+
+    def skip(self, count: int):
+        self._skip = count
+        return self
+
+    def limit(self, count: int):
+        self._limit = count
+        return self
+
+    def _results(self) -> List[Dict]:
+        docs = list(self._docs)
+        for key, direction in reversed(self._sort):
+            docs.sort(key=lambda d: _sort_key(_get(d, key)), reverse=direction < 0)
+        docs = docs[self._skip:]
+        if self._limit:
+            docs = docs[:self._limit]
+        return [_project(d, self._projection) for d in docs]
+
+    async def to_list(self, length: Optional[int] = None) -> List[Dict]:
+        await asyncio.sleep(0)
+        docs = self._results()
+        return docs if length is None else docs[:length]
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for doc in self._results():
+            yield doc
+
+    async def explain(self) -> Dict:
+        return {"queryPlanner": {"winningPlan": {"stage": "MEMORY"}}}
+
+
+class InsertOneResult:
+    def __init__(self, inserted_id):
+        self.inserted_id = inserted_id
+
+
+class UpdateResult:
+    def __init__(self, matched_count: int, modified_count: int, upserted_id=None):
+        self.matched_count = matched_count
+        self.modified_count = modified_count
+        self.upserted_id = upserted_id
+
+
+class DeleteResult:
+    def __init__(self, deleted_count: int):
+        self.deleted_count = deleted_count
+
+
+class BulkWriteResult:
+    def __init__(self, inserted: int, matched: int, modified: int, upserted: int, deleted: int):
+        self.inserted_count = inserted
+        self.matched_count = matched
+        self.modified_count = modified
+        self.upserted_count = upserted
+        self.deleted_count = deleted
+
+
+class MemoryCollection:
+    _ids = itertools.count(1)
+
+    def __init__(self, name: str):
+        self.name = name
+        self.docs: List[Dict] = []
+        self.unique_keys: List[Tuple[str, ...]] = []
+
+    # ===== Indexes =====
+    async def create_indexes(self, models: Iterable):
+        for model in models:
+            spec = model.document
+            if spec.get("unique") and "partialFilterExpression" not in spec:
+                self.unique_keys.append(tuple(spec["key"].keys()))
+        return []
+
+    async def create_index(self, keys, unique: bool = False, **kwargs):
+        if unique:
+            self.unique_keys.append(tuple(k for k, _ in keys) if isinstance(keys, list) else (keys,))
+
+    def _check_unique(self, doc: Dict, ignore: Optional[Dict] = None):
+        for key in self.unique_keys:
+            values = tuple(_get(doc, k) for k in key)
+            if _MISSING in values:
+                continue
+            for other in self.docs:
+                if other is not ignore and tuple(_get(other, k) for k in key) == values:
+                    raise DuplicateKeyError(f"E11000 duplicate key error collection: {self.name} {dict(zip(key, values))}")
+
+    # ===== Reads =====
+    def find(self, query: Optional[Dict] = None, projection: Optional[Dict] = None) -> MemoryCursor:
+        query = query or {}
+        return MemoryCursor([d for d in self.docs if matches(d, query)], projection)
+
+    async def find_one(self, query: Optional[Dict] = None, projection: Optional[Dict] = None,
+                       sort: Optional[List[Tuple[str, int]]] = None) -> Optional[Dict]:
+        cursor = self.find(query, projection)
+        if sort:
+            cursor.sort(sort)
+        docs = await cursor.limit(1).to_list(1)
+        return docs[0] if docs else None
+
+    def aggregate(self, pipeline: List[Dict]) -> MemoryCursor:
+        return MemoryCursor(_run_pipeline(copy.deepcopy(self.docs), pipeline), None)
+
+    async def count_documents(self, query: Dict) -> int:
+        await asyncio.sleep(0)
+        return sum(1 for d in self.docs if matches(d, query))
+
+    # ===== Writes =====
+    def _insert(self, document: Dict) -> Any:
+        doc = copy.deepcopy(document)
+        doc.setdefault("_id", next(self._ids))
+        self._check_unique(doc)
+        self.docs.append(doc)
+        document.setdefault("_id", doc["_id"])
+        return doc["_id"]
+
+    async def insert_one(self, document: Dict) -> InsertOneResult:
+        await asyncio.sleep(0)
+        return InsertOneResult(self._insert(document))
+
+    async def insert_many(self, documents: List[Dict], ordered: bool = True):
+        await asyncio.sleep(0)
+        errors = []
+        for index, document in enumerate(documents):
+            try:
+                self._insert(document)
+            except DuplicateKeyError as e:
+                errors.append({"index": index, "code": 11000, "errmsg": str(e)})
+                if ordered:
+                    break
+        if errors:
+            raise BulkWriteError({"writeErrors": errors, "nInserted": len(documents) - len(errors)})
+
+    def _update(self, query: Dict, update: Dict, upsert: bool, many: bool) -> UpdateResult:
+        targets = [d for d in self.docs if matches(d, query)]
+        if not many:
+            targets = targets[:1]
+        if not targets:
+            if not upsert:
+                return UpdateResult(0, 0)
+            doc = {k: v for k, v in query.items() if not k.startswith('$') and not isinstance(v, dict)}
+            _apply_update(doc, update, inserting=True)
+            return UpdateResult(0, 0, self._insert(doc))
+        for doc in targets:
+            updated = copy.deepcopy(doc)
+            _apply_update(updated, update, inserting=False)
+            self._check_unique(updated, ignore=doc)
+            doc.clear()
+            doc.update(updated)
+        return UpdateResult(len(targets), len(targets))
+
+    async def update_one(self, query: Dict, update: Dict, upsert: bool = False) -> UpdateResult:
+        await asyncio.sleep(0)
+        return self._update(query, update, upsert, many=False)
+
+    async def update_many(self, query: Dict, update: Dict, upsert: bool = False) -> UpdateResult:
+        await asyncio.sleep(0)
+        return self._update(query, update, upsert, many=True)
+
+    async def delete_one(self, query: Dict) -> DeleteResult:
+        await asyncio.sleep(0)
+        for i, doc in enumerate(self.docs):
+            if matches(doc, query):
+                del self.docs[i]
+                return DeleteResult(1)
+        return DeleteResult(0)
+
+    async def delete_many(self, query: Dict) -> DeleteResult:
+        await asyncio.sleep(0)
+        before = len(self.docs)
+        self.docs = [d for d in self.docs if not matches(d, query)]
+        return DeleteResult(before - len(self.docs))
+
+    async def bulk_write(self, requests: List, ordered: bool = True) -> BulkWriteResult:
+        await asyncio.sleep(0)
+        inserted = matched = modified = upserted = deleted = 0
+        for request in requests:
+            if isinstance(request, InsertOne):
+                self._insert(request._doc)
+                inserted += 1
+            elif isinstance(request, UpdateOne):
+                result = self._update(request._filter, request._doc, bool(request._upsert), many=False)
+                matched += result.matched_count
+                modified += result.modified_count
+                upserted += result.upserted_id is not None
+            elif isinstance(request, DeleteOne):
+                deleted += (await self.delete_one(request._filter)).deleted_count
+            else:
+                raise ValueError(f"Unsupported bulk operation {request!r}")
+        return BulkWriteResult(inserted, matched, modified, upserted, deleted)
+
+
+def _apply_update(doc: Dict, update: Dict, inserting: bool):
+    for op, fields in update.items():
+        if op == "$set":
+            doc.update(copy.deepcopy(fields))
+        elif op == "$setOnInsert":
+            if inserting:
+                doc.update(copy.deepcopy(fields))
+        elif op == "$inc":
+            for key, amount in fields.items():
+                doc[key] = doc.get(key, 0) + amount
+        elif op in ("$addToSet", "$push"):
+            for key, value in fields.items():
+                items = value["$each"] if isinstance(value, dict) and "$each" in value else [value]
+                current = doc.setdefault(key, [])
+                for item in items:
+                    if op == "$push" or item not in current:
+                        current.append(copy.deepcopy(item))
+        elif op == "$pull":
+            for key, value in fields.items():
+                doc[key] = [item for item in doc.get(key, []) if not _match_value(item, value)]
+        else:
+            raise ValueError(f"Unsupported update operator {op}")
+
+
+# ===== Aggregation =====
+def _value(value):
+    return None if value is _MISSING else value
+
+
+def _expr(doc: Dict, expr, variables: Optional[Dict] = None):
+    """Evaluate an aggregation expression; missing fields come back as _MISSING"""
+    if isinstance(expr, str) and expr.startswith("$$"):
+        name, _, path = expr[2:].partition('.')
+        value = doc if name == "ROOT" else (variables or {})[name]
+        return _get(value, path) if path else value
+    if isinstance(expr, str) and expr.startswith("$"):
+        return _get(doc, expr[1:])
+    if isinstance(expr, list):
+        return [_value(_expr(doc, e, variables)) for e in expr]
+    if isinstance(expr, dict):
+        if len(expr) == 1 and next(iter(expr)).startswith("$"):
+            op, args = next(iter(expr.items()))
+            return _operator(doc, op, args, variables)
+        return {k: _value(_expr(doc, v, variables)) for k, v in expr.items()}
+    return expr
+
+
+def _operator(doc: Dict, op: str, args, variables: Optional[Dict]):
+    if op == "$cond":
+        if isinstance(args, dict):
+            args = [args["if"], args["then"], args["else"]]
+        return _expr(doc, args[1] if _value(_expr(doc, args[0], variables)) else args[2], variables)
+    if op == "$filter":
+        name = args.get("as", "this")
+        return [
+            item for item in _value(_expr(doc, args["input"], variables)) or []
+            if _value(_expr(doc, args["cond"], {**(variables or {}), name: item}))
+        ]
+    values = _expr(doc, args if isinstance(args, list) else [args], variables)
+    if op == "$eq":
+        return values[0] == values[1]
+    if op == "$ne":
+        return values[0] != values[1]
+    if op in ("$gt", "$gte", "$lt", "$lte"):
+        return _compare(values[0], op, values[1])
+    if op == "$ifNull":
+        return values[0] if values[0] is not None else values[1]
+    if any(v is None for v in values):
+        return None
+    if op == "$size":
+        return len(values[0])
+    if op == "$arrayElemAt":
+        array, index = values[0], int(values[1])
+        return array[index] if -len(array) <= index < len(array) else _MISSING
+    if op == "$add":
+        return sum(values)
+    if op == "$subtract":
+        return values[0] - values[1]
+    if op == "$multiply":
+        result = 1
+        for value in values:
+            result *= value
+        return result
+    if op == "$divide":
+        return values[0] / values[1]
+    if op == "$ceil":
+        return math.ceil(values[0])
+    if op == "$floor":
+        return math.floor(values[0])
+    if op == "$substrBytes":
+        return values[0][values[1]:values[1] + values[2]]
+    raise ValueError(f"Unsupported expression operator {op}")
+
+
+def _accumulate(docs: List[Dict], op: str, expr):
+    values = [_expr(doc, expr) for doc in docs]
+    present = [v for v in values if v is not _MISSING and v is not None]
+    if op == "$sum":
+        return sum(v for v in present if isinstance(v, (int, float)))
+    if op == "$avg":
+        return sum(present) / len(present) if present else None
+    if op == "$first":
+        return _value(values[0])
+    if op == "$last":
+        return _value(values[-1])
+    if op == "$max":
+        return max(present) if present else None
+    if op == "$min":
+        return min(present) if present else None
+    if op == "$push":
+        return [_value(v) for v in values if v is not _MISSING]
+    raise ValueError(f"Unsupported accumulator {op}")
+
+
+def _group_key(key):
+    return repr(sorted(key.items())) if isinstance(key, dict) else repr(key)
+
+
+def _run_pipeline(docs: List[Dict], pipeline: List[Dict]) -> List[Dict]:
+    for stage in pipeline:
+        (name, spec), = stage.items()
+        if name == "$match":
+            docs = [d for d in docs if matches(d, spec)]
+        elif name == "$sort":
+            for key, direction in reversed(list(spec.items())):
+                docs.sort(key=lambda d: _sort_key(_get(d, key)), reverse=direction < 0)
+        elif name == "$group":
+            groups: Dict[str, Tuple[Any, List[Dict]]] = {}
+            for doc in docs:
+                key = _value(_expr(doc, spec["_id"]))
+                groups.setdefault(_group_key(key), (key, []))[1].append(doc)
+            docs = [
+                {"_id": key, **{
+                    field: _accumulate(members, *next(iter(accumulator.items())))
+                    for field, accumulator in spec.items() if field != "_id"
+                }}
+                for key, members in groups.values()
+            ]
+        elif name == "$project":
+            docs = [_project_stage(d, spec) for d in docs]
+        elif name == "$replaceRoot":
+            docs = [_value(_expr(d, spec["newRoot"])) for d in docs]
+        elif name == "$skip":
+            docs = docs[spec:]
+        elif name == "$limit":
+            docs = docs[:spec]
+        else:
+            raise ValueError(f"Unsupported pipeline stage {name}")
+    return docs
+
+
+def _project_stage(doc: Dict, spec: Dict) -> Dict:
+    if all(v in (0, False) for v in spec.values()):
+        return _project(doc, spec)
+    result = {}
+    if spec.get("_id", 1) and "_id" in doc:
+        result["_id"] = doc["_id"]
+    for field, value in spec.items():
+        if field == "_id" and value in (0, 1, True, False):
+            continue
+        computed = _get(doc, field) if value is True or value == 1 else _expr(doc, value)
+        if computed is not _MISSING:
+            result[field] = computed
+    return result
+
+
+class MemoryDatabase:
+    def __init__(self):
+        self._collections: Dict[str, MemoryCollection] = {}
+
+    def __getitem__(self, name: str) -> MemoryCollection:
+        if name not in self._collections:
+            self._collections[name] = MemoryCollection(name)
+        return self._collections[name]
+
+    def __getattr__(self, name: str) -> MemoryCollection:
+        if name.startswith('_'):
+            raise AttributeError(name)
+        return self[name]
+
+    async def command(self, name: str, *args, **kwargs) -> Dict:
+        await asyncio.sleep(0)
+        return {"ok": 1.0}
+
+
+class MemoryClient:
+    def __init__(self, *args, **kwargs):
+        self._databases: Dict[str, MemoryDatabase] = {}
+
+    def __getitem__(self, name: str) -> MemoryDatabase:
+        if name not in self._databases:
+            self._databases[name] = MemoryDatabase()
+        return self._databases[name]
+
+    def close(self):
+        pass
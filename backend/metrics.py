@@ -0,0 +1,167 @@
+"""Prometheus metrics for the API.
+
+Everything is registered on the default registry and served at /metrics.
+Request latency is labelled by route template rather than raw path, and
+scoring durations by coarse slot/member count buckets, so label cardinality
+stays bounded. Mongo timings come from a pymongo command listener, so they
+cover every driver call without wrapping individual queries.
+"""
+import asyncio
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Sequence, Tuple
+
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, Counter, Histogram, generate_latest
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+from pymongo import monitoring
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+FAST_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+# Upper bounds of the size buckets used as scoring labels
+SLOT_COUNT_BOUNDS = (100, 1000, 10000, 100000)
+MEMBER_COUNT_BOUNDS = (5, 20, 100, 500)
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template",
+    ["method", "route", "status"], buckets=LATENCY_BUCKETS
+)
+MONGO_LATENCY = Histogram(
+    "mongo_operation_duration_seconds", "MongoDB command latency",
+    ["collection", "operation"], buckets=FAST_BUCKETS
+)
+MONGO_ERRORS = Counter(
+    "mongo_operation_errors_total", "Failed MongoDB commands", ["collection", "operation"]
+)
+CALENDAR_LATENCY = Histogram(
+    "calendar_fetch_duration_seconds", "Busy-time fetch latency per member from the calendar backend",
+    ["backend"], buckets=LATENCY_BUCKETS
+)
+CALENDAR_ERRORS = Counter(
+    "calendar_fetch_errors_total", "Busy-time fetches that failed or timed out", ["backend", "reason"]
+)
+SCORING_LATENCY = Histogram(
+    "find_available_slots_duration_seconds", "Slot scoring time by engine and problem size",
+    ["engine", "slots_le", "members_le"], buckets=FAST_BUCKETS + LATENCY_BUCKETS[7:]
+)
+EVENT_LOOP_LAG = Histogram(
+    "event_loop_lag_seconds", "How late the event loop woke a periodic probe",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+)
+
+
+def size_bucket(value: int, bounds: Sequence[int]) -> str:
+    """Smallest bound >= value as a label, '+Inf' past the last one"""
+    for bound in bounds:
+        if value <= bound:
+            return str(bound)
+    return "+Inf"
+
+
+def route_template(request) -> str:
+    """The matched route's path template, e.g. /api/groups/{group_id}"""
+    route = request.scope.get("route")
+    return getattr(route, "path", "unmatched")
+
+
+def metrics_payload() -> Tuple[bytes, str]:
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
+
+
+@contextmanager
+def time_scoring(engine: str, slots: int, members: int) -> Iterator[None]:
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        SCORING_LATENCY.labels(
+            engine, size_bucket(slots, SLOT_COUNT_BOUNDS), size_bucket(members, MEMBER_COUNT_BOUNDS)
+        ).observe(time.perf_counter() - start)
+
+
+@contextmanager
+def time_calendar_fetch(backend: str) -> Iterator[None]:
+    """Time one calendar fetch and count it as an error if it raises; cancellations are ignored"""
+    start = time.perf_counter()
+    try:
+        yield
+    except asyncio.CancelledError:
+        raise
+    except Exception:
+        CALENDAR_ERRORS.labels(backend, "error").inc()
+        CALENDAR_LATENCY.labels(backend).observe(time.perf_counter() - start)
+        raise
+    CALENDAR_LATENCY.labels(backend).observe(time.perf_counter() - start)
+
+
+class MongoCommandListener(monitoring.CommandListener):
+    """Feeds driver command timings into MONGO_LATENCY / MONGO_ERRORS"""
+
+    def __init__(self):
+        self._collections: Dict[Tuple[Any, int], str] = {}
+
+    def started(self, event):
+        target = event.command.get("collection") if event.command_name == "getMore" else \
+            event.command.get(event.command_name)
+        self._collections[(event.connection_id, event.request_id)] = target if isinstance(target, str) else "-"
+
+    def succeeded(self, event):
+        self._observe(event)
+
+    def failed(self, event):
+        collection = self._observe(event)
+        MONGO_ERRORS.labels(collection, event.command_name).inc()
+
+    def _observe(self, event) -> str:
+        collection = self._collections.pop((event.connection_id, event.request_id), "-")
+        MONGO_LATENCY.labels(collection, event.command_name).observe(event.duration_micros / 1e6)
+        return collection
+
+
+class AppStatsCollector:
+    """Exposes the counters the in-process caches, the scoring pool and the
+    deployment writer already keep"""
+
+    def __init__(self, caches: Dict[str, Any], scoring_pool, deployment_writer=None):
+        self.caches = caches
+        self.scoring_pool = scoring_pool
+        self.deployment_writer = deployment_writer
+
+    def collect(self):
+        hits = CounterMetricFamily("cache_hits", "Cache lookups answered from memory", labels=["cache"])
+        misses = CounterMetricFamily("cache_misses", "Cache lookups that went to the backing store",
+                                     labels=["cache"])
+        ratio = GaugeMetricFamily("cache_hit_ratio", "Lifetime hit ratio per cache", labels=["cache"])
+        for name, cache in self.caches.items():
+            lookups = cache.hits + cache.misses
+            hits.add_metric([name], cache.hits)
+            misses.add_metric([name], cache.misses)
+            ratio.add_metric([name], cache.hits / lookups if lookups else 0.0)
+        yield hits
+        yield misses
+        yield ratio
+
+        stats = self.scoring_pool.stats()
+        yield GaugeMetricFamily("scoring_pool_active_requests", "Scoring requests running on the pool",
+                                value=stats["active"])
+        yield CounterMetricFamily("scoring_pool_rejected", "Scoring requests rejected with 503",
+                                  value=stats["rejected"])
+
+        if self.deployment_writer is not None:
+            stats = self.deployment_writer.stats()
+            yield GaugeMetricFamily("deployment_queue_pending", "Deployment records waiting to be written",
+                                    value=stats["pending"])
+            yield CounterMetricFamily("deployment_records_rejected",
+                                      "Deployment records rejected with 503 because the queue was full",
+                                      value=stats["rejected"])
+            yield CounterMetricFamily("deployment_records_duplicate",
+                                      "Deployment records dropped as idempotent retries", value=stats["duplicates"])
+
+
+async def monitor_event_loop_lag(interval: float):
+    """Sleep `interval` seconds in a loop and record how late each wake-up is"""
+    loop = asyncio.get_running_loop()
+    while True:
+        start = loop.time()
+        await asyncio.sleep(interval)
+        EVENT_LOOP_LAG.observe(max(0.0, loop.time() - start - interval))
@@ -0,0 +1,225 @@
+"""Per-request timing traces.
+
+Every request runs with a lightweight trace in a context variable, and the
+instrumented layers (Mongo through TracedDatabase, calendar fetches, slot
+scoring) record spans into it with `span(category, name)`. A trace is kept in
+the profiler's ring buffer, and returned as a Server-Timing header, when the
+client sends the profile header or the request is sampled. It is also dumped
+to the log when the request runs past the slow threshold.
+
+Spans of concurrent work (parallel calendar fetches, say) overlap, so the
+per-category totals can add up to more than the wall time. Streaming
+responses are timed until their headers are sent.
+"""
+import json
+import logging
+import random
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar, Token
+from typing import Any, Dict, Iterator, List, Mapping, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Spans kept per trace; later ones are only counted
+MAX_SPANS = 2000
+
+
+class Trace:
+    def __init__(self, method: str, path: str, profiled: bool):
+        self.id = uuid.uuid4().hex[:16]
+        self.method = method
+        self.path = path
+        self.route = path
+        self.profiled = profiled
+        self.slow = False
+        self.status: Optional[int] = None
+        self.started_at = time.time()
+        self.duration = 0.0
+        self.spans: List[Dict[str, Any]] = []
+        self.dropped_spans = 0
+        self._start = time.perf_counter()
+
+    def add(self, category: str, name: str, start: float, end: float, error: Optional[str] = None):
+        if len(self.spans) >= MAX_SPANS:
+            self.dropped_spans += 1
+            return
+        span = {
+            "category": category,
+            "name": name,
+            "start_ms": round((start - self._start) * 1000, 3),
+            "duration_ms": round((end - start) * 1000, 3),
+        }
+        if error:
+            span["error"] = error
+        self.spans.append(span)
+
+    def finish(self, status: int, route: str):
+        self.duration = time.perf_counter() - self._start
+        self.status = status
+        self.route = route
+
+    def totals(self) -> Dict[str, float]:
+        """Summed span milliseconds per category"""
+        totals: Dict[str, float] = {}
+        for span in self.spans:
+            totals[span["category"]] = totals.get(span["category"], 0.0) + span["duration_ms"]
+        return totals
+
+    def server_timing(self) -> str:
+        parts = [f"{category};dur={ms:.1f}" for category, ms in self.totals().items()]
+        parts.append(f"total;dur={self.duration * 1000:.1f}")
+        return ", ".join(parts)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "route": self.route,
+            "status": self.status,
+            "started_at": self.started_at,
+            "duration_ms": round(self.duration * 1000, 3),
+            "profiled": self.profiled,
+            "slow": self.slow,
+            "totals_ms": {category: round(ms, 3) for category, ms in self.totals().items()},
+            "spans": self.spans,
+            "dropped_spans": self.dropped_spans,
+        }
+
+
+_current_trace: ContextVar[Optional[Trace]] = ContextVar("request_trace", default=None)
+
+
+def current_trace() -> Optional[Trace]:
+    return _current_trace.get()
+
+
+@contextmanager
+def span(category: str, name: str = "") -> Iterator[None]:
+    """Record the enclosed block in the current request's trace, if there is one"""
+    trace = _current_trace.get()
+    if trace is None:
+        yield
+        return
+    start = time.perf_counter()
+    error = None
+    try:
+        yield
+    except BaseException as e:
+        error = type(e).__name__
+        raise
+    finally:
+        trace.add(category, name, start, time.perf_counter(), error)
+
+
+class RequestProfiler:
+    def __init__(self, sample_rate: float = 0.0, slow_threshold: float = 1.0,
+                 buffer_size: int = 200, header: str = "X-Profile"):
+        self.sample_rate = sample_rate
+        self.slow_threshold = slow_threshold
+        self.header = header
+        self.traces: "deque[Trace]" = deque(maxlen=buffer_size)
+
+    def start(self, method: str, path: str, headers: Mapping[str, str]) -> Tuple[Trace, Token]:
+        profiled = headers.get(self.header, "").lower() in ("1", "true", "yes") or (
+            self.sample_rate > 0 and random.random() < self.sample_rate
+        )
+        trace = Trace(method, path, profiled)
+        return trace, _current_trace.set(trace)
+
+    def finish(self, trace: Trace, token: Token, status: int, route: str):
+        """Close the trace; keep it if profiled or slow, and log it if slow"""
+        _current_trace.reset(token)
+        trace.finish(status, route)
+        trace.slow = self.slow_threshold > 0 and trace.duration >= self.slow_threshold
+        if trace.slow:
+            logger.warning(f"Slow request trace: {json.dumps(trace.to_dict())}")
+        if trace.slow or trace.profiled:
+            self.traces.append(trace)
+
+    def recent(self, limit: int = 50, slow_only: bool = False) -> List[Dict[str, Any]]:
+        """Kept traces, newest first"""
+        traces = [t for t in reversed(self.traces) if t.slow or not slow_only]
+        return [t.to_dict() for t in traces[:limit]]
+
+
+# ===== Mongo instrumentation =====
+class TracedCursor:
+    """Cursor wrapper that records `to_list` as a span"""
+
+    def __init__(self, cursor, name: str):
+        self._cursor = cursor
+        self._name = name
+
+    def sort(self, *args, **kwargs):
+        self._cursor = self._cursor.sort(*args, **kwargs)
+        return self
+
+    def skip(self, *args, **kwargs):
+        self._cursor = self._cursor.skip(*args, **kwargs)
+        return self
+
+    def limit(self, *args, **kwargs):
+        self._cursor = self._cursor.limit(*args, **kwargs)
+        return self
+
+    async def to_list(self, *args, **kwargs):
+        with span("mongo", self._name):
+            return await self._cursor.to_list(*args, **kwargs)
+
+    def __aiter__(self):
+        return self._cursor.__aiter__()
+
+    def __getattr__(self, name: str):
+        return getattr(self._cursor, name)
+
+
+class TracedCollection:
+    """Collection wrapper that records each awaited operation as a span"""
+
+    CURSOR_METHODS = frozenset({"find", "aggregate"})
+    ASYNC_METHODS = frozenset({
+        "find_one", "insert_one", "insert_many", "update_one", "update_many", "replace_one",
+        "delete_one", "delete_many", "bulk_write", "count_documents", "distinct",
+        "find_one_and_update", "create_index", "create_indexes",
+    })
+
+    def __init__(self, collection):
+        self._collection = collection
+
+    def __getattr__(self, name: str):
+        attr = getattr(self._collection, name)
+        label = f"{self._collection.name}.{name}"
+        if name in self.CURSOR_METHODS:
+            return lambda *args, **kwargs: TracedCursor(attr(*args, **kwargs), label)
+        if name in self.ASYNC_METHODS:
+            async def traced(*args, **kwargs):
+                with span("mongo", label):
+                    return await attr(*args, **kwargs)
+            return traced
+        return attr
+
+
+class TracedDatabase:
+    """Database wrapper handing out TracedCollections"""
+
+    def __init__(self, database):
+        self._database = database
+        self._collections: Dict[str, TracedCollection] = {}
+
+    def __getitem__(self, name: str) -> TracedCollection:
+        if name not in self._collections:
+            self._collections[name] = TracedCollection(self._database[name])
+        return self._collections[name]
+
+    def __getattr__(self, name: str):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        return self[name]
+
+    async def command(self, *args, **kwargs):
+        with span("mongo", f"command.{args[0] if args else ''}"):
+            return await self._database.command(*args, **kwargs)
@@ -0,0 +1,464 @@
+"""Slot-finding engine used by the scheduling routes.
+
+Busy blocks are parsed and sorted once per member, turned into the range of
+candidate slot indices they rule out, and folded into sorted change points so
+per-slot availability comes out of a single streaming sweep. A NumPy
+backend rasterizes the same data into a members x ticks matrix instead.
+
+Both engines also run on pre-parsed intervals (microsecond offsets from the
+range start), which pack into plain bytes for worker processes, and the sweep
+can score any sub-range of slot indices so long ranges split into chunks.
+"""
+import heapq
+import math
+from array import array
+from collections import Counter
+from datetime import datetime, timedelta, timezone, tzinfo
+from functools import lru_cache
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+import numpy as np
+
+MICROSECOND = timedelta(microseconds=1)
+HOUR_US = 3_600_000_000
+QUARTER_HOUR = timedelta(minutes=15)
+QUARTER_HOUR_US = 900_000_000
+
+# (slot index, available members, coverage ratio, score)
+Candidate = Tuple[int, int, float, float]
+# (duration index, first slot index, available members per occurrence, score)
+SeriesCandidate = Tuple[int, int, Tuple[int, ...], float]
+Intervals = List[Tuple[int, int]]
+
+
+def parse_iso(value: str) -> datetime:
+    """Parse an ISO timestamp, accepting a trailing 'Z' for UTC"""
+    return datetime.fromisoformat(value.replace('Z', '+00:00'))
+
+
+def to_micros(delta: timedelta) -> int:
+    """Exact integer microseconds in a timedelta"""
+    return delta // MICROSECOND
+
+
+def day_offset(start_dt: datetime) -> int:
+    """Microseconds between local midnight and start_dt.
+
+    Range strings carry fixed offsets, so wall-clock hours advance linearly
+    from here.
+    """
+    return to_micros(start_dt - start_dt.replace(hour=0, minute=0, second=0, microsecond=0))
+
+
+def slot_count(start_dt: datetime, end_dt: datetime,
+               duration_delta: timedelta, granularity_delta: timedelta) -> int:
+    """Number of candidate slots `start + k * granularity` that fit in the range"""
+    span = to_micros(end_dt - start_dt) - to_micros(duration_delta)
+    if span < 0:
+        return 0
+    return span // to_micros(granularity_delta) + 1
+
+
+def parse_busy_blocks(busy_blocks: List[Dict], start_dt: datetime) -> Intervals:
+    """Parse a member's busy blocks into sorted (start, end) microsecond offsets from start_dt"""
+    intervals = [
+        (to_micros(parse_iso(busy['start']) - start_dt), to_micros(parse_iso(busy['end']) - start_dt))
+        for busy in busy_blocks
+    ]
+    intervals.sort()
+    return intervals
+
+
+def pack_intervals(intervals: Intervals) -> bytes:
+    """Intervals as flat signed 64-bit integers"""
+    return array('q', [value for interval in intervals for value in interval]).tobytes()
+
+
+def unpack_intervals(data: bytes) -> Intervals:
+    values = array('q')
+    values.frombytes(data)
+    return list(zip(values[0::2], values[1::2]))
+
+
+def pack_busy_times(all_busy_times: Dict[str, List[Dict]], start_dt: datetime) -> List[bytes]:
+    """Packed intervals for every member, in member order"""
+    return [pack_intervals(parse_busy_blocks(blocks, start_dt)) for blocks in all_busy_times.values()]
+
+
+def blocked_slot_ranges(intervals: Intervals, duration_us: int, granularity_us: int,
+                        first_slot: int, end_slot: int) -> List[Tuple[int, int]]:
+    """Merged, inclusive ranges of slot indices in [first_slot, end_slot) that overlap any interval.
+
+    A slot starting at offset t overlaps the busy interval (s, e) exactly when
+    s - duration < t < e, so each interval rules out a contiguous run of slot
+    indices. Runs are merged so a member is counted at most once per slot.
+    """
+    merged: List[Tuple[int, int]] = []
+    for busy_start, busy_end in intervals:
+        first = (busy_start - duration_us) // granularity_us + 1
+        last = -(-busy_end // granularity_us) - 1
+        first = max(first, first_slot)
+        last = min(last, end_slot - 1)
+        if first > last:
+            continue
+        if merged and first <= merged[-1][1] + 1:
+            if last > merged[-1][1]:
+                merged[-1] = (merged[-1][0], last)
+        else:
+            merged.append((first, last))
+    return merged
+
+
+def iter_counts(member_intervals: Sequence[Intervals], duration_us: int, granularity_us: int,
+                first_slot: int, end_slot: int) -> Iterator[int]:
+    """Number of members free for each slot index in [first_slot, end_slot).
+
+    Only the change points of the busy count are materialized, so memory grows
+    with the number of busy blocks rather than the length of the range.
+    """
+    changes: List[Tuple[int, int]] = []
+    for intervals in member_intervals:
+        for first, last in blocked_slot_ranges(intervals, duration_us, granularity_us, first_slot, end_slot):
+            changes.append((first, 1))
+            changes.append((last + 1, -1))
+    changes.sort()
+
+    members = len(member_intervals)
+    busy = 0
+    position = 0
+    for index in range(first_slot, end_slot):
+        while position < len(changes) and changes[position][0] == index:
+            busy += changes[position][1]
+            position += 1
+        yield members - busy
+
+
+def iter_available_counts(all_busy_times: Dict[str, List[Dict]],
+                          start_dt: datetime,
+                          end_dt: datetime,
+                          duration_delta: timedelta,
+                          granularity_delta: timedelta) -> Iterator[int]:
+    """Number of members free for each candidate slot, in chronological order"""
+    count = slot_count(start_dt, end_dt, duration_delta, granularity_delta)
+    member_intervals = [parse_busy_blocks(blocks, start_dt) for blocks in all_busy_times.values()]
+    return iter_counts(member_intervals, to_micros(duration_delta), to_micros(granularity_delta), 0, count)
+
+
+def available_counts(all_busy_times: Dict[str, List[Dict]],
+                     start_dt: datetime,
+                     end_dt: datetime,
+                     duration_delta: timedelta,
+                     granularity_delta: timedelta) -> List[int]:
+    """`iter_available_counts` as a list"""
+    return list(iter_available_counts(all_busy_times, start_dt, end_dt, duration_delta, granularity_delta))
+
+
+def iter_scored(member_intervals: Sequence[Intervals], duration_us: int, granularity_us: int,
+                preference: Sequence[float], first_slot: int, end_slot: int,
+                min_coverage: float, total_members: int) -> Iterator[Candidate]:
+    """Candidates meeting min_coverage among slot indices [first_slot, end_slot).
+
+    preference holds the normalized time-of-day preference of each slot in
+    [first_slot, end_slot), see `preference_table`.
+    """
+    counts = iter_counts(member_intervals, duration_us, granularity_us, first_slot, end_slot)
+    for offset, available_count in enumerate(counts):
+        coverage_ratio = available_count / total_members if total_members > 0 else 0
+        if coverage_ratio >= min_coverage:
+            score = blend_score(coverage_ratio, float(preference[offset]))
+            yield first_slot + offset, available_count, coverage_ratio, score
+
+
+def iter_candidates(all_busy_times: Dict[str, List[Dict]],
+                    start_dt: datetime,
+                    end_dt: datetime,
+                    duration_delta: timedelta,
+                    granularity_delta: timedelta,
+                    min_coverage: float,
+                    total_members: int,
+                    preference: Optional[np.ndarray] = None) -> Iterator[Candidate]:
+    """Stream (slot index, available, coverage ratio, score) for slots meeting min_coverage.
+
+    Without a preference table, hours are read in the range start's own offset.
+    """
+    count = slot_count(start_dt, end_dt, duration_delta, granularity_delta)
+    granularity_us = to_micros(granularity_delta)
+    if preference is None:
+        preference = preference_table([], start_dt, count, granularity_us)
+    member_intervals = [parse_busy_blocks(blocks, start_dt) for blocks in all_busy_times.values()]
+    return iter_scored(member_intervals, to_micros(duration_delta), granularity_us,
+                       preference, 0, count, min_coverage, total_members)
+
+
+def top_k(candidates: Iterable[Candidate], k: int) -> List[Candidate]:
+    """The k best candidates by score; earlier slots win ties, as with a stable sort.
+
+    Chunk results concatenated in chunk order reduce to the same answer.
+    """
+    return heapq.nlargest(k, candidates, key=lambda candidate: candidate[3])
+
+
+def time_preference(hour: int) -> float:
+    """Prefer afternoon times (14:00-17:00) slightly, penalise early and late hours"""
+    if 14 <= hour <= 17:
+        return 1.2
+    if hour < 9 or hour > 20:
+        return 0.5
+    return 1.0
+
+
+DEFAULT_HOUR_WEIGHTS = tuple(time_preference(hour) for hour in range(24))
+
+
+def blend_score(coverage_ratio, preference):
+    """Blend member coverage with a normalized (0..1) time-of-day preference; scalars or arrays"""
+    return coverage_ratio * 0.7 + preference * 0.3
+
+
+def score_slot(coverage_ratio: float, hour: int) -> float:
+    """Blend member coverage with the default preference for a local hour"""
+    return blend_score(coverage_ratio, time_preference(hour) / 1.2)
+
+
+def resolve_zone(name: Optional[str]) -> tzinfo:
+    """ZoneInfo for an IANA name; unknown or missing names fall back to UTC"""
+    try:
+        return ZoneInfo(name) if name else timezone.utc
+    except (ZoneInfoNotFoundError, ValueError):
+        return timezone.utc
+
+
+# Hour tables are cached per (zone, range start, slot count, granularity); the
+# start is client-chosen, so keep few entries and skip caching long ranges
+LOCAL_HOURS_CACHE_SIZE = 64
+LOCAL_HOURS_CACHE_MAX_SLOTS = 4 * 7 * 24 * 4  # four weeks of quarter hours
+
+
+def local_hours(zone: tzinfo, start_utc: datetime, count: int, granularity_us: int) -> np.ndarray:
+    """Local wall-clock hour in `zone` of each slot `start_utc + k * granularity`.
+
+    The UTC offset is sampled once per quarter hour of the range (every DST
+    transition falls on a quarter hour) and slots look their offset up by
+    index, so each distinct zone costs one pass of utcoffset calls per range
+    instead of one conversion per slot. Tables for ranges up to
+    LOCAL_HOURS_CACHE_MAX_SLOTS slots are cached for repeated scoring.
+    """
+    if count <= LOCAL_HOURS_CACHE_MAX_SLOTS:
+        return _cached_local_hours(zone, start_utc, count, granularity_us)
+    return _local_hours(zone, start_utc, count, granularity_us)
+
+
+def _local_hours(zone: tzinfo, start_utc: datetime, count: int, granularity_us: int) -> np.ndarray:
+    first_quarter = start_utc.replace(minute=start_utc.minute - start_utc.minute % 15, second=0, microsecond=0)
+    lead_us = to_micros(start_utc - first_quarter)
+    slot_us = lead_us + np.arange(count, dtype=np.int64) * granularity_us
+    samples = int(slot_us[-1] // QUARTER_HOUR_US) + 1 if count else 0
+    offsets = np.asarray([
+        to_micros((first_quarter + k * QUARTER_HOUR).astimezone(zone).utcoffset()) for k in range(samples)
+    ], dtype=np.int64)
+
+    local_us = day_offset(first_quarter) + slot_us
+    if samples:
+        local_us = local_us + offsets[slot_us // QUARTER_HOUR_US]
+    hours = (local_us // HOUR_US) % 24
+    hours.flags.writeable = False
+    return hours
+
+
+_cached_local_hours = lru_cache(maxsize=LOCAL_HOURS_CACHE_SIZE)(_local_hours)
+
+
+def preference_table(zones: Sequence[tzinfo], start_dt: datetime, count: int, granularity_us: int,
+                     hour_weights: Optional[Sequence[float]] = None) -> np.ndarray:
+    """Normalized group time-of-day preference of each slot.
+
+    Each member scores a slot by the weight of its local hour (hour_weights,
+    24 values, DEFAULT_HOUR_WEIGHTS when omitted) and the group preference is
+    the members' mean, divided by the largest weight. Without zones, hours
+    are read in the range start's own offset.
+    """
+    weights = np.asarray(hour_weights if hour_weights is not None else DEFAULT_HOUR_WEIGHTS, dtype=float)
+    top = weights.max()
+    normalized = weights / top if top > 0 else np.zeros(24)
+    start_utc = start_dt.astimezone(timezone.utc) if start_dt.tzinfo else start_dt.replace(tzinfo=timezone.utc)
+
+    members = Counter(zones) or Counter([start_dt.tzinfo or timezone.utc])
+    if len(members) == 1:
+        return normalized[local_hours(next(iter(members)), start_utc, count, granularity_us)]
+    table = np.zeros(count)
+    for zone, size in members.items():
+        table += size * normalized[local_hours(zone, start_utc, count, granularity_us)]
+    return table / sum(members.values())
+
+
+def rasterize_intervals(member_intervals: Sequence[Intervals], tick_us: int, ticks: int) -> np.ndarray:
+    """Members x ticks boolean matrix; a tick is busy if any interval overlaps it.
+
+    Zero-length and inverted intervals are ignored.
+    """
+    members = len(member_intervals)
+    rows = [row for row, intervals in enumerate(member_intervals) for _ in intervals]
+    if not rows:
+        return np.zeros((members, ticks), dtype=bool)
+
+    rows = np.asarray(rows, dtype=np.int64)
+    offsets = np.asarray([interval for intervals in member_intervals for interval in intervals], dtype=np.int64)
+    first = np.maximum(offsets[:, 0] // tick_us, 0)
+    last = np.minimum(-(-offsets[:, 1] // tick_us) - 1, ticks - 1)
+    keep = (offsets[:, 1] > offsets[:, 0]) & (first <= last)
+
+    diff = np.zeros((members, ticks + 1), dtype=np.int32)
+    np.add.at(diff, (rows[keep], first[keep]), 1)
+    np.add.at(diff, (rows[keep], last[keep] + 1), -1)
+    return np.cumsum(diff[:, :ticks], axis=1) > 0
+
+
+def rasterize_busy(all_busy_times: Dict[str, List[Dict]], origin: datetime,
+                   tick_us: int, ticks: int) -> np.ndarray:
+    """`rasterize_intervals` over raw busy blocks, with ticks counted from origin"""
+    member_intervals = [parse_busy_blocks(blocks, origin) for blocks in all_busy_times.values()]
+    return rasterize_intervals(member_intervals, tick_us, ticks)
+
+
+def busy_prefix(busy: np.ndarray) -> np.ndarray:
+    """Per-row running count of busy ticks, with a leading zero column"""
+    members, ticks = busy.shape
+    covered = np.zeros((members, ticks + 1), dtype=np.int32)
+    np.cumsum(busy, axis=1, out=covered[:, 1:])
+    return covered
+
+
+def prefix_available_counts(covered: np.ndarray, stride: int, window: int, count: int) -> np.ndarray:
+    """`window_available_counts` from a precomputed `busy_prefix`"""
+    slot_ticks = np.arange(count, dtype=np.int64) * stride
+    blocked = (covered[:, slot_ticks + window] - covered[:, slot_ticks]) > 0
+    return covered.shape[0] - blocked.sum(axis=0, dtype=np.int64)
+
+
+def window_available_counts(busy: np.ndarray, stride: int, window: int, count: int) -> np.ndarray:
+    """Rows free for each window of `window` ticks starting every `stride` ticks"""
+    return prefix_available_counts(busy_prefix(busy), stride, window, count)
+
+
+def interval_counts_numpy(member_intervals: Sequence[Intervals], count: int,
+                          duration_us: int, granularity_us: int) -> np.ndarray:
+    """Vectorized available counts for the first `count` slots.
+
+    Ticks are gcd(duration, granularity) wide so every slot covers a whole
+    number of ticks; a member is free for a slot when the window sum of its
+    busy row is zero.
+    """
+    if count == 0:
+        return np.zeros(0, dtype=np.int64)
+    tick_us = math.gcd(duration_us, granularity_us)
+    stride = granularity_us // tick_us
+    window = duration_us // tick_us
+    ticks = (count - 1) * stride + window
+
+    busy = rasterize_intervals(member_intervals, tick_us, ticks)
+    return window_available_counts(busy, stride, window, count)
+
+
+def available_counts_numpy(all_busy_times: Dict[str, List[Dict]],
+                           start_dt: datetime,
+                           end_dt: datetime,
+                           duration_delta: timedelta,
+                           granularity_delta: timedelta) -> np.ndarray:
+    """Vectorized `available_counts` over a members x ticks busy matrix"""
+    count = slot_count(start_dt, end_dt, duration_delta, granularity_delta)
+    member_intervals = [parse_busy_blocks(blocks, start_dt) for blocks in all_busy_times.values()]
+    return interval_counts_numpy(member_intervals, count, to_micros(duration_delta), to_micros(granularity_delta))
+
+
+def coverage_ratios(counts: np.ndarray, total_members: int) -> np.ndarray:
+    if total_members > 0:
+        return counts / total_members
+    return np.zeros(len(counts))
+
+
+def rank_slot_counts(counts: np.ndarray, preference: np.ndarray,
+                     min_coverage: float, total_members: int, limit: int) -> List[Candidate]:
+    """`rank_counts` with a precomputed `preference_table`"""
+    coverage = coverage_ratios(counts, total_members)
+    scores = blend_score(coverage, preference[:len(counts)])
+
+    qualifying = np.flatnonzero(coverage >= min_coverage)
+    order = qualifying[np.argsort(-scores[qualifying], kind='stable')][:limit]
+    return [(int(i), int(counts[i]), float(coverage[i]), float(scores[i])) for i in order]
+
+
+def rank_counts(counts: np.ndarray,
+                start_dt: datetime,
+                granularity_delta: timedelta,
+                min_coverage: float,
+                total_members: int,
+                limit: int,
+                preference: Optional[np.ndarray] = None) -> List[Candidate]:
+    """Best (slot index, available, coverage ratio, score) tuples, highest score first"""
+    if preference is None:
+        preference = preference_table([], start_dt, len(counts), to_micros(granularity_delta))
+    return rank_slot_counts(counts, preference, min_coverage, total_members, limit)
+
+
+def top_slots_numpy(all_busy_times: Dict[str, List[Dict]],
+                    start_dt: datetime,
+                    end_dt: datetime,
+                    duration_delta: timedelta,
+                    granularity_delta: timedelta,
+                    min_coverage: float,
+                    total_members: int,
+                    limit: int,
+                    preference: Optional[np.ndarray] = None) -> List[Candidate]:
+    """`rank_counts` over the vectorized availability counts"""
+    counts = available_counts_numpy(all_busy_times, start_dt, end_dt, duration_delta, granularity_delta)
+    return rank_counts(counts, start_dt, granularity_delta, min_coverage, total_members, limit, preference)
+
+
+def top_series(member_intervals: Sequence[Intervals], span_us: int, durations_us: Sequence[int],
+               granularity_us: int, interval_us: int, occurrences: int, preference: np.ndarray,
+               min_coverage: float, total_members: int, limit: int) -> List[SeriesCandidate]:
+    """Best recurring series over every duration, from one busy prefix matrix.
+
+    A series is `occurrences` slots of one duration, `interval_us` apart, that
+    all end within span_us. Busy ticks are rasterized and prefix-summed once at
+    gcd(granularity, durations); each duration then reads per-slot counts off
+    the shared prefix, and occurrence k of the series starting at slot i is
+    slot i + k * interval / granularity. Series are ranked by their worst
+    occurrence's coverage blended with their mean slot preference (occurrences
+    can fall on different local hours across a DST change); earlier durations,
+    then earlier starts, win ties. interval_us must be a multiple of
+    granularity_us and preference must cover every slot of the span.
+    """
+    step = interval_us // granularity_us
+    tick_us = math.gcd(granularity_us, *durations_us)
+    covered = busy_prefix(rasterize_intervals(member_intervals, tick_us, span_us // tick_us))
+    stride = granularity_us // tick_us
+
+    keys = []
+    occurrence_counts = []
+    score_chunks = []
+    for duration_index, duration_us in enumerate(durations_us):
+        slots = max(0, (span_us - duration_us) // granularity_us + 1)
+        series = slots - (occurrences - 1) * step
+        if series <= 0:
+            continue
+        counts = prefix_available_counts(covered, stride, duration_us // tick_us, slots)
+        per_occurrence = np.stack([counts[k * step:k * step + series] for k in range(occurrences)])
+        worst_coverage = coverage_ratios(per_occurrence.min(axis=0), total_members)
+        series_preference = np.stack([preference[k * step:k * step + series] for k in range(occurrences)])
+        scores = blend_score(worst_coverage, series_preference.mean(axis=0))
+        qualifying = np.flatnonzero(worst_coverage >= min_coverage)
+        keys.extend((duration_index, int(i)) for i in qualifying)
+        occurrence_counts.append(per_occurrence[:, qualifying])
+        score_chunks.append(scores[qualifying])
+
+    if not keys:
+        return []
+    scores = np.concatenate(score_chunks)
+    occurrence_counts = np.concatenate(occurrence_counts, axis=1)
+    order = np.argsort(-scores, kind='stable')[:limit]
+    return [
+        (keys[i][0], keys[i][1], tuple(int(c) for c in occurrence_counts[:, i]), float(scores[i]))
+        for i in order
+    ]
@@ -0,0 +1,158 @@
+"""Off-loop execution for slot scoring.
+
+Scoring is CPU-bound, so running it inside a request handler stalls every
+other request on the worker. ScoringPool ships packed busy intervals (see
+`scheduling.pack_busy_times`) to a process or thread pool, scores long ranges
+in chunks of slot indices in parallel and merges the per-chunk winners with a
+top-K reduce. Requests small enough that pool overhead would dominate are
+scored inline.
+"""
+import asyncio
+import multiprocessing
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import Callable, List, Optional, Sequence, Tuple, TypeVar
+
+import numpy as np
+
+from scheduling import (
+    Candidate, SeriesCandidate, interval_counts_numpy, iter_scored, rank_slot_counts, top_k, top_series,
+    unpack_intervals
+)
+
+POOL_KINDS = ("process", "thread", "inline")
+
+T = TypeVar("T")
+
+
+class ScoringPoolFull(Exception):
+    """Raised when the pool already has its maximum number of requests in flight"""
+
+
+def score_chunk(packed: Sequence[bytes], duration_us: int, granularity_us: int, preference: np.ndarray,
+                first_slot: int, end_slot: int, min_coverage: float, total_members: int,
+                limit: int) -> List[Candidate]:
+    """Best `limit` candidates among slot indices [first_slot, end_slot), sweep engine.
+
+    preference covers just the chunk's slots.
+    """
+    member_intervals = [unpack_intervals(data) for data in packed]
+    candidates = iter_scored(member_intervals, duration_us, granularity_us, preference,
+                             first_slot, end_slot, min_coverage, total_members)
+    return top_k(candidates, limit)
+
+
+def score_numpy(packed: Sequence[bytes], count: int, duration_us: int, granularity_us: int,
+                preference: np.ndarray, min_coverage: float, total_members: int, limit: int) -> List[Candidate]:
+    """Best `limit` candidates over the whole range, NumPy engine"""
+    member_intervals = [unpack_intervals(data) for data in packed]
+    counts = interval_counts_numpy(member_intervals, count, duration_us, granularity_us)
+    return rank_slot_counts(counts, preference, min_coverage, total_members, limit)
+
+
+def score_series(packed: Sequence[bytes], span_us: int, durations_us: Sequence[int], granularity_us: int,
+                 interval_us: int, occurrences: int, preference: np.ndarray, min_coverage: float,
+                 total_members: int, limit: int) -> List[SeriesCandidate]:
+    """Best `limit` recurring series across all durations (see `scheduling.top_series`)"""
+    member_intervals = [unpack_intervals(data) for data in packed]
+    return top_series(member_intervals, span_us, durations_us, granularity_us, interval_us,
+                      occurrences, preference, min_coverage, total_members, limit)
+
+
+def chunk_bounds(count: int, chunk_slots: int, max_chunks: int) -> List[Tuple[int, int]]:
+    """Split [0, count) into at most max_chunks contiguous, near-equal ranges"""
+    chunks = max(1, min(max_chunks, -(-count // chunk_slots)))
+    step = -(-count // chunks)
+    return [(first, min(first + step, count)) for first in range(0, count, step)]
+
+
+class ScoringPool:
+    def __init__(self, kind: str = "process", size: int = 2, queue_limit: int = 32,
+                 inline_max_work: int = 50_000, chunk_slots: int = 2016):
+        if kind not in POOL_KINDS:
+            raise ValueError(f"Unknown scoring pool kind: {kind}")
+        self.kind = kind
+        self.size = max(1, size)
+        self.queue_limit = queue_limit
+        self.inline_max_work = inline_max_work
+        self.chunk_slots = max(1, chunk_slots)
+        self.active = 0
+        self.rejected = 0
+        self._executor: Optional[Executor] = None
+
+    @property
+    def executor(self) -> Executor:
+        """The worker pool, created on first use"""
+        if self._executor is None:
+            if self.kind == "process":
+                # Spawned workers don't inherit the event loop, sockets or locks of the server
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.size, mp_context=multiprocessing.get_context("spawn")
+                )
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=self.size, thread_name_prefix="scoring")
+        return self._executor
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    async def run(self, work: int, fn: Callable[..., T], *args) -> T:
+        """fn(*args) on the pool, or inline when work is small enough.
+
+        Raises ScoringPoolFull instead of queueing past queue_limit requests.
+        """
+        if self.kind == "inline" or work <= self.inline_max_work:
+            return fn(*args)
+        async with self._slot():
+            return await asyncio.get_running_loop().run_in_executor(self.executor, fn, *args)
+
+    async def score(self, engine: str, packed: List[bytes], count: int, duration_us: int,
+                    granularity_us: int, preference: np.ndarray, min_coverage: float, total_members: int,
+                    limit: int) -> List[Candidate]:
+        """Best `limit` candidates, highest score first; earlier slots win ties.
+
+        preference is the `scheduling.preference_table` of all `count` slots.
+        """
+        if count <= 0:
+            return []
+        work = count * max(len(packed), 1)
+        if engine == "numpy":
+            return await self.run(work, score_numpy, packed, count, duration_us, granularity_us,
+                                  preference, min_coverage, total_members, limit)
+        if self.kind == "inline" or work <= self.inline_max_work:
+            return score_chunk(packed, duration_us, granularity_us, preference, 0, count,
+                               min_coverage, total_members, limit)
+
+        loop = asyncio.get_running_loop()
+        async with self._slot():
+            chunks = await asyncio.gather(*(
+                loop.run_in_executor(
+                    self.executor, score_chunk, packed, duration_us, granularity_us,
+                    preference[first_slot:end_slot], first_slot, end_slot, min_coverage, total_members, limit
+                )
+                for first_slot, end_slot in chunk_bounds(count, self.chunk_slots, self.size)
+            ))
+        # Chunks are in slot order, so the reduce keeps earlier slots on ties
+        return top_k((candidate for chunk in chunks for candidate in chunk), limit)
+
+    @asynccontextmanager
+    async def _slot(self):
+        if self.active >= self.queue_limit:
+            self.rejected += 1
+            raise ScoringPoolFull(f"{self.active} scoring requests already in flight")
+        self.active += 1
+        try:
+            yield
+        finally:
+            self.active -= 1
+
+    def stats(self) -> dict:
+        return {
+            "kind": self.kind,
+            "size": self.size,
+            "active": self.active,
+            "queue_limit": self.queue_limit,
+            "rejected": self.rejected,
+        }
@@ -1,27 +1,60 @@
-from fastapi import FastAPI, APIRouter, HTTPException, Header, Depends
+from fastapi import FastAPI, APIRouter, HTTPException, Header, Depends, Request, Response
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError
 import os
 import logging
+import asyncio
+import time
 from pathlib import Path
-from pydantic import BaseModel, Field, EmailStr
-from typing import List, Optional, Dict, Any
+from pydantic import AfterValidator, BaseModel, Field, EmailStr, confloat
+from typing import Annotated, List, Optional, Dict, Any, Tuple
 import uuid
+import base64
+import json
 from datetime import datetime, timezone, timedelta
 import jwt
 from passlib.context import CryptContext
 import hashlib
-import httpx
+import numpy as np
+from functools import lru_cache
 from urllib.parse import urlencode
 
+from busy_cache import BusyTimeCache
+from busy_timeline import BusyTimelineStore, union_busy
+from calendar_providers import build_calendar_provider
+from deployment_writer import DUPLICATE_KEY, DeploymentQueueFull, DeploymentWriter
+from availability_bitmaps import BITMAP_TICK_US, AvailabilityBitmapStore, is_aligned
+from indexes import ensure_indexes, verify_query_plans
+from memory_mongo import MemoryClient
+from metrics import (
+    CALENDAR_ERRORS, REQUEST_LATENCY, AppStatsCollector, MongoCommandListener, metrics_payload,
+    monitor_event_loop_lag, route_template, time_calendar_fetch, time_scoring
+)
+from prometheus_client import REGISTRY
+from profiling import RequestProfiler, TracedDatabase, span
+from google_calendar import FREEBUSY_MAX_ITEMS, GoogleCalendarClient
+from ttl_cache import TTLCache
+from scoring_pool import ScoringPool, ScoringPoolFull, score_series
+from scheduling import (
+    blend_score, iter_candidates, pack_busy_times, parse_iso, preference_table, rank_counts, resolve_zone,
+    slot_count, to_micros, top_k, top_slots_numpy, window_available_counts
+)
+
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
 # MongoDB connection
 mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
-db = client[os.environ['DB_NAME']]
+if mongo_url.startswith('memory://'):
+    # In-process stand-in for load tests and local demos; nothing is persisted
+    client = MemoryClient()
+else:
+    client = AsyncIOMotorClient(mongo_url, event_listeners=[MongoCommandListener()])
+db = TracedDatabase(client[os.environ['DB_NAME']])
 
 # Create the main app without a prefix
 app = FastAPI()
@@ -32,6 +65,18 @@ api_router = APIRouter(prefix="/api")
 # JWT Secret
 JWT_SECRET = os.environ.get('JWT_SECRET', 'your-secret-key-change-in-production')
 JWT_ALGORITHM = 'HS256'
+
+# Authenticated-user cache (short TTL) and verified-token cache (bounded by token expiry).
+# Both are per process: invalidate_cached_user only clears this worker, so
+# other workers can serve a changed or deleted user for up to USER_CACHE_TTL.
+user_cache = TTLCache(
+    ttl=float(os.environ.get('USER_CACHE_TTL', '30')),
+    max_size=int(os.environ.get('USER_CACHE_MAX_SIZE', '10000'))
+)
+token_cache = TTLCache(
+    ttl=float(os.environ.get('TOKEN_CACHE_TTL', '300')),
+    max_size=int(os.environ.get('TOKEN_CACHE_MAX_SIZE', '10000'))
+)
 # Use a simpler approach for password hashing to avoid bcrypt issues
 def hash_password(password: str) -> str:
     """Simple password hashing using SHA256 with salt"""
@@ -47,6 +92,103 @@ GOOGLE_CLIENT_ID = os.environ.get('GOOGLE_CLIENT_ID', 'placeholder-client-id')
 GOOGLE_CLIENT_SECRET = os.environ.get('GOOGLE_CLIENT_SECRET', 'placeholder-secret')
 GOOGLE_REDIRECT_URI = os.environ.get('GOOGLE_REDIRECT_URI', 'http://localhost:3000/auth/callback')
 
+# Group listing page size (cursor-paginated)
+GROUPS_PAGE_SIZE = 100
+GROUPS_MAX_PAGE_SIZE = 1000
+
+# Deployment history page size (cursor-paginated) and stats window
+DEPLOYMENTS_PAGE_SIZE = 20
+DEPLOYMENTS_MAX_PAGE_SIZE = 100
+DEPLOYMENT_STATS_DAYS = 30
+# Leading characters of the ISO created_at that name each stats bucket
+DEPLOYMENT_STATS_BUCKETS = {"hour": 13, "day": 10, "month": 7}
+
+# Calendar availability: "synthetic" (seeded demo data), "fixture" (JSON file)
+# or "google" (FreeBusy API); "mock" is the old name for "synthetic"
+CALENDAR_BACKEND = os.environ.get('CALENDAR_BACKEND', 'synthetic')
+if CALENDAR_BACKEND == 'mock':
+    CALENDAR_BACKEND = 'synthetic'
+
+# Shared Google client; base URLs are overridable to point at a local stub server
+calendar_client = GoogleCalendarClient(
+    db,
+    GOOGLE_CLIENT_ID,
+    GOOGLE_CLIENT_SECRET,
+    api_base=os.environ.get('GOOGLE_API_BASE', 'https://www.googleapis.com'),
+    token_url=os.environ.get('GOOGLE_TOKEN_URL', 'https://oauth2.googleapis.com/token'),
+    batch_window=float(os.environ.get('GOOGLE_BATCH_WINDOW', '0.005'))
+)
+calendar_provider = build_calendar_provider(
+    CALENDAR_BACKEND,
+    calendar_client,
+    seed=int(os.environ.get('CALENDAR_SEED', '0')),
+    density=int(os.environ.get('CALENDAR_DENSITY', '4')),
+    fixture_path=os.environ.get('CALENDAR_FIXTURE')
+)
+
+# Scheduling engine: "sweep" (pure Python), "numpy" (vectorized) or
+# "bitmap" (stored per-member availability bitmaps)
+SCHEDULER_ENGINES = ("sweep", "numpy", "bitmap")
+SCHEDULER_ENGINE = os.environ.get('SCHEDULER_ENGINE', 'sweep')
+
+# Slot scoring off the event loop: "process", "thread" or "inline". Requests
+# with at most SCORING_INLINE_MAX_WORK slot x member pairs are scored inline;
+# past SCORING_QUEUE_LIMIT requests in flight the API answers 503.
+scoring_pool = ScoringPool(
+    kind=os.environ.get('SCORING_POOL', 'process'),
+    size=int(os.environ.get('SCORING_POOL_SIZE', str(os.cpu_count() or 1))),
+    queue_limit=int(os.environ.get('SCORING_QUEUE_LIMIT', '32')),
+    inline_max_work=int(os.environ.get('SCORING_INLINE_MAX_WORK', '50000')),
+    chunk_slots=int(os.environ.get('SCORING_CHUNK_SLOTS', '2016'))
+)
+
+# Busy-time fan-out: max concurrent calendar fetches and per-member timeout
+BUSY_FETCH_CONCURRENCY = int(os.environ.get('BUSY_FETCH_CONCURRENCY', str(FREEBUSY_MAX_ITEMS)))
+BUSY_FETCH_TIMEOUT = float(os.environ.get('BUSY_FETCH_TIMEOUT', '5'))
+
+# Minimum seconds between provisional rankings on the streaming suggest endpoint
+SUGGEST_STREAM_INTERVAL = float(os.environ.get('SUGGEST_STREAM_INTERVAL', '0.25'))
+
+# Per-member day bitmaps; calendar bits older than the TTL are refetched
+bitmap_store = AvailabilityBitmapStore(db, ttl=float(os.environ.get('BITMAP_TTL', '900')))
+
+# Deployment records are written behind the request in insert_many batches of
+# DEPLOYMENT_BATCH_SIZE, or DEPLOYMENT_FLUSH_INTERVAL seconds after the first
+# queued one; past DEPLOYMENT_QUEUE_LIMIT waiting records the API answers 503.
+deployment_writer = DeploymentWriter(
+    db,
+    batch_size=int(os.environ.get('DEPLOYMENT_BATCH_SIZE', '100')),
+    flush_interval=float(os.environ.get('DEPLOYMENT_FLUSH_INTERVAL', '0.5')),
+    max_queue=int(os.environ.get('DEPLOYMENT_QUEUE_LIMIT', '10000'))
+)
+
+# Events booked through the app, kept on each member as merged busy intervals
+busy_timelines = BusyTimelineStore(db)
+
+# Busy-time cache in front of the calendar backend; a TTL of 0 disables it
+busy_cache = BusyTimeCache(
+    ttl=float(os.environ.get('BUSY_CACHE_TTL', '300')),
+    max_users=int(os.environ.get('BUSY_CACHE_MAX_USERS', '10000'))
+)
+
+# Seconds between event-loop lag probes; 0 disables the probe
+EVENT_LOOP_LAG_INTERVAL = float(os.environ.get('EVENT_LOOP_LAG_INTERVAL', '0.5'))
+REGISTRY.register(AppStatsCollector(
+    {"busy_times": busy_cache, "users": user_cache, "tokens": token_cache}, scoring_pool, deployment_writer
+))
+
+# Request profiling: a trace is kept (and returned as Server-Timing) when the
+# PROFILE_HEADER is set or the request is sampled, and logged when a request
+# takes longer than SLOW_REQUEST_THRESHOLD seconds (0 disables). Kept traces
+# are readable by ADMIN_EMAILS at /api/admin/traces.
+profiler = RequestProfiler(
+    sample_rate=float(os.environ.get('PROFILE_SAMPLE_RATE', '0')),
+    slow_threshold=float(os.environ.get('SLOW_REQUEST_THRESHOLD', '1')),
+    buffer_size=int(os.environ.get('PROFILE_BUFFER_SIZE', '200')),
+    header=os.environ.get('PROFILE_HEADER', 'X-Profile')
+)
+ADMIN_EMAILS = {email.strip().lower() for email in os.environ.get('ADMIN_EMAILS', '').split(',') if email.strip()}
+
 # ===== Models =====
 class User(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
@@ -76,10 +218,15 @@ class Group(BaseModel):
     name: str
     owner_id: str
     member_ids: List[str] = []
+    hour_weights: Optional[List[float]] = None  # local-hour preference weights; None uses the defaults
     created_at: str = Field(default_factory=lambda: datetime.now(timezone.utc).isoformat())
 
 class GroupCreate(BaseModel):
     name: str
+    hour_weights: Optional[List[confloat(ge=0)]] = Field(None, min_length=24, max_length=24)
+
+class GroupPreferences(BaseModel):
+    hour_weights: Optional[List[confloat(ge=0)]] = Field(None, min_length=24, max_length=24)
 
 class GroupInvite(BaseModel):
     emails: List[EmailStr]
@@ -90,15 +237,31 @@ class GroupResponse(BaseModel):
     owner_id: str
     member_ids: List[str]
     members: List[UserResponse] = []
+    hour_weights: Optional[List[float]] = None
     created_at: str
 
+def aware_iso(value: str) -> str:
+    """An ISO timestamp with its offset; naive values are taken as UTC.
+
+    Calendar busy blocks are always offset-aware, so naive ranges can't be
+    compared with them.
+    """
+    dt = parse_iso(value)
+    if dt.tzinfo is None:
+        return dt.replace(tzinfo=timezone.utc).isoformat()
+    return value
+
+AwareTimestamp = Annotated[str, AfterValidator(aware_iso)]
+
 class ScheduleSuggestRequest(BaseModel):
     group_id: str
-    range_start: str  # ISO format
-    range_end: str    # ISO format
-    duration_mins: int = 60
-    granularity_mins: int = 15
+    range_start: AwareTimestamp  # ISO format
+    range_end: AwareTimestamp    # ISO format
+    duration_mins: int = Field(60, gt=0)
+    granularity_mins: int = Field(15, gt=0)
     min_coverage: float = 0.8
+    engine: Optional[str] = None  # overrides SCHEDULER_ENGINE
+    max_results: int = Field(10, ge=1, le=100)
 
 class TimeSlot(BaseModel):
     start: str
@@ -108,6 +271,27 @@ class TimeSlot(BaseModel):
     total_members: int
     coverage_ratio: float
 
+class RecurrencePattern(BaseModel):
+    interval_days: int = Field(7, ge=1, le=365)
+    occurrences: int = Field(1, ge=1, le=52)
+
+class SeriesSuggestRequest(BaseModel):
+    group_id: str
+    range_start: AwareTimestamp  # ISO format
+    range_end: AwareTimestamp    # ISO format; every occurrence must end by here
+    durations_mins: List[int] = Field([60], min_length=1, max_length=12)
+    granularity_mins: int = 15
+    min_coverage: float = 0.8  # applies to the worst occurrence
+    recurrence: RecurrencePattern = Field(default_factory=RecurrencePattern)
+    max_results: int = Field(10, ge=1, le=100)
+
+class SeriesSuggestion(BaseModel):
+    duration_mins: int
+    occurrences: List[TimeSlot]
+    score: float
+    worst_coverage_ratio: float
+    total_members: int
+
 class CreateEventRequest(BaseModel):
     group_id: str
     start: str
@@ -144,6 +328,40 @@ class SignupRequest(BaseModel):
     name: str
     timezone: str = "UTC"
 
+# ===== Projections =====
+# Every Mongo read names the fields its call site uses: a response model's
+# fields (`response_projection`) or an explicit list (`fields_projection`).
+# Hot list endpoints also encode the projected documents straight to JSON
+# with ORJSONResponse; returning a Response skips FastAPI's response_model
+# validation, which is kept on the route for the OpenAPI schema. Documents
+# are trusted as written by this API.
+@lru_cache(maxsize=None)
+def response_fields(model: type) -> Tuple[Tuple[str, Any], ...]:
+    """(name, default) for each field of a response model; required fields default to None"""
+    return tuple(
+        (name, None if field.is_required() else field.get_default(call_default_factory=True))
+        for name, field in model.model_fields.items()
+    )
+
+@lru_cache(maxsize=None)
+def response_projection(model: type) -> Dict[str, int]:
+    """Projection fetching just the stored fields of a response model"""
+    return {"_id": 0, **{name: 1 for name, _ in response_fields(model)}}
+
+def fields_projection(*fields: str) -> Dict[str, int]:
+    return {"_id": 0, **{name: 1 for name in fields}}
+
+# Group fields needed to resolve and authorize members, and to rank for them
+MEMBERSHIP_FIELDS = fields_projection("owner_id", "member_ids")
+SCHEDULING_GROUP_FIELDS = fields_projection("owner_id", "member_ids", "hour_weights")
+# Member fields the scheduler ranks with: local time and events booked here
+SCHEDULING_MEMBER_FIELDS = fields_projection("id", "timezone", "busy_timeline")
+
+def response_dict(model: type, doc: dict, **values: Any) -> dict:
+    """A document as the JSON the response model would produce, with `values` overriding fields"""
+    return {name: values[name] if name in values else doc.get(name, default)
+            for name, default in response_fields(model)}
+
 # ===== Helper Functions =====
 def create_access_token(data: dict) -> str:
     to_encode = data.copy()
@@ -152,57 +370,222 @@ def create_access_token(data: dict) -> str:
     encoded_jwt = jwt.encode(to_encode, JWT_SECRET, algorithm=JWT_ALGORITHM)
     return encoded_jwt
 
+def invalidate_cached_user(user_id: Optional[str] = None):
+    """Call after updating or deleting users; no id invalidates every cached user.
+
+    Only this process's cache is cleared; keep USER_CACHE_TTL short enough
+    for the staleness other workers may show.
+    """
+    if user_id is None:
+        user_cache.clear()
+    else:
+        user_cache.pop(user_id)
+
 async def get_current_user(authorization: Optional[str] = Header(None)) -> dict:
     if not authorization or not authorization.startswith('Bearer '):
         raise HTTPException(status_code=401, detail="Not authenticated")
     
     token = authorization.split(' ')[1]
-    try:
-        payload = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
+    
+    # Hot tokens skip signature verification until they (or the cache entry) expire
+    user_id = token_cache.get(token)
+    if user_id is None:
+        try:
+            payload = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
+        except jwt.ExpiredSignatureError:
+            raise HTTPException(status_code=401, detail="Token expired")
+        except jwt.InvalidTokenError:
+            raise HTTPException(status_code=401, detail="Invalid token")
+        
         user_id = payload.get('user_id')
         if not user_id:
             raise HTTPException(status_code=401, detail="Invalid token")
         
-        user = await db.users.find_one({"id": user_id})
+        expires_in = payload.get('exp', 0) - datetime.now(timezone.utc).timestamp()
+        token_cache.set(token, user_id, ttl=expires_in)
+    
+    user = user_cache.get(user_id)
+    if user is None:
+        # Don't cache a read that an invalidation overtook while it was in flight
+        epoch = user_cache.epoch
+        user = await db.users.find_one({"id": user_id}, response_projection(UserResponse))
         if not user:
             raise HTTPException(status_code=401, detail="User not found")
-        
-        return user
-    except jwt.ExpiredSignatureError:
-        raise HTTPException(status_code=401, detail="Token expired")
-    except jwt.InvalidTokenError:
-        raise HTTPException(status_code=401, detail="Invalid token")
+        user_cache.set(user_id, user, epoch=epoch)
+    
+    # Hand out a copy so handlers can't modify the cached document
+    return dict(user)
+
+async def require_admin(current_user: dict = Depends(get_current_user)) -> dict:
+    if current_user.get("email", "").lower() not in ADMIN_EMAILS:
+        raise HTTPException(status_code=403, detail="Admin access required")
+    return current_user
+
+def group_member_ids(group: dict) -> List[str]:
+    """Owner plus members, de-duplicated, owner first"""
+    return list(dict.fromkeys([group["owner_id"]] + group.get("member_ids", [])))
+
+async def hydrate_members(groups: List[dict], projection: Dict[str, int]) -> Dict[str, dict]:
+    """Load every member of the given groups with a single users query"""
+    member_ids = list(dict.fromkeys(m for group in groups for m in group_member_ids(group)))
+    if not member_ids:
+        return {}
+    users = await db.users.find({"id": {"$in": member_ids}}, projection).to_list(len(member_ids))
+    return {user["id"]: user for user in users}
+
+def group_members(group: dict, users_by_id: Dict[str, dict]) -> List[dict]:
+    return [users_by_id[m] for m in group_member_ids(group) if m in users_by_id]
+
+async def accept_pending_invitations(user_id: str, email: str):
+    """Add a newly registered user to every group that invited their email"""
+    invitations = await db.group_invitations.find({"email": email}, fields_projection("group_id")).to_list(None)
+    if not invitations:
+        return
+    
+    await db.groups.update_many(
+        {"id": {"$in": [i["group_id"] for i in invitations]}},
+        {"$addToSet": {"member_ids": user_id}}
+    )
+    await db.group_invitations.delete_many({"email": email})
+
+def encode_cursor(*values: Any) -> str:
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+def decode_cursor(cursor: str, size: int) -> List[Any]:
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (ValueError, TypeError):
+        values = None
+    if not isinstance(values, list) or len(values) != size:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return values
 
 async def get_user_calendar_busy_times(user_id: str, time_min: str, time_max: str) -> List[Dict]:
-    """Mock implementation - will be replaced with actual Google Calendar API"""
-    # For demo purposes, return some sample busy blocks
-    token_doc = await db.oauth_tokens.find_one({"user_id": user_id})
-    if not token_doc:
-        return []
-    
-    # In production, this would call Google Calendar FreeBusy API
-    # For now, return mock data
-    import random
-    busy_blocks = []
-    
-    # Simulate some random busy times
-    start_dt = datetime.fromisoformat(time_min.replace('Z', '+00:00'))
-    end_dt = datetime.fromisoformat(time_max.replace('Z', '+00:00'))
-    
-    current = start_dt
-    while current < end_dt:
-        if random.random() < 0.3:  # 30% chance of being busy
-            busy_start = current
-            busy_end = current + timedelta(hours=random.randint(1, 3))
-            busy_blocks.append({
-                "start": busy_start.isoformat(),
-                "end": min(busy_end, end_dt).isoformat()
-            })
-            current = busy_end
+    """Busy blocks from the configured calendar provider"""
+    return await calendar_provider.busy_times(user_id, time_min, time_max)
+
+async def timed_calendar_busy_times(user_id: str, time_min: str, time_max: str) -> List[Dict]:
+    """`get_user_calendar_busy_times` recorded in the calendar fetch metrics and request trace"""
+    with time_calendar_fetch(CALENDAR_BACKEND), span("calendar", user_id):
+        return await get_user_calendar_busy_times(user_id, time_min, time_max)
+
+async def fetch_member_busy_times(member_id: str, time_min: str, time_max: str,
+                                  semaphore: asyncio.Semaphore) -> List[Dict]:
+    """One member's busy times through the cache, bounded by the shared semaphore and timeout"""
+    async with semaphore:
+        try:
+            return await asyncio.wait_for(
+                busy_cache.get(member_id, time_min, time_max, timed_calendar_busy_times),
+                timeout=BUSY_FETCH_TIMEOUT
+            )
+        except asyncio.TimeoutError:
+            CALENDAR_ERRORS.labels(CALENDAR_BACKEND, "timeout").inc()
+            raise
+
+async def fetch_group_busy_times(member_ids: List[str], time_min: str, time_max: str) -> Tuple[Dict[str, List[Dict]], List[str]]:
+    """Fetch busy times for all members concurrently.
+    
+    Returns the busy times of members that answered in time, plus the ids of
+    members whose fetch failed or timed out. Degraded members are left out of
+    the busy map, so the scheduler counts them as not (known to be) available.
+    """
+    semaphore = asyncio.Semaphore(BUSY_FETCH_CONCURRENCY)
+    results = await asyncio.gather(
+        *(fetch_member_busy_times(m, time_min, time_max, semaphore) for m in member_ids),
+        return_exceptions=True
+    )
+    
+    all_busy_times = {}
+    degraded = []
+    for member_id, result in zip(member_ids, results):
+        if isinstance(result, BaseException):
+            if not isinstance(result, Exception):
+                raise result
+            logger.warning(f"Busy-time fetch failed for user {member_id}: {result!r}")
+            degraded.append(member_id)
         else:
-            current += timedelta(hours=1)
+            all_busy_times[member_id] = result
     
-    return busy_blocks
+    return all_busy_times, degraded
+
+async def load_scheduling_members(member_ids: List[str]) -> Dict[str, Dict]:
+    """Members' time zones and booked-event timelines by id, in one read"""
+    users = await db.users.find(
+        {"id": {"$in": member_ids}}, SCHEDULING_MEMBER_FIELDS
+    ).to_list(len(member_ids))
+    return {user["id"]: user for user in users}
+
+def group_preference_table(group: dict, members: Dict[str, Dict], start_dt: datetime, count: int,
+                           granularity_delta: timedelta) -> np.ndarray:
+    """Per-slot time-of-day preference from each member's local time and the group's hour weights"""
+    zones = [resolve_zone(member.get("timezone")) for member in members.values()]
+    return preference_table(zones, start_dt, count, to_micros(granularity_delta), group.get("hour_weights"))
+
+def suggest_preference_table(group: dict, members: Dict[str, Dict], request: ScheduleSuggestRequest) -> np.ndarray:
+    """`group_preference_table` for the candidate slots of a suggest request"""
+    start_dt = parse_iso(request.range_start)
+    granularity_delta = timedelta(minutes=request.granularity_mins)
+    count = slot_count(start_dt, parse_iso(request.range_end), timedelta(minutes=request.duration_mins),
+                       granularity_delta)
+    return group_preference_table(group, members, start_dt, count, granularity_delta)
+
+def with_booked_events(all_busy_times: Dict[str, List[Dict]], members: Dict[str, Dict],
+                       time_min: str, time_max: str) -> Dict[str, List[Dict]]:
+    """Each member's provider busy blocks merged with the events booked for them here"""
+    return {
+        member_id: union_busy(blocks, members.get(member_id, {}).get("busy_timeline", []), time_min, time_max)
+        for member_id, blocks in all_busy_times.items()
+    }
+
+def ranked_time_slots(ranked: List[Tuple[int, int, float, float]],
+                      start_dt: datetime,
+                      duration_delta: timedelta,
+                      granularity_delta: timedelta,
+                      total_members: int) -> List[TimeSlot]:
+    """Materialize (slot index, available, coverage, score) tuples as TimeSlots"""
+    return [
+        TimeSlot(
+            start=(start_dt + index * granularity_delta).isoformat(),
+            end=(start_dt + index * granularity_delta + duration_delta).isoformat(),
+            score=score,
+            available_members=available_count,
+            total_members=total_members,
+            coverage_ratio=coverage_ratio
+        )
+        for index, available_count, coverage_ratio, score in ranked
+    ]
+
+async def find_available_slots_bitmap(member_ids: List[str],
+                                      range_start: str,
+                                      range_end: str,
+                                      duration_mins: int,
+                                      granularity_mins: int,
+                                      min_coverage: float,
+                                      limit: int = 10,
+                                      preference: Optional[np.ndarray] = None) -> Tuple[List[TimeSlot], List[str]]:
+    """Score slots from stored availability bitmaps; returns slots and degraded members.
+    
+    Only valid when slot boundaries fall on bitmap ticks (see is_aligned).
+    """
+    start_dt = parse_iso(range_start)
+    end_dt = parse_iso(range_end)
+    duration_delta = timedelta(minutes=duration_mins)
+    granularity_delta = timedelta(minutes=granularity_mins)
+    
+    count = slot_count(start_dt, end_dt, duration_delta, granularity_delta)
+    if count == 0:
+        return [], []
+    
+    busy, rows, degraded = await bitmap_store.busy_matrix(member_ids, start_dt, end_dt, fetch_group_busy_times)
+    with time_scoring("bitmap", count, len(member_ids)), span("scoring", "bitmap"):
+        counts = window_available_counts(
+            busy,
+            to_micros(granularity_delta) // BITMAP_TICK_US,
+            to_micros(duration_delta) // BITMAP_TICK_US,
+            count
+        )
+        ranked = rank_counts(counts, start_dt, granularity_delta, min_coverage, len(member_ids), limit, preference)
+    return ranked_time_slots(ranked, start_dt, duration_delta, granularity_delta, len(member_ids)), degraded
 
 def find_available_slots(all_busy_times: Dict[str, List[Dict]], 
                          range_start: str, 
@@ -210,72 +593,78 @@ def find_available_slots(all_busy_times: Dict[str, List[Dict]],
                          duration_mins: int,
                          granularity_mins: int,
                          min_coverage: float,
-                         total_members: int) -> List[TimeSlot]:
-    """Algorithm to find best meeting times"""
+                         total_members: int,
+                         engine: Optional[str] = None,
+                         limit: int = 10,
+                         preference: Optional[np.ndarray] = None) -> List[TimeSlot]:
+    """Algorithm to find best meeting times.
     
-    start_dt = datetime.fromisoformat(range_start.replace('Z', '+00:00'))
-    end_dt = datetime.fromisoformat(range_end.replace('Z', '+00:00'))
+    preference is the per-slot `preference_table`; without one, hours are
+    read in the offset of range_start.
+    """
+    
+    start_dt = parse_iso(range_start)
+    end_dt = parse_iso(range_end)
     duration_delta = timedelta(minutes=duration_mins)
     granularity_delta = timedelta(minutes=granularity_mins)
     
-    candidates = []
-    current = start_dt
+    if (engine or SCHEDULER_ENGINE) == "numpy":
+        ranked = top_slots_numpy(
+            all_busy_times, start_dt, end_dt, duration_delta, granularity_delta,
+            min_coverage, total_members, limit, preference
+        )
+        return ranked_time_slots(ranked, start_dt, duration_delta, granularity_delta, total_members)
     
-    while current + duration_delta <= end_dt:
-        slot_start = current
-        slot_end = current + duration_delta
-        
-        # Count how many members are available
-        available_count = 0
-        for user_id, busy_blocks in all_busy_times.items():
-            is_available = True
-            for busy in busy_blocks:
-                busy_start = datetime.fromisoformat(busy['start'].replace('Z', '+00:00'))
-                busy_end = datetime.fromisoformat(busy['end'].replace('Z', '+00:00'))
-                
-                # Check if slot overlaps with busy time
-                if not (slot_end <= busy_start or slot_start >= busy_end):
-                    is_available = False
-                    break
-            
-            if is_available:
-                available_count += 1
-        
-        coverage_ratio = available_count / total_members if total_members > 0 else 0
-        
-        # Only consider slots meeting minimum coverage
-        if coverage_ratio >= min_coverage:
-            # Calculate score based on coverage and time preferences
-            # Prefer afternoon times (14:00-17:00) slightly
-            hour = slot_start.hour
-            time_pref_score = 1.0
-            if 14 <= hour <= 17:
-                time_pref_score = 1.2
-            elif hour < 9 or hour > 20:
-                time_pref_score = 0.5
-            
-            score = coverage_ratio * 0.7 + (time_pref_score / 1.2) * 0.3
-            
-            candidates.append(TimeSlot(
-                start=slot_start.isoformat(),
-                end=slot_end.isoformat(),
-                score=score,
-                available_members=available_count,
-                total_members=total_members,
-                coverage_ratio=coverage_ratio
-            ))
-        
-        current += granularity_delta
+    # Busy blocks are parsed once per member and swept into per-slot counts;
+    # candidates stream into a bounded top-K heap and only the winners become models
+    candidates = iter_candidates(
+        all_busy_times, start_dt, end_dt, duration_delta, granularity_delta,
+        min_coverage, total_members, preference
+    )
+    return ranked_time_slots(top_k(candidates, limit), start_dt, duration_delta, granularity_delta, total_members)
+
+async def score_available_slots(all_busy_times: Dict[str, List[Dict]],
+                                range_start: str,
+                                range_end: str,
+                                duration_mins: int,
+                                granularity_mins: int,
+                                min_coverage: float,
+                                total_members: int,
+                                engine: Optional[str] = None,
+                                limit: int = 10,
+                                preference: Optional[np.ndarray] = None) -> List[TimeSlot]:
+    """`find_available_slots` run on the scoring pool instead of the event loop"""
+    start_dt = parse_iso(range_start)
+    end_dt = parse_iso(range_end)
+    duration_delta = timedelta(minutes=duration_mins)
+    granularity_delta = timedelta(minutes=granularity_mins)
+    count = slot_count(start_dt, end_dt, duration_delta, granularity_delta)
+    if preference is None:
+        preference = preference_table([], start_dt, count, to_micros(granularity_delta))
     
-    # Sort by score and return top slots
-    candidates.sort(key=lambda x: x.score, reverse=True)
-    return candidates[:10]  # Return top 10
+    engine = engine or SCHEDULER_ENGINE
+    try:
+        with time_scoring(engine, count, total_members), span("scoring", engine):
+            ranked = await scoring_pool.score(
+                engine,
+                pack_busy_times(all_busy_times, start_dt),
+                count,
+                to_micros(duration_delta),
+                to_micros(granularity_delta),
+                preference,
+                min_coverage,
+                total_members,
+                limit
+            )
+    except ScoringPoolFull:
+        raise HTTPException(status_code=503, detail="Scheduler is busy, please retry", headers={"Retry-After": "1"})
+    return ranked_time_slots(ranked, start_dt, duration_delta, granularity_delta, total_members)
 
 # ===== Auth Routes =====
 @api_router.post("/auth/signup")
 async def signup(signup_data: SignupRequest):
     # Check if user exists
-    existing = await db.users.find_one({"email": signup_data.email})
+    existing = await db.users.find_one({"email": signup_data.email}, {"_id": 1})
     if existing:
         raise HTTPException(status_code=400, detail="Email already registered")
     
@@ -288,8 +677,13 @@ async def signup(signup_data: SignupRequest):
     
     # Hash password and store separately
     hashed_password = hash_password(signup_data.password)
-    await db.users.insert_one(user.dict())
+    try:
+        await db.users.insert_one(user.dict())
+    except DuplicateKeyError:
+        # Lost a race with a concurrent signup for the same email
+        raise HTTPException(status_code=400, detail="Email already registered")
     await db.passwords.insert_one({"user_id": user.id, "hashed_password": hashed_password})
+    await accept_pending_invitations(user.id, user.email)
     
     # Create token
     access_token = create_access_token({"user_id": user.id})
@@ -303,12 +697,12 @@ async def signup(signup_data: SignupRequest):
 @api_router.post("/auth/login")
 async def login(login_data: LoginRequest):
     # Find user
-    user = await db.users.find_one({"email": login_data.email})
+    user = await db.users.find_one({"email": login_data.email}, response_projection(UserResponse))
     if not user:
         raise HTTPException(status_code=401, detail="Invalid credentials")
     
     # Verify password
-    password_doc = await db.passwords.find_one({"user_id": user["id"]})
+    password_doc = await db.passwords.find_one({"user_id": user["id"]}, fields_projection("hashed_password"))
     if not password_doc or not verify_password(login_data.password, password_doc["hashed_password"]):
         raise HTTPException(status_code=401, detail="Invalid credentials")
     
@@ -335,83 +729,98 @@ async def google_auth_start():
     auth_url = f"https://accounts.google.com/o/oauth2/v2/auth?{urlencode(params)}"
     return {"auth_url": auth_url}
 
+async def link_google_account(google_id: str, email: str, verified_email: bool) -> dict:
+    """The account a Google sign-in collided with, if it may sign in as that account.
+
+    A concurrent callback for the same Google id resolves to its user. An
+    existing password account is only linked when Google has verified the
+    email and the account has no Google id yet; anything else is a 409.
+    """
+    projection = {**response_projection(UserResponse), "google_id": 1}
+    user = await db.users.find_one({"google_id": google_id}, projection)
+    if user:
+        return user
+    conflict = HTTPException(status_code=409, detail="An account with this email already exists")
+    if not verified_email:
+        raise conflict
+    user = await db.users.find_one({"email": email}, projection)
+    if not user or user.get("google_id"):
+        raise conflict
+    # Only claim the account while it is still unlinked
+    result = await db.users.update_one({"id": user["id"], "google_id": None}, {"$set": {"google_id": google_id}})
+    if result.matched_count != 1:
+        raise conflict
+    invalidate_cached_user(user["id"])
+    return {**user, "google_id": google_id}
+
 @api_router.get("/auth/google/callback")
 async def google_auth_callback(code: str):
     """Handle Google OAuth callback"""
-    # Exchange code for tokens
-    async with httpx.AsyncClient() as client:
-        token_response = await client.post(
-            "https://oauth2.googleapis.com/token",
-            data={
-                "code": code,
-                "client_id": GOOGLE_CLIENT_ID,
-                "client_secret": GOOGLE_CLIENT_SECRET,
-                "redirect_uri": GOOGLE_REDIRECT_URI,
-                "grant_type": "authorization_code"
-            }
-        )
-        
-        if token_response.status_code != 200:
-            raise HTTPException(status_code=400, detail="Failed to exchange code for token")
-        
-        tokens = token_response.json()
-        access_token = tokens.get("access_token")
-        refresh_token = tokens.get("refresh_token")
-        expires_in = tokens.get("expires_in", 3600)
-        
-        # Get user info
-        user_info_response = await client.get(
-            "https://www.googleapis.com/oauth2/v2/userinfo",
-            headers={"Authorization": f"Bearer {access_token}"}
+    # Exchange code for tokens (over the shared connection pool)
+    token_response = await calendar_client.exchange_code(code, GOOGLE_REDIRECT_URI)
+    
+    if token_response.status_code != 200:
+        raise HTTPException(status_code=400, detail="Failed to exchange code for token")
+    
+    tokens = token_response.json()
+    access_token = tokens.get("access_token")
+    refresh_token = tokens.get("refresh_token")
+    expires_in = tokens.get("expires_in", 3600)
+    
+    # Get user info
+    user_info_response = await calendar_client.get_user_info(access_token)
+    
+    if user_info_response.status_code != 200:
+        raise HTTPException(status_code=400, detail="Failed to get user info")
+    
+    user_info = user_info_response.json()
+    
+    # Find or create user
+    google_id = user_info.get("id")
+    email = user_info.get("email")
+    name = user_info.get("name")
+    avatar_url = user_info.get("picture")
+    
+    user = await db.users.find_one({"google_id": google_id}, response_projection(UserResponse))
+    
+    if not user:
+        # Create new user
+        new_user = User(
+            google_id=google_id,
+            email=email,
+            name=name,
+            avatar_url=avatar_url
         )
-        
-        if user_info_response.status_code != 200:
-            raise HTTPException(status_code=400, detail="Failed to get user info")
-        
-        user_info = user_info_response.json()
-        
-        # Find or create user
-        google_id = user_info.get("id")
-        email = user_info.get("email")
-        name = user_info.get("name")
-        avatar_url = user_info.get("picture")
-        
-        user = await db.users.find_one({"google_id": google_id})
-        
-        if not user:
-            # Create new user
-            new_user = User(
-                google_id=google_id,
-                email=email,
-                name=name,
-                avatar_url=avatar_url
-            )
+        try:
             await db.users.insert_one(new_user.dict())
+            await accept_pending_invitations(new_user.id, new_user.email)
             user = new_user.dict()
-        
-        # Store tokens
-        expiry = datetime.now(timezone.utc) + timedelta(seconds=expires_in)
-        oauth_token = OAuthToken(
-            user_id=user["id"],
-            access_token=access_token,
-            refresh_token=refresh_token,
-            expiry=expiry.isoformat()
-        )
-        
-        await db.oauth_tokens.update_one(
-            {"user_id": user["id"]},
-            {"$set": oauth_token.dict()},
-            upsert=True
-        )
-        
-        # Create JWT
-        jwt_token = create_access_token({"user_id": user["id"]})
-        
-        return {
-            "access_token": jwt_token,
-            "token_type": "bearer",
-            "user": UserResponse(**user)
-        }
+        except DuplicateKeyError:
+            user = await link_google_account(google_id, email, bool(user_info.get("verified_email")))
+    
+    # Store tokens
+    expiry = datetime.now(timezone.utc) + timedelta(seconds=expires_in)
+    oauth_token = OAuthToken(
+        user_id=user["id"],
+        access_token=access_token,
+        refresh_token=refresh_token,
+        expiry=expiry.isoformat()
+    )
+    
+    await db.oauth_tokens.update_one(
+        {"user_id": user["id"]},
+        {"$set": oauth_token.dict()},
+        upsert=True
+    )
+    
+    # Create JWT
+    jwt_token = create_access_token({"user_id": user["id"]})
+    
+    return {
+        "access_token": jwt_token,
+        "token_type": "bearer",
+        "user": UserResponse(**user)
+    }
 
 @api_router.get("/me", response_model=UserResponse)
 async def get_me(current_user: dict = Depends(get_current_user)):
@@ -419,27 +828,43 @@ async def get_me(current_user: dict = Depends(get_current_user)):
 
 # ===== Group Routes =====
 @api_router.get("/groups", response_model=List[GroupResponse])
-async def get_groups(current_user: dict = Depends(get_current_user)):
+async def get_groups(limit: int = GROUPS_PAGE_SIZE, cursor: Optional[str] = None,
+                     current_user: dict = Depends(get_current_user)):
+    """List the user's groups oldest first; X-Next-Cursor is set when more pages exist"""
     user_id = current_user["id"]
+    limit = min(max(limit, 1), GROUPS_MAX_PAGE_SIZE)
     
     # Find groups where user is owner or member
-    groups = await db.groups.find({
+    query = {
         "$or": [
             {"owner_id": user_id},
             {"member_ids": user_id}
         ]
-    }).to_list(1000)
+    }
+    if cursor:
+        created_at, group_id = decode_cursor(cursor, 2)
+        query = {"$and": [query, {"$or": [
+            {"created_at": {"$gt": created_at}},
+            {"created_at": created_at, "id": {"$gt": group_id}}
+        ]}]}
     
-    # Populate members
-    result = []
-    for group in groups:
-        member_ids = [group["owner_id"]] + group.get("member_ids", [])
-        members = await db.users.find({"id": {"$in": member_ids}}).to_list(1000)
-        
-        group["members"] = [UserResponse(**m) for m in members]
-        result.append(GroupResponse(**group))
+    groups = await db.groups.find(query, response_projection(GroupResponse)).sort(
+        [("created_at", 1), ("id", 1)]
+    ).limit(limit + 1).to_list(limit + 1)
+    headers = {}
+    if len(groups) > limit:
+        groups = groups[:limit]
+        headers["X-Next-Cursor"] = encode_cursor(groups[-1]["created_at"], groups[-1]["id"])
     
-    return result
+    # Populate members of every group with one query
+    users_by_id = await hydrate_members(groups, response_projection(UserResponse))
+    
+    return ORJSONResponse([
+        response_dict(GroupResponse, group, members=[
+            response_dict(UserResponse, m) for m in group_members(group, users_by_id)
+        ])
+        for group in groups
+    ], headers=headers)
 
 @api_router.post("/groups", response_model=GroupResponse)
 async def create_group(group_data: GroupCreate, current_user: dict = Depends(get_current_user)):
@@ -448,22 +873,20 @@ async def create_group(group_data: GroupCreate, current_user: dict = Depends(get
     group = Group(
         name=group_data.name,
         owner_id=user_id,
-        member_ids=[user_id]  # Owner is also a member
+        member_ids=[user_id],  # Owner is also a member
+        hour_weights=group_data.hour_weights
     )
     
     await db.groups.insert_one(group.dict())
     
-    # Get owner info
-    owner = await db.users.find_one({"id": user_id})
-    
     return GroupResponse(
         **group.dict(),
-        members=[UserResponse(**owner)]
+        members=[UserResponse(**current_user)]
     )
 
 @api_router.get("/groups/{group_id}", response_model=GroupResponse)
 async def get_group(group_id: str, current_user: dict = Depends(get_current_user)):
-    group = await db.groups.find_one({"id": group_id})
+    group = await db.groups.find_one({"id": group_id}, response_projection(GroupResponse))
     if not group:
         raise HTTPException(status_code=404, detail="Group not found")
     
@@ -473,17 +896,28 @@ async def get_group(group_id: str, current_user: dict = Depends(get_current_user
         raise HTTPException(status_code=403, detail="Not a member of this group")
     
     # Get members
-    member_ids = [group["owner_id"]] + group.get("member_ids", [])
-    members = await db.users.find({"id": {"$in": list(set(member_ids))}}).to_list(1000)
+    users_by_id = await hydrate_members([group], response_projection(UserResponse))
     
     return GroupResponse(
         **group,
-        members=[UserResponse(**m) for m in members]
+        members=[UserResponse(**m) for m in group_members(group, users_by_id)]
     )
 
+@api_router.put("/groups/{group_id}/preferences", response_model=GroupPreferences)
+async def update_group_preferences(group_id: str, preferences: GroupPreferences, current_user: dict = Depends(get_current_user)):
+    """Set the local-hour weights used to rank suggestions; null restores the defaults"""
+    group = await db.groups.find_one({"id": group_id}, fields_projection("owner_id"))
+    if not group:
+        raise HTTPException(status_code=404, detail="Group not found")
+    if current_user["id"] != group["owner_id"]:
+        raise HTTPException(status_code=403, detail="Only group owner can change preferences")
+    
+    await db.groups.update_one({"id": group_id}, {"$set": {"hour_weights": preferences.hour_weights}})
+    return preferences
+
 @api_router.post("/groups/{group_id}/invite")
 async def invite_to_group(group_id: str, invite_data: GroupInvite, current_user: dict = Depends(get_current_user)):
-    group = await db.groups.find_one({"id": group_id})
+    group = await db.groups.find_one({"id": group_id}, MEMBERSHIP_FIELDS)
     if not group:
         raise HTTPException(status_code=404, detail="Group not found")
     
@@ -491,63 +925,322 @@ async def invite_to_group(group_id: str, invite_data: GroupInvite, current_user:
     if current_user["id"] != group["owner_id"]:
         raise HTTPException(status_code=403, detail="Only group owner can invite members")
     
-    # Find users by email and add to group
-    invited_users = []
-    for email in invite_data.emails:
-        user = await db.users.find_one({"email": email})
-        if user and user["id"] not in group.get("member_ids", []):
-            await db.groups.update_one(
-                {"id": group_id},
-                {"$addToSet": {"member_ids": user["id"]}}
-            )
-            invited_users.append(user["email"])
+    # Resolve every email with one query
+    emails = list(dict.fromkeys(invite_data.emails))
+    users = await db.users.find({"email": {"$in": emails}}, fields_projection("id", "email")).to_list(len(emails))
+    users_by_email = {user["email"]: user for user in users}
+    current_members = set(group_member_ids(group))
+    
+    results = []
+    added_ids = []
+    pending_emails = []
+    for email in emails:
+        user = users_by_email.get(email)
+        if user is None:
+            # Not registered yet: queue an invitation that resolves on signup
+            pending_emails.append(email)
+            results.append({"email": email, "status": "pending"})
+        elif user["id"] in current_members:
+            results.append({"email": email, "status": "already_member"})
+        else:
+            current_members.add(user["id"])
+            added_ids.append(user["id"])
+            results.append({"email": email, "status": "added"})
     
-    return {"message": f"Invited {len(invited_users)} users", "invited": invited_users}
+    if added_ids:
+        await db.groups.update_one(
+            {"id": group_id},
+            {"$addToSet": {"member_ids": {"$each": added_ids}}}
+        )
+    
+    if pending_emails:
+        now = datetime.now(timezone.utc).isoformat()
+        try:
+            await db.group_invitations.bulk_write([
+                UpdateOne(
+                    {"group_id": group_id, "email": email},
+                    {"$setOnInsert": {"id": str(uuid.uuid4()), "invited_by": current_user["id"], "created_at": now}},
+                    upsert=True
+                )
+                for email in pending_emails
+            ], ordered=False)
+        except BulkWriteError as e:
+            # A concurrent invite upserted the same email first; its invitation
+            # is just as pending, so only other write errors are failures
+            if any(err.get("code") != DUPLICATE_KEY for err in e.details.get("writeErrors", [])):
+                raise
+    
+    invited_users = [r["email"] for r in results if r["status"] == "added"]
+    return {
+        "message": f"Invited {len(invited_users)} users",
+        "invited": invited_users,
+        "pending": pending_emails,
+        "results": results
+    }
 
 # ===== Schedule Routes =====
+def slots_response(slots: List[TimeSlot], degraded: List[str]) -> ORJSONResponse:
+    """Ranked slots as JSON; X-Degraded-Members lists members whose calendars couldn't be read"""
+    headers = {"X-Degraded-Members": ",".join(degraded)} if degraded else {}
+    return ORJSONResponse([slot.model_dump() for slot in slots], headers=headers)
+
 @api_router.post("/schedule/suggest", response_model=List[TimeSlot])
 async def suggest_times(request: ScheduleSuggestRequest, current_user: dict = Depends(get_current_user)):
+    engine = request.engine or SCHEDULER_ENGINE
+    if engine not in SCHEDULER_ENGINES:
+        raise HTTPException(status_code=400, detail=f"Unknown scheduler engine: {engine}")
+    
     # Get group
-    group = await db.groups.find_one({"id": request.group_id})
+    group = await db.groups.find_one({"id": request.group_id}, SCHEDULING_GROUP_FIELDS)
     if not group:
         raise HTTPException(status_code=404, detail="Group not found")
     
     # Get all members
-    member_ids = list(set([group["owner_id"]] + group.get("member_ids", [])))
+    member_ids = group_member_ids(group)
+    members = await load_scheduling_members(member_ids)
+    # Time-of-day preference in each member's local time, computed once for the range
+    preference = suggest_preference_table(group, members, request)
     
-    # Get busy times for each member
-    all_busy_times = {}
-    for member_id in member_ids:
-        busy_times = await get_user_calendar_busy_times(
-            member_id,
-            request.range_start,
-            request.range_end
-        )
-        all_busy_times[member_id] = busy_times
+    if engine == "bitmap":
+        duration_delta = timedelta(minutes=request.duration_mins)
+        granularity_delta = timedelta(minutes=request.granularity_mins)
+        if is_aligned(parse_iso(request.range_start), duration_delta, granularity_delta):
+            slots, degraded = await find_available_slots_bitmap(
+                member_ids,
+                request.range_start,
+                request.range_end,
+                request.duration_mins,
+                request.granularity_mins,
+                request.min_coverage,
+                request.max_results,
+                preference
+            )
+            return slots_response(slots, degraded)
+        # Slots off the bitmap grid: score the raw busy blocks instead
+        engine = "numpy"
+    
+    # Get busy times for all members concurrently; report the ones we couldn't reach
+    all_busy_times, degraded = await fetch_group_busy_times(
+        member_ids,
+        request.range_start,
+        request.range_end
+    )
     
     # Find available slots
-    slots = find_available_slots(
-        all_busy_times,
+    slots = await score_available_slots(
+        with_booked_events(all_busy_times, members, request.range_start, request.range_end),
         request.range_start,
         request.range_end,
         request.duration_mins,
         request.granularity_mins,
         request.min_coverage,
-        len(member_ids)
+        len(member_ids),
+        engine,
+        request.max_results,
+        preference
+    )
+    
+    return slots_response(slots, degraded)
+
+@api_router.post("/schedule/suggest/series", response_model=List[SeriesSuggestion])
+async def suggest_series(request: SeriesSuggestRequest, response: Response, current_user: dict = Depends(get_current_user)):
+    """Rank recurring series (e.g. 60 or 90 minutes weekly for 6 weeks) by worst-week coverage.
+    
+    Busy times are fetched once for the whole range and every duration and
+    start time is scored from the same precomputed availability.
+    """
+    start_dt = parse_iso(request.range_start)
+    end_dt = parse_iso(request.range_end)
+    granularity_delta = timedelta(minutes=request.granularity_mins)
+    interval_delta = timedelta(days=request.recurrence.interval_days)
+    if request.granularity_mins <= 0 or any(d <= 0 for d in request.durations_mins):
+        raise HTTPException(status_code=400, detail="Durations and granularity must be positive")
+    if interval_delta % granularity_delta:
+        raise HTTPException(status_code=400, detail="Recurrence interval must be a multiple of the granularity")
+    
+    group = await db.groups.find_one({"id": request.group_id}, SCHEDULING_GROUP_FIELDS)
+    if not group:
+        raise HTTPException(status_code=404, detail="Group not found")
+    
+    member_ids = group_member_ids(group)
+    total_members = len(member_ids)
+    members = await load_scheduling_members(member_ids)
+    all_busy_times, degraded = await fetch_group_busy_times(
+        member_ids,
+        request.range_start,
+        request.range_end
+    )
+    if degraded:
+        response.headers["X-Degraded-Members"] = ",".join(degraded)
+    
+    durations = [timedelta(minutes=d) for d in request.durations_mins]
+    span_us = to_micros(end_dt - start_dt)
+    packed = pack_busy_times(
+        with_booked_events(all_busy_times, members, request.range_start, request.range_end), start_dt
     )
+    slot_total = max(span_us, 0) // to_micros(granularity_delta) + 1
+    preference = group_preference_table(group, members, start_dt, slot_total, granularity_delta)
+    try:
+        with time_scoring("series", slot_total * len(durations), total_members), span("scoring", "series"):
+            ranked = await scoring_pool.run(
+                slot_total * max(len(packed), 1) * len(durations),
+                score_series,
+                packed,
+                span_us,
+                [to_micros(d) for d in durations],
+                to_micros(granularity_delta),
+                to_micros(interval_delta),
+                request.recurrence.occurrences,
+                preference,
+                request.min_coverage,
+                total_members,
+                request.max_results
+            )
+    except ScoringPoolFull:
+        raise HTTPException(status_code=503, detail="Scheduler is busy, please retry", headers={"Retry-After": "1"})
     
-    return slots
+    suggestions = []
+    for duration_index, first_slot, counts, score in ranked:
+        slots = [
+            (first_slot + k * (interval_delta // granularity_delta), count,
+             count / total_members if total_members > 0 else 0)
+            for k, count in enumerate(counts)
+        ]
+        suggestions.append(SeriesSuggestion(
+            duration_mins=request.durations_mins[duration_index],
+            occurrences=ranked_time_slots(
+                [(index, count, coverage, float(blend_score(coverage, preference[index])))
+                 for index, count, coverage in slots],
+                start_dt, durations[duration_index], granularity_delta, total_members
+            ),
+            score=score,
+            worst_coverage_ratio=min(coverage for _, _, coverage in slots),
+            total_members=total_members
+        ))
+    return suggestions
+
+def sse_event(event: str, payload: Dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+
+@api_router.post("/schedule/suggest/stream")
+async def suggest_times_stream(request: ScheduleSuggestRequest, current_user: dict = Depends(get_current_user)):
+    """Server-sent events version of /schedule/suggest.
+    
+    Emits `provisional` rankings scored over the members fetched so far (at most
+    every SUGGEST_STREAM_INTERVAL seconds), then a `final` ranking over the whole
+    group, identical to what /schedule/suggest returns.
+    """
+    engine = request.engine or SCHEDULER_ENGINE
+    if engine not in SCHEDULER_ENGINES:
+        raise HTTPException(status_code=400, detail=f"Unknown scheduler engine: {engine}")
+    # Bitmaps are loaded for the whole group at once, so stream from raw busy blocks
+    if engine == "bitmap":
+        engine = "numpy"
+    
+    group = await db.groups.find_one({"id": request.group_id}, SCHEDULING_GROUP_FIELDS)
+    if not group:
+        raise HTTPException(status_code=404, detail="Group not found")
+    
+    member_ids = group_member_ids(group)
+    members = await load_scheduling_members(member_ids)
+    preference = suggest_preference_table(group, members, request)
+    
+    async def rank(all_busy_times: Dict[str, List[Dict]], total_members: int) -> List[Dict]:
+        slots = await score_available_slots(
+            with_booked_events(all_busy_times, members, request.range_start, request.range_end),
+            request.range_start,
+            request.range_end,
+            request.duration_mins,
+            request.granularity_mins,
+            request.min_coverage,
+            total_members,
+            engine,
+            request.max_results,
+            preference
+        )
+        return [slot.model_dump() for slot in slots]
+    
+    async def events():
+        semaphore = asyncio.Semaphore(BUSY_FETCH_CONCURRENCY)
+        tasks = {
+            asyncio.ensure_future(
+                fetch_member_busy_times(m, request.range_start, request.range_end, semaphore)
+            ): m
+            for m in member_ids
+        }
+        pending = set(tasks)
+        all_busy_times = {}
+        degraded = []
+        loop = asyncio.get_running_loop()
+        last_emit = None
+        
+        try:
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, timeout=SUGGEST_STREAM_INTERVAL, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    member_id = tasks[task]
+                    if task.exception() is not None:
+                        logger.warning(f"Busy-time fetch failed for user {member_id}: {task.exception()!r}")
+                        degraded.append(member_id)
+                    else:
+                        all_busy_times[member_id] = task.result()
+                
+                due = last_emit is None or loop.time() - last_emit >= SUGGEST_STREAM_INTERVAL
+                if pending and all_busy_times and due:
+                    # Provisional: coverage relative to the members we have heard from
+                    try:
+                        slots = await rank(all_busy_times, len(all_busy_times))
+                    except HTTPException:
+                        # Scoring pool saturated; skip this update rather than queue behind it
+                        continue
+                    yield sse_event("provisional", {
+                        "slots": slots,
+                        "members_fetched": len(all_busy_times),
+                        "members_total": len(member_ids),
+                        "degraded": degraded
+                    })
+                    last_emit = loop.time()
+        finally:
+            # Client went away: stop fetching on its behalf
+            for task in pending:
+                task.cancel()
+        
+        try:
+            slots = await rank(all_busy_times, len(member_ids))
+        except HTTPException as e:
+            # Headers are already sent, so report the failure in-band
+            yield sse_event("error", {"status": e.status_code, "detail": e.detail})
+            return
+        yield sse_event("final", {
+            "slots": slots,
+            "members_fetched": len(all_busy_times),
+            "members_total": len(member_ids),
+            "degraded": degraded
+        })
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@api_router.get("/schedule/cache/stats")
+async def get_busy_cache_stats(current_user: dict = Depends(require_admin)):
+    """Busy-time cache hit/miss counters"""
+    return busy_cache.stats()
 
 @api_router.post("/schedule/create")
 async def create_event(request: CreateEventRequest, current_user: dict = Depends(get_current_user)):
     # Get group
-    group = await db.groups.find_one({"id": request.group_id})
+    group = await db.groups.find_one({"id": request.group_id}, MEMBERSHIP_FIELDS)
     if not group:
         raise HTTPException(status_code=404, detail="Group not found")
     
     # Get all members
-    member_ids = list(set([group["owner_id"]] + group.get("member_ids", [])))
-    members = await db.users.find({"id": {"$in": member_ids}}).to_list(1000)
+    member_ids = group_member_ids(group)
+    members = group_members(group, await hydrate_members([group], fields_projection("id", "email")))
     
     # In production, this would create a Google Calendar event
     # For demo, just store in database
@@ -566,39 +1259,140 @@ async def create_event(request: CreateEventRequest, current_user: dict = Depends
     
     await db.events.insert_one(event)
     
+    # Members are now busy in this window: record it on their timelines and
+    # bitmaps, and drop their cached availability for it
+    busy_cache.invalidate(member_ids, request.start, request.end)
+    await bitmap_store.add_event(member_ids, request.start, request.end)
+    await busy_timelines.add(member_ids, request.start, request.end)
+    
     return {
         "message": "Event created successfully",
         "event_id": event["id"]
     }
 
 # ===== DevOps / Deployment Routes =====
-@api_router.post("/deployments")
-async def create_deployment_record(deployment: DeploymentCreate):
-    """Create a deployment record (called by CI/CD pipeline)"""
+@api_router.post("/deployments", status_code=202)
+async def create_deployment_record(deployment: DeploymentCreate,
+                                   idempotency_key: Optional[str] = Header(None, max_length=200)):
+    """Queue a deployment record (called by CI/CD pipeline).
+
+    A retry carrying the same Idempotency-Key gets the first record's id back.
+    """
     record = DeploymentRecord(**deployment.dict())
-    await db.deployments.insert_one(record.dict())
-    return {"message": "Deployment recorded", "id": record.id}
+    try:
+        record_id, queued = await deployment_writer.submit(record.dict(), idempotency_key)
+    except DeploymentQueueFull:
+        raise HTTPException(status_code=503, detail="Deployment queue is full, please retry",
+                            headers={"Retry-After": "1"})
+    if not queued:
+        return {"message": "Deployment already recorded", "id": record_id}
+    return {"message": "Deployment recorded", "id": record_id}
 
-@api_router.get("/deployments")
-async def get_deployments(limit: int = 20, environment: Optional[str] = None):
-    """Get deployment history"""
+@api_router.get("/deployments", response_model=List[DeploymentRecord])
+async def get_deployments(limit: int = DEPLOYMENTS_PAGE_SIZE, cursor: Optional[str] = None,
+                          environment: Optional[str] = None):
+    """Deployment history newest first; X-Next-Cursor is set when more pages exist"""
+    await deployment_writer.flush()
+    limit = min(max(limit, 1), DEPLOYMENTS_MAX_PAGE_SIZE)
     query = {}
     if environment:
         query["environment"] = environment
+    if cursor:
+        created_at, deployment_id = decode_cursor(cursor, 2)
+        query["$or"] = [
+            {"created_at": {"$lt": created_at}},
+            {"created_at": created_at, "id": {"$lt": deployment_id}}
+        ]
     
-    deployments = await db.deployments.find(query).sort("created_at", -1).limit(limit).to_list(limit)
-    return [DeploymentRecord(**d) for d in deployments]
+    deployments = await db.deployments.find(query, response_projection(DeploymentRecord)).sort(
+        [("created_at", -1), ("id", -1)]
+    ).limit(limit + 1).to_list(limit + 1)
+    headers = {}
+    if len(deployments) > limit:
+        deployments = deployments[:limit]
+        headers["X-Next-Cursor"] = encode_cursor(deployments[-1]["created_at"], deployments[-1]["id"])
+    return ORJSONResponse([response_dict(DeploymentRecord, d) for d in deployments], headers=headers)
 
 @api_router.get("/deployments/latest")
 async def get_latest_deployments():
-    """Get latest deployment for each environment"""
-    preview = await db.deployments.find_one({"environment": "preview"}, sort=[("created_at", -1)])
-    production = await db.deployments.find_one({"environment": "production"}, sort=[("created_at", -1)])
+    """Latest deployment for each environment, keyed by environment"""
+    await deployment_writer.flush()
+    latest = await db.deployments.aggregate([
+        {"$sort": {"environment": 1, "created_at": -1, "id": -1}},
+        {"$group": {"_id": "$environment", "latest": {"$first": "$$ROOT"}}},
+        {"$replaceRoot": {"newRoot": "$latest"}},
+        {"$project": response_projection(DeploymentRecord)},
+    ]).to_list(None)
     
-    return {
-        "preview": DeploymentRecord(**preview) if preview else None,
-        "production": DeploymentRecord(**production) if production else None
-    }
+    # preview and production are always present, as the dashboard expects
+    result: Dict[str, Optional[Dict]] = {"preview": None, "production": None}
+    for deployment in latest:
+        result[deployment["environment"]] = response_dict(DeploymentRecord, deployment)
+    return ORJSONResponse(result)
+
+def percentile_expr(durations: str, p: float) -> Dict:
+    """Nearest-rank percentile of an ascending array field, null when empty"""
+    count = {"$size": durations}
+    return {"$cond": [
+        {"$eq": [count, 0]},
+        None,
+        {"$arrayElemAt": [durations, {"$subtract": [{"$ceil": {"$multiply": [count, p]}}, 1]}]}
+    ]}
+
+@api_router.get("/deployments/stats")
+async def get_deployment_stats(bucket: str = "day", since: Optional[str] = None,
+                               environment: Optional[str] = None):
+    """Per environment and time bucket: counts, success rate and p50/p95 duration_seconds"""
+    if bucket not in DEPLOYMENT_STATS_BUCKETS:
+        raise HTTPException(status_code=400, detail=f"bucket must be one of {', '.join(DEPLOYMENT_STATS_BUCKETS)}")
+    await deployment_writer.flush()
+    if since is None:
+        since = (datetime.now(timezone.utc) - timedelta(days=DEPLOYMENT_STATS_DAYS)).isoformat()
+    match: Dict[str, Any] = {"created_at": {"$gte": since}}
+    if environment:
+        match["environment"] = environment
+    
+    # Sorting by duration first lets $push build each bucket's durations in order
+    stats = await db.deployments.aggregate([
+        {"$match": match},
+        {"$sort": {"duration_seconds": 1}},
+        {"$group": {
+            "_id": {
+                "environment": "$environment",
+                "bucket": {"$substrBytes": ["$created_at", 0, DEPLOYMENT_STATS_BUCKETS[bucket]]}
+            },
+            "total": {"$sum": 1},
+            "succeeded": {"$sum": {"$cond": [{"$eq": ["$status", "success"]}, 1, 0]}},
+            "failed": {"$sum": {"$cond": [{"$eq": ["$status", "failure"]}, 1, 0]}},
+            "durations": {"$push": "$duration_seconds"},
+        }},
+        {"$project": {
+            "_id": 0,
+            "environment": "$_id.environment",
+            "bucket": "$_id.bucket",
+            "total": 1,
+            "succeeded": 1,
+            "failed": 1,
+            "durations": {"$filter": {"input": "$durations", "cond": {"$ne": ["$$this", None]}}},
+        }},
+        {"$project": {
+            "environment": 1,
+            "bucket": 1,
+            "total": 1,
+            "succeeded": 1,
+            "failed": 1,
+            # In-progress deployments count towards the total but not the rate
+            "success_rate": {"$cond": [
+                {"$eq": [{"$add": ["$succeeded", "$failed"]}, 0]},
+                None,
+                {"$divide": ["$succeeded", {"$add": ["$succeeded", "$failed"]}]}
+            ]},
+            "p50_duration_seconds": percentile_expr("$durations", 0.5),
+            "p95_duration_seconds": percentile_expr("$durations", 0.95),
+        }},
+        {"$sort": {"environment": 1, "bucket": 1}},
+    ]).to_list(None)
+    return ORJSONResponse(stats)
 
 @api_router.get("/health")
 async def health_check():
@@ -615,6 +1409,16 @@ async def health_check():
     except Exception as e:
         raise HTTPException(status_code=503, detail=f"Service unhealthy: {str(e)}")
 
+@api_router.get("/admin/traces")
+async def get_request_traces(
+    limit: int = 50,
+    slow_only: bool = False,
+    current_user: dict = Depends(require_admin)
+):
+    """Recently kept request traces (profiled or slow), newest first"""
+    limit = max(1, min(limit, profiler.traces.maxlen or limit))
+    return {"slow_threshold": profiler.slow_threshold, "traces": profiler.recent(limit, slow_only)}
+
 # ===== Health Check =====
 @api_router.get("/")
 async def root():
@@ -629,8 +1433,41 @@ app.add_middleware(
     allow_origins=os.environ.get('CORS_ORIGINS', '*').split(','),
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Degraded-Members", "X-Next-Cursor", "Server-Timing", "X-Trace-Id"],
 )
 
+@app.middleware("http")
+async def record_request_latency(request: Request, call_next):
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        REQUEST_LATENCY.labels(request.method, route_template(request), str(status)).observe(
+            time.perf_counter() - start
+        )
+
+@app.middleware("http")
+async def trace_request(request: Request, call_next):
+    trace, token = profiler.start(request.method, request.url.path, request.headers)
+    try:
+        response = await call_next(request)
+    except Exception:
+        profiler.finish(trace, token, 500, route_template(request))
+        raise
+    profiler.finish(trace, token, response.status_code, route_template(request))
+    if trace.profiled:
+        response.headers["X-Trace-Id"] = trace.id
+        response.headers["Server-Timing"] = trace.server_timing()
+    return response
+
+@app.get("/metrics", include_in_schema=False)
+async def prometheus_metrics():
+    payload, content_type = metrics_payload()
+    return Response(content=payload, media_type=content_type)
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -638,6 +1475,29 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+@app.on_event("startup")
+async def bootstrap_indexes():
+    if os.environ.get('MONGO_BOOTSTRAP_INDEXES', '1') != '1':
+        return
+    await ensure_indexes(db)
+    if os.environ.get('MONGO_VERIFY_QUERY_PLANS', '1') == '1':
+        await verify_query_plans(db)
+
+@app.on_event("startup")
+async def start_event_loop_monitor():
+    if EVENT_LOOP_LAG_INTERVAL > 0:
+        app.state.loop_monitor = asyncio.ensure_future(monitor_event_loop_lag(EVENT_LOOP_LAG_INTERVAL))
+
 @app.on_event("shutdown")
 async def shutdown_db_client():
+    monitor = getattr(app.state, "loop_monitor", None)
+    if monitor is not None:
+        monitor.cancel()
+    await calendar_client.aclose()
+    if calendar_provider is not calendar_client:
+        await calendar_provider.aclose()
+    await deployment_writer.flush()
+    if deployment_writer.pending:
+        logger.error(f"{len(deployment_writer.pending)} deployment records could not be written before shutdown")
+    scoring_pool.shutdown()
     client.close()
@@ -0,0 +1,63 @@
+"""Small bounded TTL cache for hot lookups such as authenticated users.
+
+Entries expire after their TTL and the least recently used ones are evicted
+beyond `max_size`.
+
+`pop()` and `clear()` bump an epoch. A caller that fills the cache from a
+slower source reads `epoch` before the lookup and passes it to `set()`. If
+anything was invalidated in between, the value may predate that invalidation
+and is not stored.
+
+The cache lives in one process. Invalidating it does not reach other
+workers, which keep serving their copy for up to the TTL.
+"""
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
+
+
+class TTLCache:
+    def __init__(self, ttl: float, max_size: int = 10000,
+                 clock: Callable[[], float] = time.monotonic):
+        self.ttl = ttl
+        self.max_size = max_size
+        self.clock = clock
+        self.epoch = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is not None:
+            value, expires_at = entry
+            if expires_at > self.clock():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return value
+            del self._entries[key]
+        self.misses += 1
+        return None
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None, epoch: Optional[int] = None):
+        """Store value; with `epoch`, only if nothing was invalidated since it was read"""
+        if self.ttl <= 0 or self.max_size <= 0:
+            return
+        if epoch is not None and epoch != self.epoch:
+            return
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        self._entries[key] = (value, self.clock() + ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def pop(self, key: Hashable):
+        self.epoch += 1
+        self._entries.pop(key, None)
+
+    def clear(self):
+        self.epoch += 1
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -353,8 +353,8 @@ class GroupStudySchedulerTester:
         return self.tests_passed == self.tests_run
 
 def main():
-    """Main test execution"""
-    tester = GroupStudySchedulerTester()
+    """Main test execution; an optional argument overrides the base URL"""
+    tester = GroupStudySchedulerTester(*sys.argv[1:2])
     
     try:
         success = tester.run_comprehensive_test()
@@ -0,0 +1,81 @@
+"""Local stand-in for the Google OAuth, userinfo and FreeBusy endpoints.
+
+Any authorization code is accepted and treated as the user's email, so a
+load test can link a Google calendar to each account with
+GET /api/auth/google/callback?code=<email>. FreeBusy answers every queried
+calendar with seeded synthetic busy blocks (see calendar_providers), after
+an optional artificial latency.
+"""
+import hashlib
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Tuple
+from urllib.parse import parse_qs
+
+from calendar_providers import synthetic_busy_blocks
+
+
+class GoogleStubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    latency = 0.0
+    density = 4
+    seed = 42
+
+    def do_GET(self):
+        if self.path.startswith("/oauth2/v2/userinfo"):
+            email = self._email()
+            self._reply(200, {
+                "id": hashlib.sha1(email.encode()).hexdigest(),
+                "email": email,
+                "verified_email": True,
+                "name": email.split("@")[0],
+            })
+        else:
+            self._reply(404, {"error": "not found"})
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        if self.path == "/token":
+            form = {key: values[0] for key, values in parse_qs(body.decode()).items()}
+            email = form.get("code") or form.get("refresh_token", "").removeprefix("refresh:")
+            self._reply(200, {"access_token": f"stub:{email}", "refresh_token": f"refresh:{email}",
+                              "expires_in": 3600})
+        elif self.path == "/calendar/v3/freeBusy":
+            time.sleep(self.latency)
+            query = json.loads(body)
+            self._reply(200, {"calendars": {
+                item["id"]: {"busy": self._busy(item["id"], query["timeMin"], query["timeMax"])}
+                for item in query["items"]
+            }})
+        else:
+            self._reply(404, {"error": "not found"})
+
+    def _email(self) -> str:
+        return self.headers.get("Authorization", "").removeprefix("Bearer stub:")
+
+    def _busy(self, calendar_id: str, time_min: str, time_max: str):
+        email = self._email() if calendar_id == "primary" else calendar_id
+        return synthetic_busy_blocks(f"{self.seed}:{email}", time_min, time_max, self.density)
+
+    def _reply(self, status: int, payload: Dict):
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+def start_google_stub(latency: float = 0.0, density: int = 4, seed: int = 42,
+                      port: int = 0) -> Tuple[ThreadingHTTPServer, str]:
+    """Serve the stub on a background thread; returns the server and its base URL"""
+    handler = type("GoogleStub", (GoogleStubHandler,), {"latency": latency, "density": density, "seed": seed})
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
@@ -0,0 +1,283 @@
+"""Load test one API worker against local stand-ins for Mongo and Google.
+
+    python benchmarks/load_test.py --users 10,50,100 --duration 30
+    python benchmarks/load_test.py --url http://localhost:8001 --users 20
+
+Unless --url is given, this starts the Google stub (benchmarks.google_stub)
+and a single `uvicorn server:app` worker with MONGO_URL=memory:// and
+CALENDAR_BACKEND=google pointed at the stub. It then walks the flow of
+backend_test.GroupStudySchedulerTester for every virtual user: sign up, link
+a calendar, create a group and invite the other members. Each concurrency
+stage then runs for --duration seconds with a weighted mix of requests.
+Throughput, latency percentiles and error rate are reported per endpoint for
+every stage, so the point where p99 breaks down is visible.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import httpx
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "backend"))
+sys.path.insert(0, str(ROOT))
+
+from benchmarks.google_stub import start_google_stub  # noqa: E402
+
+# Steady-state request mix (relative weights)
+MIX = {"suggest": 40, "list_groups": 25, "group_details": 15, "me": 10, "create_event": 10}
+SETUP_CONCURRENCY = 20
+
+
+@dataclass
+class VirtualUser:
+    email: str
+    token: str
+    group_id: Optional[str] = None
+
+    @property
+    def headers(self) -> Dict[str, str]:
+        return {"Authorization": f"Bearer {self.token}"}
+
+
+def percentile(ordered: List[float], q: float) -> float:
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class LoadStats:
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = {}
+        self.errors: Dict[str, int] = {}
+
+    def record(self, name: str, seconds: float, ok: bool):
+        self.latencies.setdefault(name, []).append(seconds)
+        self.errors[name] = self.errors.get(name, 0) + (not ok)
+
+    def report(self, elapsed: float) -> Dict[str, Dict[str, float]]:
+        report = {}
+        for name, latencies in sorted(self.latencies.items()):
+            ordered = sorted(latencies)
+            report[name] = {
+                "requests": len(ordered),
+                "rps": round(len(ordered) / elapsed, 2),
+                "error_rate": round(self.errors[name] / len(ordered), 4),
+                "p50_ms": round(percentile(ordered, 0.50) * 1000, 2),
+                "p90_ms": round(percentile(ordered, 0.90) * 1000, 2),
+                "p99_ms": round(percentile(ordered, 0.99) * 1000, 2),
+                "max_ms": round(ordered[-1] * 1000, 2),
+            }
+        return report
+
+
+async def call(client: httpx.AsyncClient, stats: LoadStats, name: str, method: str, url: str,
+               **kwargs) -> Optional[httpx.Response]:
+    start = time.perf_counter()
+    try:
+        response = await client.request(method, url, **kwargs)
+    except httpx.HTTPError:
+        stats.record(name, time.perf_counter() - start, False)
+        return None
+    stats.record(name, time.perf_counter() - start, response.status_code < 400)
+    return response
+
+
+async def setup_users(client: httpx.AsyncClient, stats: LoadStats, count: int,
+                      group_size: int) -> List[VirtualUser]:
+    """Sign up `count` users, link their calendars and put them in groups of `group_size`"""
+    run_id = uuid.uuid4().hex[:8]
+    semaphore = asyncio.Semaphore(SETUP_CONCURRENCY)
+
+    async def signup(index: int) -> Optional[VirtualUser]:
+        email = f"load-{run_id}-{index}@example.com"
+        async with semaphore:
+            response = await call(client, stats, "signup", "POST", "/api/auth/signup", json={
+                "email": email, "password": "load-test-password", "name": f"Load {index}", "timezone": "UTC"
+            })
+            if response is None or response.status_code != 200:
+                return None
+            await call(client, stats, "google_callback", "GET", "/api/auth/google/callback",
+                       params={"code": email})
+            return VirtualUser(email, response.json()["access_token"])
+
+    users = [user for user in await asyncio.gather(*(signup(i) for i in range(count))) if user]
+
+    async def create_group(members: List[VirtualUser]):
+        owner = members[0]
+        async with semaphore:
+            response = await call(client, stats, "create_group", "POST", "/api/groups",
+                                  headers=owner.headers, json={"name": f"Load group {owner.email}"})
+            if response is None or response.status_code != 200:
+                return
+            group_id = response.json()["id"]
+            await call(client, stats, "invite", "POST", f"/api/groups/{group_id}/invite",
+                       headers=owner.headers, json={"emails": [m.email for m in members[1:]]})
+        for member in members:
+            member.group_id = group_id
+
+    await asyncio.gather(*(create_group(users[i:i + group_size]) for i in range(0, len(users), group_size)))
+    return [user for user in users if user.group_id]
+
+
+async def user_loop(client: httpx.AsyncClient, stats: LoadStats, user: VirtualUser,
+                    deadline: float, think: float, rng: random.Random):
+    names, weights = list(MIX), list(MIX.values())
+    tomorrow = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=1)
+    while time.perf_counter() < deadline:
+        name = rng.choices(names, weights)[0]
+        if name == "suggest":
+            start = tomorrow + timedelta(days=rng.randint(0, 13))
+            await call(client, stats, name, "POST", "/api/schedule/suggest", headers=user.headers, json={
+                "group_id": user.group_id,
+                "range_start": start.isoformat(),
+                "range_end": (start + timedelta(days=7)).isoformat(),
+                "duration_mins": 60,
+                "granularity_mins": 15,
+                "min_coverage": 0.7,
+            })
+        elif name == "list_groups":
+            await call(client, stats, name, "GET", "/api/groups", headers=user.headers)
+        elif name == "group_details":
+            await call(client, stats, name, "GET", f"/api/groups/{user.group_id}", headers=user.headers)
+        elif name == "me":
+            await call(client, stats, name, "GET", "/api/me", headers=user.headers)
+        else:
+            start = tomorrow + timedelta(days=rng.randint(0, 13), hours=rng.randint(8, 20))
+            await call(client, stats, name, "POST", "/api/schedule/create", headers=user.headers, json={
+                "group_id": user.group_id,
+                "start": start.isoformat(),
+                "end": (start + timedelta(hours=1)).isoformat(),
+                "title": "Load test session",
+            })
+        if think:
+            await asyncio.sleep(rng.expovariate(1 / think))
+
+
+async def run_stage(client: httpx.AsyncClient, users: List[VirtualUser], duration: float,
+                    think: float, seed: int) -> Dict:
+    stats = LoadStats()
+    start = time.perf_counter()
+    deadline = start + duration
+    await asyncio.gather(*(
+        user_loop(client, stats, user, deadline, think, random.Random(f"{seed}:{index}"))
+        for index, user in enumerate(users)
+    ))
+    elapsed = time.perf_counter() - start
+    report = stats.report(elapsed)
+    requests = sum(r["requests"] for r in report.values())
+    errors = sum(stats.errors.values())
+    return {
+        "users": len(users),
+        "duration_s": round(elapsed, 2),
+        "rps": round(requests / elapsed, 2),
+        "error_rate": round(errors / requests, 4) if requests else 0.0,
+        "endpoints": report,
+    }
+
+
+def launch_server(port: int, google_base: str, log_path: Optional[Path]) -> subprocess.Popen:
+    env = {
+        **os.environ,
+        "MONGO_URL": "memory://",
+        "DB_NAME": "loadtest",
+        "CALENDAR_BACKEND": "google",
+        "GOOGLE_API_BASE": google_base,
+        "GOOGLE_TOKEN_URL": f"{google_base}/token",
+        "MONGO_VERIFY_QUERY_PLANS": "0",
+    }
+    log = open(log_path, "w") if log_path else subprocess.DEVNULL
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "server:app", "--port", str(port), "--workers", "1",
+         "--log-level", "warning"],
+        cwd=ROOT / "backend", env=env, stdout=log, stderr=subprocess.STDOUT
+    )
+
+
+async def wait_until_healthy(client: httpx.AsyncClient, timeout: float = 30.0):
+    deadline = time.perf_counter() + timeout
+    while True:
+        try:
+            if (await client.get("/api/health")).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        if time.perf_counter() > deadline:
+            raise RuntimeError("API did not become healthy")
+        await asyncio.sleep(0.2)
+
+
+def print_stage(stage: Dict):
+    print(f"\n== {stage['users']} users: {stage['rps']} req/s, {stage['error_rate'] * 100:.2f}% errors")
+    print(f"{'endpoint':<16}{'requests':>9}{'rps':>9}{'err%':>7}{'p50':>9}{'p90':>9}{'p99':>9}{'max':>9}")
+    for name, r in stage["endpoints"].items():
+        print(f"{name:<16}{r['requests']:>9}{r['rps']:>9.1f}{r['error_rate'] * 100:>7.2f}"
+              f"{r['p50_ms']:>9.1f}{r['p90_ms']:>9.1f}{r['p99_ms']:>9.1f}{r['max_ms']:>9.1f}")
+
+
+async def load_test(args) -> Dict:
+    stages = [int(n) for n in args.users.split(",")]
+    server = stub = None
+    base_url = args.url
+    if base_url is None:
+        stub, google_base = start_google_stub(args.calendar_latency, args.density, args.seed)
+        server = launch_server(args.port, google_base, args.server_log)
+        base_url = f"http://127.0.0.1:{args.port}"
+    try:
+        limits = httpx.Limits(max_connections=max(stages), max_keepalive_connections=max(stages))
+        async with httpx.AsyncClient(base_url=base_url, timeout=args.timeout, limits=limits) as client:
+            await wait_until_healthy(client)
+            setup_stats = LoadStats()
+            start = time.perf_counter()
+            users = await setup_users(client, setup_stats, max(stages), args.group_size)
+            results = {
+                "setup": {"users": len(users), "endpoints": setup_stats.report(time.perf_counter() - start)},
+                "stages": [],
+            }
+            for count in stages:
+                stage = await run_stage(client, users[:count], args.duration, args.think, args.seed)
+                print_stage(stage)
+                results["stages"].append(stage)
+            return results
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(timeout=10)
+        if stub is not None:
+            stub.shutdown()
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--users", default="10,50,100", help="comma-separated concurrency stages")
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds per stage")
+    parser.add_argument("--think", type=float, default=0.0, help="mean think time between requests (s)")
+    parser.add_argument("--group-size", type=int, default=5)
+    parser.add_argument("--url", help="target an already running API instead of starting one")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--calendar-latency", type=float, default=0.05, help="stub FreeBusy latency (s)")
+    parser.add_argument("--density", type=int, default=4, help="stub busy blocks per member per day")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--server-log", type=Path, help="write the started API's output here")
+    parser.add_argument("--output", type=Path, help="write the report JSON here")
+    args = parser.parse_args(argv)
+
+    results = asyncio.run(load_test(args))
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2) + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,257 @@
+"""Benchmark slot scoring and the suggest endpoint on synthetic groups.
+
+    python benchmarks/run_benchmarks.py --output results.json
+    python benchmarks/run_benchmarks.py --quick --baseline benchmarks/baseline.json
+
+Each scenario is timed as `find_available_slots` per engine and as a full
+POST /api/schedule/suggest against the in-memory Mongo stand-in, with the
+calendar backend replaced by the scenario's seeded busy times. Group and
+deployment list payloads are timed both through response models (what
+FastAPI does with response_model) and through the ORJSONResponse fast path.
+Results are written as JSON; with --baseline, any benchmark whose median is more than
+--tolerance slower than the baseline's (and slower by at least
+--min-delta-ms) is reported and the exit status is 1.
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import logging
+import os
+import platform
+import statistics
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Sequence
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "backend"))
+sys.path.insert(0, str(ROOT))
+
+import numpy as np  # noqa: E402
+
+from benchmarks.synthetic import Scenario, seed_group, synthetic_busy_times  # noqa: E402
+
+ENGINES = ("sweep", "numpy")
+
+FULL_GRID = {"members": (5, 25, 100), "days": (1, 7, 28), "granularity_mins": (15, 60), "density": (2, 8)}
+QUICK_GRID = {"members": (5, 25), "days": (1, 7), "granularity_mins": (15,), "density": (4,)}
+
+
+def scenarios(grid: Dict[str, Iterable[int]], seed: int) -> List[Scenario]:
+    names = list(grid)
+    return [Scenario(seed=seed, **dict(zip(names, values))) for values in itertools.product(*grid.values())]
+
+
+def measure(fn: Callable[[], object], repeat: int, warmup: int = 1) -> Dict[str, float]:
+    for _ in range(warmup):
+        fn()
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    return {
+        "median_ms": round(statistics.median(timings), 4),
+        "min_ms": round(timings[0], 4),
+        "max_ms": round(timings[-1], 4),
+        "p95_ms": round(timings[min(len(timings) - 1, int(0.95 * len(timings)))], 4),
+        "repeat": repeat,
+    }
+
+
+def bench_find_available_slots(server, scenario: Scenario, busy: Dict, repeat: int) -> List[Dict]:
+    results = []
+    for engine in ENGINES:
+        stats = measure(lambda: server.find_available_slots(
+            busy, scenario.range_start, scenario.range_end, scenario.duration_mins,
+            scenario.granularity_mins, 0.5, scenario.members, engine=engine
+        ), repeat)
+        results.append({"name": f"find_available_slots[{engine}]", "case": scenario.key, **stats})
+    return results
+
+
+def bench_suggest(server, client, scenario: Scenario, busy: Dict, repeat: int) -> List[Dict]:
+    from memory_mongo import MemoryDatabase
+    from profiling import TracedDatabase
+
+    memory_db = MemoryDatabase()
+    server.db = TracedDatabase(memory_db)
+    owner_id = asyncio.run(seed_group(memory_db, scenario, "bench-group"))
+    headers = {"Authorization": f"Bearer {server.create_access_token({'user_id': owner_id})}"}
+
+    async def busy_times(user_id, time_min, time_max):
+        return busy[user_id]
+
+    server.get_user_calendar_busy_times = busy_times
+    results = []
+    for engine in ENGINES:
+        body = {
+            "group_id": "bench-group",
+            "range_start": scenario.range_start,
+            "range_end": scenario.range_end,
+            "duration_mins": scenario.duration_mins,
+            "granularity_mins": scenario.granularity_mins,
+            "min_coverage": 0.5,
+            "engine": engine,
+        }
+
+        def suggest():
+            # Every call goes back to the (stand-in) calendar backend
+            server.busy_cache.clear()
+            response = client.post("/api/schedule/suggest", headers=headers, json=body)
+            response.raise_for_status()
+
+        stats = measure(suggest, repeat)
+        results.append({"name": f"suggest[{engine}]", "case": scenario.key, **stats})
+    return results
+
+
+def bench_responses(server, size: int, repeat: int) -> List[Dict]:
+    """CPU to turn `size` stored groups/deployments into a response body, per path"""
+    from fastapi.responses import JSONResponse, ORJSONResponse
+    from fastapi.routing import serialize_response
+    from fastapi.utils import create_response_field
+
+    users = [
+        {"_id": i, "id": f"user-{i}", "email": f"user-{i}@example.com", "name": f"User {i}", "timezone": "UTC",
+         "avatar_url": None, "google_id": None, "created_at": "2025-01-01T00:00:00+00:00"}
+        for i in range(size)
+    ]
+    groups = [
+        {"_id": i, "id": f"group-{i}", "name": f"Group {i}", "owner_id": f"user-{i}",
+         "member_ids": [f"user-{(i + k) % size}" for k in range(5)], "hour_weights": None,
+         "created_at": f"2025-01-01T00:00:{i % 60:02d}+00:00"}
+        for i in range(size)
+    ]
+    deployments = [
+        {"_id": i, "id": f"deploy-{i}", "environment": "production", "branch": "main", "commit": f"{i:040x}",
+         "status": "success", "deployed_by": "ci", "created_at": "2025-01-01T00:00:00+00:00",
+         "duration_seconds": 60 + i % 30}
+        for i in range(size)
+    ]
+    users_by_id = {user["id"]: user for user in users}
+    group_field = create_response_field("response", List[server.GroupResponse])
+    loop = asyncio.new_event_loop()
+
+    def groups_models():
+        content = [
+            server.GroupResponse(**group, members=[
+                server.UserResponse(**m) for m in server.group_members(group, users_by_id)
+            ])
+            for group in groups
+        ]
+        JSONResponse(loop.run_until_complete(serialize_response(field=group_field, response_content=content)))
+
+    def groups_orjson():
+        ORJSONResponse([
+            server.response_dict(server.GroupResponse, group, members=[
+                server.response_dict(server.UserResponse, m) for m in server.group_members(group, users_by_id)
+            ])
+            for group in groups
+        ])
+
+    def deployments_models():
+        content = [server.DeploymentRecord(**d) for d in deployments]
+        JSONResponse(loop.run_until_complete(serialize_response(response_content=content)))
+
+    def deployments_orjson():
+        ORJSONResponse([server.response_dict(server.DeploymentRecord, d) for d in deployments])
+
+    try:
+        return [
+            {"name": name, "case": f"n{size}", **measure(fn, repeat)}
+            for name, fn in (("groups_response[models]", groups_models), ("groups_response[orjson]", groups_orjson),
+                             ("deployments_response[models]", deployments_models),
+                             ("deployments_response[orjson]", deployments_orjson))
+        ]
+    finally:
+        loop.close()
+
+
+def run(cases: List[Scenario], repeat: int, include_api: bool, response_sizes: Sequence[int] = (1000,)) -> Dict:
+    os.environ.setdefault("MONGO_BOOTSTRAP_INDEXES", "0")
+    import server
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    from fastapi.testclient import TestClient
+
+    results = []
+    original_db, original_busy_times = server.db, server.get_user_calendar_busy_times
+    try:
+        with TestClient(server.app) as client:
+            for scenario in cases:
+                busy = synthetic_busy_times(scenario)
+                results.extend(bench_find_available_slots(server, scenario, busy, repeat))
+                if include_api:
+                    results.extend(bench_suggest(server, client, scenario, busy, repeat))
+                print(f"{scenario.key}: " + ", ".join(
+                    f"{r['name']}={r['median_ms']:.2f}ms" for r in results if r["case"] == scenario.key
+                ), file=sys.stderr)
+    finally:
+        server.db, server.get_user_calendar_busy_times = original_db, original_busy_times
+    for size in response_sizes:
+        results.extend(bench_responses(server, size, repeat))
+        print(f"responses n{size}: " + ", ".join(
+            f"{r['name']}={r['median_ms']:.2f}ms" for r in results if r["case"] == f"n{size}"
+        ), file=sys.stderr)
+
+    return {
+        "meta": {
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "machine": platform.machine(),
+            "cpu_count": os.cpu_count(),
+            "scoring_pool": server.scoring_pool.kind,
+        },
+        "results": results,
+    }
+
+
+def compare(current: Dict, baseline: Dict, tolerance: float, min_delta_ms: float) -> List[str]:
+    """Benchmarks whose median regressed past the tolerance, as printable lines"""
+    previous = {(r["name"], r["case"]): r["median_ms"] for r in baseline["results"]}
+    regressions = []
+    for result in current["results"]:
+        before = previous.get((result["name"], result["case"]))
+        if before is None:
+            continue
+        after = result["median_ms"]
+        if after > before * (1 + tolerance) and after - before >= min_delta_ms:
+            regressions.append(
+                f"{result['name']} {result['case']}: {before:.2f}ms -> {after:.2f}ms (+{(after / before - 1) * 100:.0f}%)"
+            )
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--quick", action="store_true", help="small grid for CI")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--no-api", action="store_true", help="skip the /api/schedule/suggest benchmarks")
+    parser.add_argument("--output", type=Path, help="write results JSON here")
+    parser.add_argument("--baseline", type=Path, help="results JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown as a fraction")
+    parser.add_argument("--min-delta-ms", type=float, default=1.0, help="ignore slowdowns smaller than this")
+    args = parser.parse_args(argv)
+
+    current = run(scenarios(QUICK_GRID if args.quick else FULL_GRID, args.seed), args.repeat, not args.no_api)
+    if args.output:
+        args.output.write_text(json.dumps(current, indent=2) + "\n")
+    else:
+        print(json.dumps(current, indent=2))
+
+    if args.baseline:
+        regressions = compare(current, json.loads(args.baseline.read_text()), args.tolerance, args.min_delta_ms)
+        for line in regressions:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,75 @@
+"""Seeded synthetic groups for the benchmarks and load tests.
+
+A Scenario fixes the problem size (members, range length, granularity) and
+how busy members are; the same scenario and seed always produce the same
+busy times, so runs on different machines score identical inputs.
+"""
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List
+
+from calendar_providers import day_busy_blocks
+
+RANGE_START = datetime(2025, 3, 3, tzinfo=timezone.utc)
+
+
+@dataclass(frozen=True)
+class Scenario:
+    members: int
+    days: int
+    granularity_mins: int = 15
+    duration_mins: int = 60
+    density: int = 4  # busy blocks per member per day
+    seed: int = 42
+
+    @property
+    def key(self) -> str:
+        return f"m{self.members}-d{self.days}-g{self.granularity_mins}-b{self.density}"
+
+    @property
+    def range_start(self) -> str:
+        return RANGE_START.isoformat()
+
+    @property
+    def range_end(self) -> str:
+        return (RANGE_START + timedelta(days=self.days)).isoformat()
+
+    @property
+    def member_ids(self) -> List[str]:
+        return [f"bench-{self.key}-{i}" for i in range(self.members)]
+
+
+def synthetic_busy_times(scenario: Scenario) -> Dict[str, List[Dict]]:
+    """Busy blocks per member over the scenario's range"""
+    return {
+        member_id: [
+            block
+            for day in range(scenario.days)
+            for block in day_busy_blocks(f"{scenario.seed}:{scenario.key}:{index}",
+                                         RANGE_START + timedelta(days=day), scenario.density)
+        ]
+        for index, member_id in enumerate(scenario.member_ids)
+    }
+
+
+async def seed_group(db, scenario: Scenario, group_id: str) -> str:
+    """Insert the scenario's members and a group owned by the first one; returns the owner id"""
+    member_ids = scenario.member_ids
+    await db.users.insert_many([
+        {
+            "id": member_id,
+            "email": f"{member_id}@example.com",
+            "name": member_id,
+            "timezone": "UTC",
+            "created_at": RANGE_START.isoformat(),
+        }
+        for member_id in member_ids
+    ])
+    await db.groups.insert_one({
+        "id": group_id,
+        "name": f"Benchmark {scenario.key}",
+        "owner_id": member_ids[0],
+        "member_ids": member_ids,
+        "created_at": RANGE_START.isoformat(),
+    })
+    return member_ids[0]
@@ -304,8 +304,15 @@ const Dashboard = ({ user, onLogout }) => {
 
   const fetchGroups = async () => {
     try {
-      const { data } = await axios.get("/groups");
-      setGroups(data);
+      // The API pages groups; follow X-Next-Cursor until the last page
+      const all = [];
+      let cursor = null;
+      do {
+        const { data, headers } = await axios.get("/groups", { params: cursor ? { cursor } : {} });
+        all.push(...data);
+        cursor = headers["x-next-cursor"];
+      } while (cursor);
+      setGroups(all);
     } catch {
       toast.error("Failed to load groups");
     } finally {
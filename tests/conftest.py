@@ -0,0 +1,28 @@
+import sys
+from pathlib import Path
+
+# The backend is run from its own directory (uvicorn server:app), so mirror that here
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+
+import pytest  # noqa: E402
+
+
+@pytest.fixture
+def memory_db(monkeypatch):
+    """Point the API at a fresh in-memory database with empty caches"""
+    import server
+    from memory_mongo import MemoryDatabase
+    from profiling import TracedDatabase
+
+    db = MemoryDatabase()
+    traced = TracedDatabase(db)
+    monkeypatch.setattr(server, "db", traced)
+    monkeypatch.setattr(server.bitmap_store, "db", traced)
+    monkeypatch.setattr(server.calendar_client, "db", traced)
+    monkeypatch.setattr(server.busy_timelines, "db", traced)
+    monkeypatch.setattr(server, "deployment_writer", server.DeploymentWriter(traced))
+    server.user_cache.clear()
+    server.token_cache.clear()
+    server.busy_cache.clear()
+    return db
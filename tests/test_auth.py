@@ -0,0 +1,100 @@
+import asyncio
+from types import SimpleNamespace
+
+from fastapi.testclient import TestClient
+from pymongo.errors import DuplicateKeyError, OperationFailure
+
+import server
+from indexes import INDEXES, ensure_indexes, verify_query_plans
+
+
+def google_reply(payload):
+    return SimpleNamespace(status_code=200, json=lambda: payload)
+
+
+def sign_in_with_google(monkeypatch, client, **user_info):
+    async def exchange_code(code, redirect_uri):
+        return google_reply({"access_token": "google-token", "expires_in": 3600})
+
+    async def get_user_info(access_token):
+        return google_reply(user_info)
+
+    monkeypatch.setattr(server.calendar_client, "exchange_code", exchange_code)
+    monkeypatch.setattr(server.calendar_client, "get_user_info", get_user_info)
+    return client.get("/api/auth/google/callback", params={"code": "code"})
+
+
+def test_index_bootstrap_enforces_uniqueness_and_reports_collscans(memory_db, caplog):
+    asyncio.run(ensure_indexes(memory_db))
+    asyncio.run(memory_db.users.insert_one({"id": "u1", "email": "a@example.com"}))
+    try:
+        asyncio.run(memory_db.users.insert_one({"id": "u2", "email": "a@example.com"}))
+    except DuplicateKeyError:
+        pass
+    else:
+        raise AssertionError("duplicate email was accepted")
+
+    class Collection:
+        def __init__(self, name):
+            self.name = name
+
+        async def create_indexes(self, models):
+            if self.name == "users":
+                raise OperationFailure("E11000 duplicate key")
+
+        def find(self, query):
+            return self
+
+        def sort(self, sort):
+            return self
+
+        async def explain(self):
+            stage = "COLLSCAN" if self.name == "events" else "IXSCAN"
+            return {"queryPlanner": {"winningPlan": {"stage": "FETCH", "inputStage": {"stage": stage}}}}
+
+    fake_db = {name: Collection(name) for name in INDEXES}
+    asyncio.run(ensure_indexes(fake_db))
+    collscans = asyncio.run(verify_query_plans(fake_db))
+
+    assert "Could not create indexes on users" in caplog.text
+    assert collscans == ["events.find({'group_id': 'x'}) sort=[]"]
+
+
+def test_duplicate_signup_is_rejected(memory_db, monkeypatch):
+    body = {"email": "ann@example.com", "password": "pw", "name": "Ann"}
+    with TestClient(server.app) as client:
+        assert client.post("/api/auth/signup", json=body).status_code == 200
+        again = client.post("/api/auth/signup", json=body)
+
+        # A concurrent signup passes the lookup and loses on the unique index instead
+        find_one = memory_db.users.find_one
+
+        async def missed_lookup(query, *args, **kwargs):
+            return None if "email" in query else await find_one(query, *args, **kwargs)
+
+        monkeypatch.setattr(memory_db.users, "find_one", missed_lookup)
+        raced = client.post("/api/auth/signup", json=body)
+
+    assert (again.status_code, raced.status_code) == (400, 400)
+    assert raced.json()["detail"] == "Email already registered"
+    assert len(memory_db.users.docs) == 1
+
+
+def test_google_sign_in_links_only_verified_unlinked_accounts(memory_db, monkeypatch):
+    with TestClient(server.app) as client:
+        ann = client.post("/api/auth/signup", json={"email": "ann@example.com", "password": "pw", "name": "Ann"}).json()
+        unverified = sign_in_with_google(monkeypatch, client, id="g-ann", email="ann@example.com",
+                                         verified_email=False, name="Ann")
+        linked = sign_in_with_google(monkeypatch, client, id="g-ann", email="ann@example.com",
+                                     verified_email=True, name="Ann")
+        again = sign_in_with_google(monkeypatch, client, id="g-ann", email="ann@example.com",
+                                    verified_email=True, name="Ann")
+        # Another Google identity claiming the same email can't take the linked account
+        other = sign_in_with_google(monkeypatch, client, id="g-mallory", email="ann@example.com",
+                                    verified_email=True, name="Mallory")
+
+    assert unverified.status_code == 409
+    assert linked.json()["user"]["id"] == again.json()["user"]["id"] == ann["user"]["id"]
+    assert other.status_code == 409
+    assert [u.get("google_id") for u in memory_db.users.docs] == ["g-ann"]
+    assert [t["user_id"] for t in memory_db.oauth_tokens.docs] == [ann["user"]["id"]]
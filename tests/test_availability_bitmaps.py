@@ -0,0 +1,83 @@
+import asyncio
+import random
+from datetime import datetime, timedelta, timezone
+
+import server
+from availability_bitmaps import AvailabilityBitmapStore
+from memory_mongo import MemoryDatabase
+
+
+def make_busy_times(rng, members, start, days):
+    busy_times = {}
+    for member in members:
+        blocks = []
+        for _ in range(rng.randint(0, 5 * days)):
+            block_start = start + timedelta(minutes=rng.randint(0, days * 24 * 60))
+            blocks.append({
+                "start": block_start.isoformat(),
+                "end": (block_start + timedelta(minutes=rng.choice([7, 30, 60, 120]))).isoformat(),
+            })
+        busy_times[member] = blocks
+    return busy_times
+
+
+def test_bitmap_engine_matches_numpy_engine_and_tracks_events(monkeypatch):
+    rng = random.Random(7)
+    start = datetime(2025, 3, 3, tzinfo=timezone.utc)
+    members = [f"user-{i}" for i in range(6)]
+    busy_times = make_busy_times(rng, members, start, 4)
+    fetches = []
+
+    async def fetch_group_busy_times(member_ids, time_min, time_max):
+        fetches.append(list(member_ids))
+        return {m: busy_times[m] for m in member_ids}, []
+
+    monkeypatch.setattr(server, "bitmap_store", AvailabilityBitmapStore(MemoryDatabase()))
+    monkeypatch.setattr(server, "fetch_group_busy_times", fetch_group_busy_times)
+
+    range_start = (start + timedelta(hours=7, minutes=30)).isoformat()
+    range_end = (start + timedelta(days=3, hours=2)).isoformat()
+    args = (range_start, range_end, 60, 15, 0.5)
+
+    async def run():
+        first, _ = await server.find_available_slots_bitmap(members, *args)
+        # A second request is served from the stored bitmaps
+        second, _ = await server.find_available_slots_bitmap(members, *args)
+        best = first[0]
+        await server.bitmap_store.add_event(members[:3], best.start, best.end)
+        third, _ = await server.find_available_slots_bitmap(members, *args)
+        return first, second, third, best
+
+    first, second, third, best = asyncio.run(run())
+
+    expected = server.find_available_slots(busy_times, *args, len(members), engine="numpy")
+    assert first == expected
+    assert second == expected
+    assert fetches == [members]
+    assert all(slot.start != best.start or slot.available_members <= best.available_members - 3
+               for slot in third)
+
+
+def test_concurrent_bookings_keep_each_others_event_bits():
+    from indexes import ensure_indexes
+
+    db = MemoryDatabase()
+    store = AvailabilityBitmapStore(db)
+    day = datetime(2025, 3, 3, tzinfo=timezone.utc)
+    bookings = [(day + timedelta(hours=h), day + timedelta(hours=h + 1)) for h in (9, 11, 14)]
+
+    async def book_all():
+        await ensure_indexes(db)
+        await asyncio.gather(*(
+            store.add_event(["ann", "bob"], start.isoformat(), end.isoformat()) for start, end in bookings
+        ))
+        return await store.busy_matrix(["ann", "bob"], day, day + timedelta(days=1), None)
+
+    # Calendar bits are fresh, so busy_matrix only reads what the bookings wrote
+    asyncio.run(store.store_calendar({"ann": [], "bob": []}, [day]))
+    busy, rows, _ = asyncio.run(book_all())
+
+    ticks_per_hour = 12
+    expected = [h * ticks_per_hour + t for h in (9, 11, 14) for t in range(ticks_per_hour)]
+    assert rows == ["ann", "bob"]
+    assert [list(row.nonzero()[0]) for row in busy] == [expected, expected]
@@ -0,0 +1,22 @@
+from benchmarks.run_benchmarks import compare, run
+from benchmarks.synthetic import Scenario, synthetic_busy_times
+
+
+def test_synthetic_busy_times_are_seeded():
+    scenario = Scenario(members=3, days=2, density=5)
+    assert synthetic_busy_times(scenario) == synthetic_busy_times(scenario)
+    assert synthetic_busy_times(scenario) != synthetic_busy_times(Scenario(members=3, days=2, density=5, seed=7))
+
+
+def test_benchmark_run_and_regression_check():
+    current = run([Scenario(members=3, days=1)], repeat=1, include_api=True, response_sizes=(10,))
+    names = {r["name"] for r in current["results"]}
+    assert names == {
+        "find_available_slots[sweep]", "find_available_slots[numpy]", "suggest[sweep]", "suggest[numpy]",
+        "groups_response[models]", "groups_response[orjson]",
+        "deployments_response[models]", "deployments_response[orjson]",
+    }
+
+    baseline = {"results": [dict(r, median_ms=r["median_ms"] / 10) for r in current["results"]]}
+    assert len(compare(current, baseline, tolerance=0.25, min_delta_ms=0.0)) == 8
+    assert compare(current, current, tolerance=0.25, min_delta_ms=0.0) == []
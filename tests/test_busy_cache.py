@@ -0,0 +1,122 @@
+import asyncio
+
+from busy_cache import BusyTimeCache
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def recording_fetch(calls):
+    async def fetch(user_id, time_min, time_max):
+        calls.append((user_id, time_min, time_max))
+        return [{"start": time_min, "end": time_max}]
+    return fetch
+
+
+def test_overlapping_ranges_fetch_only_the_gaps():
+    calls = []
+    cache = BusyTimeCache(ttl=60, clock=Clock())
+    fetch = recording_fetch(calls)
+
+    async def run():
+        await cache.get("u", "2025-03-03T09:00:00Z", "2025-03-03T12:00:00Z", fetch)
+        await cache.get("u", "2025-03-03T11:00:00Z", "2025-03-03T14:00:00Z", fetch)
+        await cache.get("u", "2025-03-03T08:00:00Z", "2025-03-03T14:00:00Z", fetch)
+        return await cache.get("u", "2025-03-03T09:30:00Z", "2025-03-03T13:00:00Z", fetch)
+
+    blocks = asyncio.run(run())
+
+    assert calls == [
+        ("u", "2025-03-03T09:00:00+00:00", "2025-03-03T12:00:00+00:00"),
+        ("u", "2025-03-03T12:00:00+00:00", "2025-03-03T14:00:00+00:00"),
+        ("u", "2025-03-03T08:00:00+00:00", "2025-03-03T09:00:00+00:00"),
+    ]
+    assert [b["start"] for b in blocks] == ["2025-03-03T09:00:00+00:00", "2025-03-03T12:00:00+00:00"]
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 3
+
+
+def test_ttl_expiry_lru_eviction_and_invalidation():
+    calls = []
+    clock = Clock()
+    cache = BusyTimeCache(ttl=60, max_users=2, clock=clock)
+    fetch = recording_fetch(calls)
+    window = ("2025-03-03T09:00:00Z", "2025-03-03T12:00:00Z")
+
+    async def get(user_id):
+        await cache.get(user_id, *window, fetch)
+
+    async def run():
+        await get("a")
+        await get("a")
+        clock.now = 61
+        await get("a")  # expired
+        await get("b")
+        await get("c")  # evicts a
+        await get("a")
+        cache.invalidate(["c"], "2025-03-03T10:00:00Z", "2025-03-03T11:00:00Z")
+        await get("c")
+
+    asyncio.run(run())
+
+    assert [c[0] for c in calls] == ["a", "a", "b", "c", "a", "c"]
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["evictions"] == 2
+
+
+def test_fresh_fetch_outlives_an_older_adjacent_segment():
+    calls = []
+    clock = Clock()
+    cache = BusyTimeCache(ttl=60, clock=clock)
+    fetch = recording_fetch(calls)
+
+    async def run():
+        await cache.get("u", "2025-03-03T09:00:00Z", "2025-03-03T12:00:00Z", fetch)
+        clock.now = 50
+        await cache.get("u", "2025-03-03T12:00:00Z", "2025-03-03T14:00:00Z", fetch)
+        clock.now = 70
+        # The first segment expired; the adjacent one fetched at 50 is still fresh
+        await cache.get("u", "2025-03-03T12:00:00Z", "2025-03-03T14:00:00Z", fetch)
+        await cache.get("u", "2025-03-03T09:00:00Z", "2025-03-03T14:00:00Z", fetch)
+
+    asyncio.run(run())
+
+    assert [c[1:] for c in calls] == [
+        ("2025-03-03T09:00:00+00:00", "2025-03-03T12:00:00+00:00"),
+        ("2025-03-03T12:00:00+00:00", "2025-03-03T14:00:00+00:00"),
+        ("2025-03-03T09:00:00+00:00", "2025-03-03T12:00:00+00:00"),
+    ]
+    assert cache.stats()["hits"] == 1
+
+
+def test_fetch_racing_an_invalidation_is_not_cached():
+    calls = []
+    cache = BusyTimeCache(ttl=60, clock=Clock())
+    window = ("2025-03-03T09:00:00Z", "2025-03-03T12:00:00Z")
+    started, booked = asyncio.Event(), asyncio.Event()
+
+    async def slow_fetch(user_id, time_min, time_max):
+        calls.append(time_min)
+        started.set()
+        await booked.wait()
+        return []  # read before the booking landed
+
+    async def run():
+        pending = asyncio.create_task(cache.get("u", *window, slow_fetch))
+        await started.wait()
+        # An event is created for u while the provider read is in flight
+        cache.invalidate(["u"], "2025-03-03T10:00:00Z", "2025-03-03T11:00:00Z")
+        booked.set()
+        await pending
+        return await cache.get("u", *window, recording_fetch(calls))
+
+    blocks = asyncio.run(run())
+
+    assert len(calls) == 2
+    assert [b["start"] for b in blocks] == ["2025-03-03T09:00:00+00:00"]
+    assert cache.stats()["hits"] == 0
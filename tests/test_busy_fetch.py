@@ -0,0 +1,22 @@
+import asyncio
+
+import server
+
+
+def test_slow_and_failing_members_are_degraded(monkeypatch):
+    async def fake_busy_times(user_id, time_min, time_max):
+        if user_id == "slow":
+            await asyncio.sleep(1)
+        if user_id == "broken":
+            raise RuntimeError("calendar unavailable")
+        return [{"start": time_min, "end": time_max}]
+
+    monkeypatch.setattr(server, "get_user_calendar_busy_times", fake_busy_times)
+    monkeypatch.setattr(server, "BUSY_FETCH_TIMEOUT", 0.05)
+
+    all_busy_times, degraded = asyncio.run(server.fetch_group_busy_times(
+        ["ok", "slow", "broken"], "2025-03-03T09:00:00Z", "2025-03-03T17:00:00Z"
+    ))
+
+    assert list(all_busy_times) == ["ok"]
+    assert sorted(degraded) == ["broken", "slow"]
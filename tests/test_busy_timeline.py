@@ -0,0 +1,60 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+from fastapi.testclient import TestClient
+
+import server
+from busy_timeline import add_interval, union_busy
+
+T0 = datetime(2030, 1, 7, tzinfo=timezone.utc)
+
+
+def at(hours):
+    return T0 + timedelta(hours=hours)
+
+
+def test_timeline_merges_prunes_and_unions_with_provider_blocks():
+    timeline = []
+    for start, end in [(9, 10), (12, 13), (10, 11), (12.5, 14)]:
+        timeline = add_interval(timeline, at(start), at(end))
+    assert timeline == [(at(9), at(11)), (at(12), at(14))]
+    assert add_interval(timeline, at(15), at(16), prune_before=at(11.5)) == [(at(12), at(14)), (at(15), at(16))]
+
+    booked = [{"start": start.isoformat(), "end": end.isoformat()} for start, end in timeline]
+    provider = [{"start": at(13.5).isoformat(), "end": at(15).isoformat()},
+                {"start": at(8).isoformat(), "end": at(8.5).isoformat()}]
+    assert union_busy(provider, booked, at(0).isoformat(), at(24).isoformat()) == [
+        {"start": at(s).isoformat(), "end": at(e).isoformat()} for s, e in [(8, 8.5), (9, 11), (12, 15)]
+    ]
+    # Nothing booked in range: the provider's blocks come back as they are
+    assert union_busy(provider, booked, at(20).isoformat(), at(24).isoformat()) is provider
+
+
+def test_booked_events_count_as_busy_without_extra_reads(memory_db, monkeypatch):
+    async def free(user_id, time_min, time_max):
+        return []
+
+    monkeypatch.setattr(server, "get_user_calendar_busy_times", free)
+    users = [{"id": f"u{i}", "email": f"u{i}@example.com", "name": f"U{i}", "timezone": "UTC"} for i in range(2)]
+    asyncio.run(memory_db.users.insert_many(users))
+    asyncio.run(memory_db.groups.insert_one({"id": "g1", "name": "G", "owner_id": "u0", "member_ids": ["u0", "u1"]}))
+    headers = {"Authorization": f"Bearer {server.create_access_token({'user_id': 'u0'})}"}
+    request = {"group_id": "g1", "range_start": at(12).isoformat(), "range_end": at(16).isoformat(),
+               "granularity_mins": 60, "min_coverage": 0.0, "engine": "sweep"}
+
+    user_reads = []
+    find = memory_db.users.find
+    monkeypatch.setattr(memory_db.users, "find", lambda *args: user_reads.append(args) or find(*args))
+    with TestClient(server.app) as client:
+        for start, end in [(13, 14), (13.5, 15)]:
+            created = client.post("/api/schedule/create", headers=headers, json={
+                "group_id": "g1", "start": at(start).isoformat(), "end": at(end).isoformat(), "title": "Session"
+            })
+            assert created.status_code == 200
+        user_reads.clear()
+        slots = client.post("/api/schedule/suggest", headers=headers, json=request).json()
+
+    available = {slot["start"]: slot["available_members"] for slot in slots}
+    assert available == {at(12).isoformat(): 2, at(13).isoformat(): 0, at(14).isoformat(): 0, at(15).isoformat(): 2}
+    assert len(user_reads) == 1
+    assert memory_db.users.docs[1]["busy_timeline"] == [{"start": at(13).isoformat(), "end": at(15).isoformat()}]
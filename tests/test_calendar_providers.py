@@ -0,0 +1,47 @@
+import asyncio
+import json
+
+import pytest
+
+from calendar_providers import FixtureCalendarProvider, SyntheticCalendarProvider, build_calendar_provider
+from scheduling import parse_iso
+
+
+def test_synthetic_calendars_are_stable_across_calls_and_partial_ranges():
+    provider = SyntheticCalendarProvider(seed=3, density=6)
+
+    async def fetch():
+        week = await provider.busy_times("u1", "2025-03-03T00:00:00Z", "2025-03-10T00:00:00Z")
+        again = await provider.busy_times("u1", "2025-03-03T00:00:00Z", "2025-03-10T00:00:00Z")
+        middle = await provider.busy_times("u1", "2025-03-05T00:00:00Z", "2025-03-06T00:00:00Z")
+        other = await provider.busy_times("u2", "2025-03-03T00:00:00Z", "2025-03-10T00:00:00Z")
+        return week, again, middle, other
+
+    week, again, middle, other = asyncio.run(fetch())
+    assert week and week == again and week != other
+    # The one-day fetch sees exactly the week's blocks for that day
+    day_start, day_end = parse_iso("2025-03-05T00:00:00Z"), parse_iso("2025-03-06T00:00:00Z")
+    expected = [
+        (max(parse_iso(b["start"]), day_start), min(parse_iso(b["end"]), day_end))
+        for b in week if parse_iso(b["end"]) > day_start and parse_iso(b["start"]) < day_end
+    ]
+    assert [(parse_iso(b["start"]), parse_iso(b["end"])) for b in middle] == expected
+
+
+def test_fixture_provider_clips_to_range_and_falls_back_to_default(tmp_path):
+    path = tmp_path / "calendars.json"
+    path.write_text(json.dumps({
+        "u1": [{"start": "2025-03-03T09:00:00Z", "end": "2025-03-03T11:00:00Z"}],
+        "*": [{"start": "2025-03-03T13:00:00Z", "end": "2025-03-03T14:00:00Z"}],
+    }))
+    provider = build_calendar_provider("fixture", None, fixture_path=str(path))
+
+    assert asyncio.run(provider.busy_times("u1", "2025-03-03T10:00:00Z", "2025-03-03T18:00:00Z")) == [
+        {"start": "2025-03-03T10:00:00+00:00", "end": "2025-03-03T11:00:00+00:00"}
+    ]
+    assert asyncio.run(provider.busy_times("u9", "2025-03-03T00:00:00Z", "2025-03-04T00:00:00Z")) == [
+        {"start": "2025-03-03T13:00:00+00:00", "end": "2025-03-03T14:00:00+00:00"}
+    ]
+    assert isinstance(provider, FixtureCalendarProvider)
+    with pytest.raises(ValueError):
+        build_calendar_provider("random", None)
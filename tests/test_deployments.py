@@ -0,0 +1,115 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from fastapi.testclient import TestClient
+from pymongo.errors import AutoReconnect
+
+import server
+from deployment_writer import DeploymentQueueFull, DeploymentWriter
+
+
+def deployment(i, environment, status, duration, created_at):
+    return {"id": f"d{i:02d}", "environment": environment, "branch": "main", "commit": f"c{i}",
+            "status": status, "deployed_by": "ci", "created_at": created_at, "duration_seconds": duration}
+
+
+def seed(memory_db, deployments):
+    asyncio.run(memory_db.deployments.insert_many(deployments))
+
+
+def test_history_pages_by_created_at_then_id(memory_db):
+    # Pairs share a timestamp, so paging has to fall back to the id
+    seed(memory_db, [
+        deployment(i, "preview", "success", 60, f"2025-01-0{i // 2 + 1}T00:00:00+00:00") for i in range(7)
+    ])
+    with TestClient(server.app) as client:
+        pages, cursor = [], None
+        while True:
+            params = {"limit": 3, **({"cursor": cursor} if cursor else {})}
+            response = client.get("/api/deployments", params=params)
+            pages.append([d["id"] for d in response.json()])
+            cursor = response.headers.get("X-Next-Cursor")
+            if not cursor:
+                break
+        capped = client.get("/api/deployments", params={"limit": 10_000})
+        bad = client.get("/api/deployments", params={"cursor": "nope"})
+
+    assert pages == [["d06", "d05", "d04"], ["d03", "d02", "d01"], ["d00"]]
+    assert len(capped.json()) == 7
+    assert bad.status_code == 400
+
+
+def test_latest_per_environment_and_stats(memory_db):
+    seed(memory_db, [
+        deployment(1, "production", "success", 100, "2025-03-01T10:00:00+00:00"),
+        deployment(2, "production", "failure", 300, "2025-03-01T12:00:00+00:00"),
+        deployment(3, "production", "success", 200, "2025-03-01T14:00:00+00:00"),
+        deployment(4, "production", "in_progress", None, "2025-03-02T09:00:00+00:00"),
+        deployment(5, "staging", "success", 50, "2025-03-01T08:00:00+00:00"),
+    ])
+    with TestClient(server.app) as client:
+        latest = client.get("/api/deployments/latest").json()
+        stats = client.get("/api/deployments/stats", params={"since": "2025-03-01"}).json()
+        bad = client.get("/api/deployments/stats", params={"bucket": "week"})
+
+    assert latest["production"]["id"] == "d04"
+    assert latest["staging"]["id"] == "d05"
+    assert latest["preview"] is None
+    assert stats == [
+        {"environment": "production", "bucket": "2025-03-01", "total": 3, "succeeded": 2, "failed": 1,
+         "success_rate": 2 / 3, "p50_duration_seconds": 200, "p95_duration_seconds": 300},
+        {"environment": "production", "bucket": "2025-03-02", "total": 1, "succeeded": 0, "failed": 0,
+         "success_rate": None, "p50_duration_seconds": None, "p95_duration_seconds": None},
+        {"environment": "staging", "bucket": "2025-03-01", "total": 1, "succeeded": 1, "failed": 0,
+         "success_rate": 1.0, "p50_duration_seconds": 50, "p95_duration_seconds": 50},
+    ]
+    assert bad.status_code == 400
+
+
+def test_posts_are_batched_and_idempotent(memory_db, monkeypatch):
+    monkeypatch.setattr(server, "deployment_writer", DeploymentWriter(server.db, batch_size=3, flush_interval=60))
+    writes = []
+    insert_many = memory_db.deployments.insert_many
+
+    async def recording_insert_many(documents, **kwargs):
+        writes.append(len(documents))
+        return await insert_many(documents, **kwargs)
+
+    monkeypatch.setattr(memory_db.deployments, "insert_many", recording_insert_many)
+    body = {"environment": "preview", "branch": "develop", "commit": "abc", "status": "success",
+            "deployed_by": "ci"}
+    with TestClient(server.app) as client:
+        first = client.post("/api/deployments", json=body, headers={"Idempotency-Key": "run-1"})
+        retry = client.post("/api/deployments", json=body, headers={"Idempotency-Key": "run-1"})
+        for _ in range(4):
+            assert client.post("/api/deployments", json=body).status_code == 202
+        # The third record filled a batch; the last two wait for the timer or a read
+        assert len(memory_db.deployments.docs) == 3
+
+        history = client.get("/api/deployments").json()
+        stored_retry = client.post("/api/deployments", json=body, headers={"Idempotency-Key": "run-1"})
+
+    assert first.status_code == 202
+    assert retry.json()["id"] == stored_retry.json()["id"] == first.json()["id"]
+    assert len(history) == 5
+    assert writes == [3, 2]
+
+
+def test_full_queue_pushes_back_while_mongo_is_down():
+    async def insert_many(documents, **kwargs):
+        raise AutoReconnect("connection refused")
+
+    writer = DeploymentWriter(SimpleNamespace(deployments=SimpleNamespace(insert_many=insert_many)),
+                              batch_size=10, flush_interval=60, max_queue=2)
+
+    async def scenario():
+        await writer.submit({"id": "a"})
+        await writer.submit({"id": "b"})
+        with pytest.raises(DeploymentQueueFull):
+            await writer.submit({"id": "c"})
+        await writer.flush()
+
+    asyncio.run(scenario())
+    assert [r["id"] for r in writer.pending] == ["a", "b"]
+    assert writer.stats()["rejected"] == 1
@@ -0,0 +1,99 @@
+import asyncio
+import json
+import threading
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from google_calendar import GoogleCalendarClient
+
+
+class StubGoogle(BaseHTTPRequestHandler):
+    """Local stand-in for the token and FreeBusy endpoints"""
+    requests = []
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        StubGoogle.requests.append((self.path, self.headers["Authorization"]))
+        if self.path == "/token":
+            payload = {"access_token": "refreshed", "expires_in": 3600}
+        else:
+            items = json.loads(body)["items"]
+            payload = {"calendars": {
+                item["id"]: {"busy": [{"start": "2025-03-03T10:00:00Z", "end": "2025-03-03T11:00:00Z"}]}
+                for item in items
+            }}
+        data = json.dumps(payload).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+class FakeCursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    async def to_list(self, length):
+        return self.docs
+
+
+class FakeCollection:
+    def __init__(self, docs, key):
+        self.docs = docs
+        self.key = key
+        self.updates = []
+
+    def find(self, query, projection=None):
+        wanted = set(query[self.key]["$in"])
+        return FakeCursor([d for d in self.docs if d[self.key] in wanted])
+
+    async def update_one(self, query, update):
+        self.updates.append((query, update))
+
+
+class FakeDb:
+    def __init__(self, members):
+        now = datetime.now(timezone.utc)
+        self.users = FakeCollection([{"id": m, "email": f"{m}@example.com"} for m in members], "id")
+        self.oauth_tokens = FakeCollection([
+            {
+                "user_id": m,
+                "access_token": f"token-{m}",
+                "refresh_token": f"refresh-{m}",
+                # The first member's token is about to expire and must be refreshed
+                "expiry": (now + timedelta(minutes=1 if i == 0 else 60)).isoformat(),
+            }
+            for i, m in enumerate(members)
+        ], "user_id")
+
+
+def test_busy_times_are_batched_into_few_freebusy_calls():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubGoogle)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    members = [f"user{i}" for i in range(40)] + ["no-token"]
+    db = FakeDb(members[:40])
+    StubGoogle.requests = []
+
+    async def run():
+        client = GoogleCalendarClient(db, "id", "secret", api_base=base, token_url=f"{base}/token")
+        try:
+            return await asyncio.gather(*(
+                client.busy_times(m, "2025-03-03T00:00:00Z", "2025-03-04T00:00:00Z") for m in members
+            ))
+        finally:
+            await client.aclose()
+
+    try:
+        results = asyncio.run(run())
+    finally:
+        server.shutdown()
+
+    assert all(len(busy) == 1 for busy in results[:40])
+    assert results[40] == []
+    assert StubGoogle.requests == [("/token", None), ("/calendar/v3/freeBusy", "Bearer refreshed")]
+    assert db.oauth_tokens.updates[0][1]["$set"]["access_token"] == "refreshed"
@@ -0,0 +1,45 @@
+import asyncio
+
+from fastapi.testclient import TestClient
+
+import server
+
+
+def test_group_pages_cover_owned_and_joined_groups_with_hydrated_members(memory_db, monkeypatch):
+    users = [{"id": f"u{i}", "email": f"u{i}@example.com", "name": f"U{i}", "timezone": "UTC"} for i in range(3)]
+    # Owned and joined groups interleaved, with created_at ties broken by id;
+    # "gone" was deleted and must be skipped, not fail hydration
+    groups = [
+        {"id": f"g{i}", "name": f"G{i}", "created_at": f"2025-01-0{i // 2 + 1}",
+         **({"owner_id": "u0", "member_ids": ["u0", "u2"]} if i % 2 else
+            {"owner_id": "u1", "member_ids": ["u1", "u0", "gone"]})}
+        for i in range(7)
+    ]
+    groups.append({"id": "other", "name": "Other", "created_at": "2025-01-01", "owner_id": "u1", "member_ids": ["u1"]})
+
+    async def seed():
+        await memory_db.users.insert_many(users)
+        await memory_db.groups.insert_many(groups)
+
+    asyncio.run(seed())
+    user_reads = []
+    find = memory_db.users.find
+    monkeypatch.setattr(memory_db.users, "find", lambda *args: user_reads.append(args) or find(*args))
+    headers = {"Authorization": f"Bearer {server.create_access_token({'user_id': 'u0'})}"}
+    with TestClient(server.app) as client:
+        user_reads.clear()  # startup query-plan checks
+        pages, cursor = [], None
+        while True:
+            params = {"limit": 3, **({"cursor": cursor} if cursor else {})}
+            response = client.get("/api/groups", params=params, headers=headers)
+            pages.append(response.json())
+            cursor = response.headers.get("X-Next-Cursor")
+            if not cursor:
+                break
+
+    assert [[g["id"] for g in page] for page in pages] == [["g0", "g1", "g2"], ["g3", "g4", "g5"], ["g6"]]
+    # One users query per page for its members, plus one to authenticate the caller
+    assert len(user_reads) == len(pages) + 1
+    members = {g["id"]: [m["email"] for m in g["members"]] for page in pages for g in page}
+    assert members["g0"] == ["u1@example.com", "u0@example.com"]
+    assert members["g1"] == ["u0@example.com", "u2@example.com"]
@@ -0,0 +1,79 @@
+from types import SimpleNamespace
+
+from fastapi.testclient import TestClient
+from pymongo.errors import BulkWriteError
+
+import server
+
+
+def signup(client, email):
+    body = client.post("/api/auth/signup", json={"email": email, "password": "pw", "name": email[:3]}).json()
+    return body["user"]["id"], {"Authorization": f"Bearer {body['access_token']}"}
+
+
+def google_signup(monkeypatch, client, email):
+    async def exchange_code(code, redirect_uri):
+        return SimpleNamespace(status_code=200, json=lambda: {"access_token": "t", "expires_in": 3600})
+
+    async def get_user_info(access_token):
+        return SimpleNamespace(status_code=200, json=lambda: {
+            "id": f"g-{email}", "email": email, "verified_email": True, "name": email[:3]
+        })
+
+    monkeypatch.setattr(server.calendar_client, "exchange_code", exchange_code)
+    monkeypatch.setattr(server.calendar_client, "get_user_info", get_user_info)
+    return client.get("/api/auth/google/callback", params={"code": "code"}).json()["user"]["id"]
+
+
+def test_invites_report_per_email_status_and_resolve_on_either_signup(memory_db, monkeypatch):
+    with TestClient(server.app) as client:
+        owner_id, owner = signup(client, "own@example.com")
+        bob_id, bob = signup(client, "bob@example.com")
+        group = client.post("/api/groups", headers=owner, json={"name": "Study"}).json()
+        invite_url = f"/api/groups/{group['id']}/invite"
+
+        invited = client.post(invite_url, headers=owner, json={"emails": [
+            "bob@example.com", "bob@example.com", "own@example.com", "carol@example.com", "dave@example.com"
+        ]}).json()
+        again = client.post(invite_url, headers=owner, json={"emails": ["bob@example.com", "carol@example.com"]}).json()
+        forbidden = client.post(invite_url, headers=bob, json={"emails": ["erin@example.com"]})
+        pending_before = len(memory_db.group_invitations.docs)
+
+        carol_id, _ = signup(client, "carol@example.com")
+        dave_id = google_signup(monkeypatch, client, "dave@example.com")
+        members = client.get(f"/api/groups/{group['id']}", headers=owner).json()["member_ids"]
+
+    assert invited["results"] == [
+        {"email": "bob@example.com", "status": "added"},
+        {"email": "own@example.com", "status": "already_member"},
+        {"email": "carol@example.com", "status": "pending"},
+        {"email": "dave@example.com", "status": "pending"},
+    ]
+    assert (invited["invited"], invited["pending"]) == (["bob@example.com"], ["carol@example.com", "dave@example.com"])
+    assert [r["status"] for r in again["results"]] == ["already_member", "pending"]
+    assert forbidden.status_code == 403
+    # Re-inviting a pending email reuses its invitation; signing up consumes it
+    assert pending_before == 2
+    assert memory_db.group_invitations.docs == []
+    assert members == [owner_id, bob_id, carol_id, dave_id]
+
+
+def test_invite_racing_another_invite_still_reports_pending(memory_db, monkeypatch):
+    with TestClient(server.app) as client:
+        _, owner = signup(client, "own@example.com")
+        group = client.post("/api/groups", headers=owner, json={"name": "Study"}).json()
+        bulk_write = memory_db.group_invitations.bulk_write
+
+        async def lose_race(requests, ordered=True):
+            # Another invite for carol lands between our upsert's match and insert
+            await memory_db.group_invitations.insert_one({"group_id": group["id"], "email": "carol@example.com"})
+            await bulk_write(requests[1:], ordered=ordered)
+            raise BulkWriteError({"writeErrors": [{"index": 0, "code": 11000, "errmsg": "E11000"}]})
+
+        monkeypatch.setattr(memory_db.group_invitations, "bulk_write", lose_race)
+        invited = client.post(f"/api/groups/{group['id']}/invite", headers=owner,
+                              json={"emails": ["carol@example.com", "dave@example.com"]})
+
+    assert invited.status_code == 200
+    assert invited.json()["pending"] == ["carol@example.com", "dave@example.com"]
+    assert sorted(d["email"] for d in memory_db.group_invitations.docs) == ["carol@example.com", "dave@example.com"]
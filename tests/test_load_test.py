@@ -0,0 +1,32 @@
+import httpx
+
+from benchmarks.google_stub import start_google_stub
+from benchmarks.load_test import LoadStats
+
+
+def test_google_stub_links_any_code_and_serves_seeded_busy_times():
+    stub, base = start_google_stub()
+    try:
+        tokens = httpx.post(f"{base}/token", data={"code": "ann@example.com"}).json()
+        headers = {"Authorization": f"Bearer {tokens['access_token']}"}
+        assert httpx.get(f"{base}/oauth2/v2/userinfo", headers=headers).json()["email"] == "ann@example.com"
+
+        query = {"timeMin": "2025-03-03T12:00:00Z", "timeMax": "2025-03-05T00:00:00Z",
+                 "items": [{"id": "primary"}, {"id": "ann@example.com"}]}
+        calendars = httpx.post(f"{base}/calendar/v3/freeBusy", json=query, headers=headers).json()["calendars"]
+    finally:
+        stub.shutdown()
+
+    assert calendars["primary"]["busy"] == calendars["ann@example.com"]["busy"]
+    assert calendars["primary"]["busy"]
+    assert all(block["end"] > "2025-03-03T12:00" for block in calendars["primary"]["busy"])
+
+
+def test_load_stats_report_percentiles_and_errors():
+    stats = LoadStats()
+    for ms in range(1, 101):
+        stats.record("suggest", ms / 1000, ms != 100)
+    report = stats.report(elapsed=10.0)["suggest"]
+    assert report["requests"] == 100 and report["rps"] == 10.0
+    assert report["error_rate"] == 0.01
+    assert (report["p50_ms"], report["p99_ms"], report["max_ms"]) == (51.0, 100.0, 100.0)
@@ -0,0 +1,33 @@
+from types import SimpleNamespace
+
+from fastapi.testclient import TestClient
+
+import server
+from metrics import MONGO_LATENCY, MongoCommandListener, size_bucket
+
+
+def test_metrics_endpoint_exposes_route_latency_and_cache_stats(memory_db):
+    with TestClient(server.app) as client:
+        assert client.get("/api/health").status_code == 200
+        response = client.get("/metrics")
+
+    assert response.status_code == 200
+    body = response.text
+    assert 'http_request_duration_seconds_count{method="GET",route="/api/health",status="200"}' in body
+    assert 'cache_hit_ratio{cache="busy_times"}' in body
+    assert "scoring_pool_active_requests" in body
+    assert "event_loop_lag_seconds_bucket" in body
+
+
+def test_mongo_listener_labels_commands_by_collection():
+    listener = MongoCommandListener()
+    before = MONGO_LATENCY.labels("groups", "find")._sum.get()
+
+    listener.started(SimpleNamespace(command={"find": "groups", "filter": {}}, command_name="find",
+                                     connection_id=("db", 27017), request_id=7))
+    listener.succeeded(SimpleNamespace(command_name="find", connection_id=("db", 27017), request_id=7,
+                                       duration_micros=1500))
+
+    assert MONGO_LATENCY.labels("groups", "find")._sum.get() - before == 0.0015
+    assert size_bucket(150, (100, 1000)) == "1000"
+    assert size_bucket(5000, (100, 1000)) == "+Inf"
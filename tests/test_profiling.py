@@ -0,0 +1,66 @@
+import asyncio
+
+from fastapi.testclient import TestClient
+
+import server
+from profiling import RequestProfiler, span
+
+
+def test_profiled_request_records_mongo_calendar_and_scoring_spans(memory_db, monkeypatch):
+    members = ["a", "b"]
+    for member in members:
+        asyncio.run(memory_db.users.insert_one({"id": member, "email": f"{member}@example.com", "name": member}))
+    asyncio.run(memory_db.groups.insert_one({
+        "id": "g1", "name": "Study", "owner_id": "a", "member_ids": members, "created_at": "2025-01-01"
+    }))
+
+    async def busy_times(user_id, time_min, time_max):
+        return []
+
+    monkeypatch.setattr(server, "get_user_calendar_busy_times", busy_times)
+    monkeypatch.setattr(server, "profiler", RequestProfiler(slow_threshold=0))
+    monkeypatch.setattr(server, "ADMIN_EMAILS", {"a@example.com"})
+    token = server.create_access_token({"user_id": "a"})
+    headers = {"Authorization": f"Bearer {token}"}
+    with TestClient(server.app) as client:
+        response = client.post("/api/schedule/suggest", headers={**headers, "X-Profile": "1"}, json={
+            "group_id": "g1",
+            "range_start": "2025-03-03T13:00:00Z",
+            "range_end": "2025-03-03T18:00:00Z",
+            "duration_mins": 60,
+        })
+        unprofiled = client.get("/api/health")
+        traces = client.get("/api/admin/traces", headers=headers)
+        member = {"Authorization": f"Bearer {server.create_access_token({'user_id': 'b'})}"}
+        forbidden = client.get("/api/admin/traces", headers=member)
+        cache_stats = client.get("/api/schedule/cache/stats", headers=headers)
+        cache_forbidden = [client.get("/api/schedule/cache/stats", headers=h).status_code for h in (member, {})]
+
+    assert response.status_code == 200
+    assert "total;dur=" in response.headers["Server-Timing"]
+    assert "Server-Timing" not in unprofiled.headers
+    assert forbidden.status_code == 403
+    assert cache_stats.json()["users"] == 2
+    assert cache_forbidden == [403, 401]
+
+    [trace] = traces.json()["traces"]
+    assert trace["id"] == response.headers["X-Trace-Id"]
+    assert trace["route"] == "/api/schedule/suggest"
+    names = {(s["category"], s["name"]) for s in trace["spans"]}
+    assert {("mongo", "groups.find_one"), ("calendar", "a"), ("calendar", "b")} <= names
+    assert {"mongo", "calendar", "scoring"} <= set(trace["totals_ms"])
+
+
+def test_slow_requests_are_kept_and_fast_ones_dropped():
+    profiler = RequestProfiler(slow_threshold=0.05, buffer_size=2)
+    for sleep in (0.0, 0.06):
+        trace, token = profiler.start("GET", "/api/x", {})
+        with span("mongo", "groups.find"):
+            pass
+        trace._start -= sleep
+        profiler.finish(trace, token, 200, "/api/x")
+
+    [kept] = profiler.recent()
+    assert kept["slow"] and kept["spans"][0]["name"] == "groups.find"
+    with span("mongo", "outside a request"):
+        pass
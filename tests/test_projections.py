@@ -0,0 +1,63 @@
+from fastapi.testclient import TestClient
+
+import server
+from memory_mongo import MemoryCollection
+
+
+def test_every_read_in_the_main_flows_uses_a_projection(memory_db, monkeypatch):
+    async def busy_until_two(user_id, time_min, time_max):
+        return [{"start": "2025-03-03T12:00:00+00:00", "end": "2025-03-03T14:00:00+00:00"}]
+
+    # Fixed calendars, so the suggest step always has slots to book
+    monkeypatch.setattr(server, "get_user_calendar_busy_times", busy_until_two)
+    unprojected = []
+    find, find_one = MemoryCollection.find, MemoryCollection.find_one
+
+    def record(collection, projection):
+        if not projection:
+            unprojected.append(collection.name)
+
+    def recording_find(self, query=None, projection=None):
+        record(self, projection)
+        return find(self, query, projection)
+
+    async def recording_find_one(self, query=None, projection=None, **kwargs):
+        record(self, projection)
+        return await find_one(self, query, projection, **kwargs)
+
+    with TestClient(server.app) as client:
+        monkeypatch.setattr(MemoryCollection, "find", recording_find)
+        monkeypatch.setattr(MemoryCollection, "find_one", recording_find_one)
+
+        owner = client.post("/api/auth/signup", json={
+            "email": "owner@example.com", "password": "pw", "name": "Owner"
+        }).json()
+        headers = {"Authorization": f"Bearer {owner['access_token']}"}
+        group = client.post("/api/groups", headers=headers, json={"name": "Study"}).json()
+        invited = client.post(f"/api/groups/{group['id']}/invite", headers=headers,
+                              json={"emails": ["member@example.com"]})
+        client.post("/api/auth/signup", json={"email": "member@example.com", "password": "pw", "name": "Member"})
+        assert client.post("/api/auth/login", json={"email": "owner@example.com", "password": "pw"}).status_code == 200
+        assert client.get("/api/me", headers=headers).status_code == 200
+        details = client.get(f"/api/groups/{group['id']}", headers=headers).json()
+        assert client.get("/api/groups", headers=headers).status_code == 200
+        suggested = client.post("/api/schedule/suggest", headers=headers, json={
+            "group_id": group["id"],
+            "range_start": "2025-03-03T12:00:00Z",
+            "range_end": "2025-03-03T18:00:00Z",
+        })
+        created = client.post("/api/schedule/create", headers=headers, json={
+            "group_id": group["id"], "start": "2025-03-03T15:00:00Z", "end": "2025-03-03T16:00:00Z", "title": "Session"
+        })
+        client.post("/api/deployments", json={
+            "environment": "preview", "branch": "main", "commit": "abc", "status": "success", "deployed_by": "ci"
+        })
+        assert client.get("/api/deployments").json()[0]["commit"] == "abc"
+        assert client.get("/api/deployments/latest").json()["preview"]["commit"] == "abc"
+
+    assert invited.status_code == 200
+    assert [m["email"] for m in details["members"]] == ["owner@example.com", "member@example.com"]
+    assert suggested.status_code == 200
+    assert suggested.json()[0]["start"] >= "2025-03-03T14:00:00"
+    assert created.status_code == 200
+    assert unprojected == []
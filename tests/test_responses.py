@@ -0,0 +1,38 @@
+import asyncio
+
+from fastapi.testclient import TestClient
+
+import server
+
+
+def test_list_fast_path_matches_response_models(memory_db):
+    users = [
+        {"id": f"u{i}", "email": f"u{i}@example.com", "name": f"U{i}", "timezone": "UTC",
+         "google_id": "secret", "created_at": "2025-01-01"}
+        for i in range(3)
+    ]
+    groups = [
+        {"id": f"g{i}", "name": f"G{i}", "owner_id": "u0", "member_ids": ["u0", "u1", "u2"],
+         "created_at": f"2025-01-0{i + 1}"}
+        for i in range(3)
+    ]
+    deployment = {"id": "d1", "environment": "production", "branch": "main", "commit": "abc",
+                  "status": "success", "deployed_by": "ci", "created_at": "2025-01-01"}
+
+    async def seed():
+        await memory_db.users.insert_many(users)
+        await memory_db.groups.insert_many(groups)
+        await memory_db.deployments.insert_one(deployment)
+
+    asyncio.run(seed())
+    headers = {"Authorization": f"Bearer {server.create_access_token({'user_id': 'u0'})}"}
+    with TestClient(server.app) as client:
+        first = client.get("/api/groups", params={"limit": 2}, headers=headers)
+        rest = client.get("/api/groups", params={"cursor": first.headers["X-Next-Cursor"]}, headers=headers)
+        deployments = client.get("/api/deployments")
+
+    members = [server.UserResponse(**u).model_dump() for u in users]
+    expected = [server.GroupResponse(**g, members=members).model_dump() for g in groups]
+    assert first.json() + rest.json() == expected
+    assert "X-Next-Cursor" not in rest.headers
+    assert deployments.json() == [server.DeploymentRecord(**deployment).model_dump()]
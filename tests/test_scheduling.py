@@ -0,0 +1,147 @@
+import random
+from datetime import datetime, timedelta, timezone
+
+from scheduling import (
+    LOCAL_HOURS_CACHE_MAX_SLOTS, LOCAL_HOURS_CACHE_SIZE, _cached_local_hours, local_hours, preference_table,
+    resolve_zone, time_preference,
+)
+from server import TimeSlot, find_available_slots
+
+
+def reference_find_available_slots(all_busy_times, range_start, range_end, duration_mins,
+                                   granularity_mins, min_coverage, total_members, limit=10):
+    """The original slot-by-slot scan, kept as the oracle for the sweep engine"""
+    start_dt = datetime.fromisoformat(range_start.replace('Z', '+00:00'))
+    end_dt = datetime.fromisoformat(range_end.replace('Z', '+00:00'))
+    duration_delta = timedelta(minutes=duration_mins)
+    granularity_delta = timedelta(minutes=granularity_mins)
+
+    candidates = []
+    current = start_dt
+    while current + duration_delta <= end_dt:
+        slot_start = current
+        slot_end = current + duration_delta
+        available_count = 0
+        for busy_blocks in all_busy_times.values():
+            is_available = True
+            for busy in busy_blocks:
+                busy_start = datetime.fromisoformat(busy['start'].replace('Z', '+00:00'))
+                busy_end = datetime.fromisoformat(busy['end'].replace('Z', '+00:00'))
+                if not (slot_end <= busy_start or slot_start >= busy_end):
+                    is_available = False
+                    break
+            if is_available:
+                available_count += 1
+
+        coverage_ratio = available_count / total_members if total_members > 0 else 0
+        if coverage_ratio >= min_coverage:
+            hour = slot_start.hour
+            time_pref_score = 1.0
+            if 14 <= hour <= 17:
+                time_pref_score = 1.2
+            elif hour < 9 or hour > 20:
+                time_pref_score = 0.5
+            score = coverage_ratio * 0.7 + (time_pref_score / 1.2) * 0.3
+            candidates.append(TimeSlot(
+                start=slot_start.isoformat(),
+                end=slot_end.isoformat(),
+                score=score,
+                available_members=available_count,
+                total_members=total_members,
+                coverage_ratio=coverage_ratio
+            ))
+        current += granularity_delta
+
+    candidates.sort(key=lambda x: x.score, reverse=True)
+    return candidates[:limit]
+
+
+def random_busy_times(rng, members, range_start, days, lengths=(0, 7, 30, 45, 60, 90, 180)):
+    all_busy_times = {}
+    for member in range(members):
+        blocks = []
+        for _ in range(rng.randint(0, 6 * days)):
+            start = range_start + timedelta(minutes=rng.randint(-120, days * 24 * 60))
+            end = start + timedelta(minutes=rng.choice(lengths))
+            blocks.append({"start": start.isoformat(), "end": end.isoformat()})
+        all_busy_times[f"user-{member}"] = blocks
+    return all_busy_times
+
+
+def test_sweep_matches_reference_scan():
+    rng = random.Random(1234)
+    for _ in range(40):
+        range_start = datetime(2025, 3, 3, rng.randint(0, 23), rng.choice([0, 10, 15]), tzinfo=timezone.utc)
+        days = rng.randint(1, 4)
+        members = rng.randint(1, 8)
+        all_busy_times = random_busy_times(rng, members, range_start, days)
+        args = (
+            all_busy_times,
+            range_start.isoformat().replace('+00:00', 'Z'),
+            (range_start + timedelta(days=days)).isoformat(),
+            rng.choice([15, 30, 60, 90]),
+            rng.choice([5, 15, 30, 45]),
+            rng.choice([0.0, 0.5, 0.8, 1.0]),
+            members + rng.randint(0, 2),
+        )
+        assert find_available_slots(*args) == reference_find_available_slots(*args)
+        assert find_available_slots(*args, limit=25) == reference_find_available_slots(*args, limit=25)
+
+
+def test_numpy_engine_matches_sweep_engine():
+    rng = random.Random(99)
+    for _ in range(40):
+        range_start = datetime(2025, 3, 3, rng.randint(0, 23), rng.choice([0, 10, 15]), tzinfo=timezone.utc)
+        days = rng.randint(1, 4)
+        members = rng.randint(1, 8)
+        all_busy_times = random_busy_times(rng, members, range_start, days, lengths=(7, 30, 45, 60, 90, 180))
+        args = (
+            all_busy_times,
+            range_start.isoformat(),
+            (range_start + timedelta(days=days)).isoformat(),
+            rng.choice([15, 30, 50, 60, 90]),
+            rng.choice([5, 15, 30, 45]),
+            rng.choice([0.0, 0.5, 0.8, 1.0]),
+            members + rng.randint(0, 2),
+        )
+        assert find_available_slots(*args, engine="numpy") == find_available_slots(*args, engine="sweep")
+
+
+def test_range_shorter_than_duration_has_no_slots():
+    assert find_available_slots({}, "2025-03-03T10:00:00Z", "2025-03-03T10:30:00Z", 60, 15, 0.0, 1) == []
+
+
+def test_local_hours_follow_dst_and_half_hour_zones():
+    hour = 60 * 60 * 1_000_000
+    # Berlin springs forward at 01:00 UTC on 2025-03-30
+    berlin = local_hours(resolve_zone("Europe/Berlin"), datetime(2025, 3, 30, 0, tzinfo=timezone.utc), 3, hour)
+    assert list(berlin) == [1, 3, 4]
+    kolkata = local_hours(resolve_zone("Asia/Kolkata"), datetime(2025, 3, 3, 8, 30, tzinfo=timezone.utc), 2, hour)
+    assert list(kolkata) == [14, 15]
+    assert resolve_zone("Not/AZone") == timezone.utc
+
+
+def test_local_hours_cache_is_bounded():
+    quarter = 15 * 60 * 1_000_000
+    utc = resolve_zone("UTC")
+    start = datetime(2025, 3, 3, tzinfo=timezone.utc)
+    for minute in range(2 * LOCAL_HOURS_CACHE_SIZE):
+        local_hours(utc, start.replace(minute=minute % 60, hour=minute // 60), 4, quarter)
+    long_range = local_hours(utc, start, LOCAL_HOURS_CACHE_MAX_SLOTS + 1, quarter)
+
+    assert _cached_local_hours.cache_info().currsize == LOCAL_HOURS_CACHE_SIZE
+    assert long_range[-1] == 0 and local_hours(utc, start, LOCAL_HOURS_CACHE_MAX_SLOTS + 1, quarter) is not long_range
+
+
+def test_preference_table_averages_member_zones_and_group_weights():
+    start_dt = datetime(2025, 3, 3, 15, tzinfo=timezone.utc)
+    hour = 60 * 60 * 1_000_000
+    zones = [resolve_zone("UTC"), resolve_zone("America/New_York")]
+    # 15:00 UTC is 15:00 (afternoon bonus) in UTC and 10:00 in New York
+    assert preference_table(zones, start_dt, 1, hour)[0] == (1.2 / 1.2 + 1.0 / 1.2) / 2
+
+    weights = [0.0] * 24
+    weights[10] = 2.0
+    assert list(preference_table(zones, start_dt, 2, hour, weights)) == [0.5, 0.0]
+    # No zones: hours are read in the range start's own offset, as before
+    assert preference_table([], start_dt, 1, hour)[0] == time_preference(15) / 1.2
@@ -0,0 +1,56 @@
+import asyncio
+import random
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from scheduling import pack_busy_times, parse_iso, preference_table, slot_count, to_micros
+from scoring_pool import ScoringPool, ScoringPoolFull
+from server import find_available_slots, ranked_time_slots
+from tests.test_scheduling import random_busy_times
+
+
+def pool_slots(pool, engine, all_busy_times, range_start, range_end, duration_mins, granularity_mins,
+               min_coverage, total_members, limit=10):
+    start_dt, end_dt = parse_iso(range_start), parse_iso(range_end)
+    duration_delta, granularity_delta = timedelta(minutes=duration_mins), timedelta(minutes=granularity_mins)
+    count = slot_count(start_dt, end_dt, duration_delta, granularity_delta)
+    ranked = asyncio.run(pool.score(
+        engine, pack_busy_times(all_busy_times, start_dt), count,
+        to_micros(duration_delta), to_micros(granularity_delta),
+        preference_table([], start_dt, count, to_micros(granularity_delta)),
+        min_coverage, total_members, limit
+    ))
+    return ranked_time_slots(ranked, start_dt, duration_delta, granularity_delta, total_members)
+
+
+@pytest.mark.parametrize("kind", ["thread", "process"])
+def test_chunked_pool_matches_inline_scoring(kind):
+    # Tiny chunks and no inline threshold force every request through the pool in pieces
+    pool = ScoringPool(kind=kind, size=3, inline_max_work=0, chunk_slots=7)
+    rng = random.Random(7)
+    try:
+        for _ in range(10):
+            range_start = datetime(2025, 3, 3, rng.randint(0, 23), rng.choice([0, 15]), tzinfo=timezone.utc)
+            days = rng.randint(1, 3)
+            members = rng.randint(1, 6)
+            args = (
+                random_busy_times(rng, members, range_start, days, lengths=(7, 30, 60, 90)),
+                range_start.isoformat(),
+                (range_start + timedelta(days=days)).isoformat(),
+                rng.choice([30, 60]),
+                rng.choice([15, 30]),
+                rng.choice([0.0, 0.5]),
+                members,
+            )
+            for engine in ("sweep", "numpy"):
+                assert pool_slots(pool, engine, *args) == find_available_slots(*args, engine=engine)
+    finally:
+        pool.shutdown()
+
+
+def test_full_pool_rejects_requests():
+    pool = ScoringPool(kind="thread", size=1, queue_limit=0, inline_max_work=0)
+    with pytest.raises(ScoringPoolFull):
+        pool_slots(pool, "sweep", {"a": []}, "2025-03-03T09:00:00Z", "2025-03-03T17:00:00Z", 30, 15, 0.0, 1)
+    assert pool.rejected == 1
@@ -0,0 +1,91 @@
+import asyncio
+import random
+from datetime import datetime, timedelta, timezone
+
+from fastapi.testclient import TestClient
+
+import server
+from scheduling import (
+    available_counts, parse_busy_blocks, preference_table, score_slot, top_series, top_slots_numpy
+)
+from tests.test_scheduling import random_busy_times
+
+MINUTE_US = 60_000_000
+
+
+def series(all_busy_times, start_dt, days, durations, granularity, interval_days, occurrences, min_coverage,
+           total_members, limit=10):
+    member_intervals = [parse_busy_blocks(blocks, start_dt) for blocks in all_busy_times.values()]
+    preference = preference_table([], start_dt, days * 24 * 60 // granularity + 1, granularity * MINUTE_US)
+    return top_series(member_intervals, days * 24 * 60 * MINUTE_US, [d * MINUTE_US for d in durations],
+                      granularity * MINUTE_US, interval_days * 24 * 60 * MINUTE_US, occurrences,
+                      preference, min_coverage, total_members, limit)
+
+
+def test_single_occurrence_matches_slot_ranking():
+    rng = random.Random(5)
+    for _ in range(20):
+        start_dt = datetime(2025, 3, 3, rng.randint(0, 23), tzinfo=timezone.utc)
+        days = rng.randint(1, 3)
+        members = rng.randint(1, 6)
+        all_busy_times = random_busy_times(rng, members, start_dt, days, lengths=(15, 30, 60, 90))
+        duration, granularity = rng.choice([30, 60, 90]), rng.choice([15, 30])
+
+        expected = top_slots_numpy(all_busy_times, start_dt, start_dt + timedelta(days=days),
+                                   timedelta(minutes=duration), timedelta(minutes=granularity), 0.5, members, 10)
+        result = series(all_busy_times, start_dt, days, [duration], granularity, 1, 1, 0.5, members)
+        assert [(0, index, (available,), score) for index, available, _, score in expected] == result
+
+
+def test_weekly_series_rank_by_worst_week():
+    rng = random.Random(11)
+    start_dt = datetime(2025, 3, 3, 8, tzinfo=timezone.utc)
+    weeks, members = 3, 5
+    all_busy_times = random_busy_times(rng, members, start_dt, weeks * 7, lengths=(30, 60, 120))
+    durations, granularity = [60, 90], 30
+
+    result = series(all_busy_times, start_dt, weeks * 7, durations, granularity, 7, weeks, 0.0, members, 20)
+    assert result
+    step = 7 * 24 * 60 // granularity
+    for duration_index, first_slot, counts, score in result:
+        per_slot = available_counts(all_busy_times, start_dt, start_dt + timedelta(days=weeks * 7),
+                                    timedelta(minutes=durations[duration_index]), timedelta(minutes=granularity))
+        assert counts == tuple(per_slot[first_slot + k * step] for k in range(weeks))
+        hour = (start_dt + first_slot * timedelta(minutes=granularity)).hour
+        assert score == score_slot(min(counts) / members, hour)
+    assert [c[3] for c in result] == sorted((c[3] for c in result), reverse=True)
+
+
+def test_series_endpoint_returns_occurrences(memory_db, monkeypatch):
+    members = ["a", "b"]
+    for member in members:
+        asyncio.run(memory_db.users.insert_one({"id": member, "email": f"{member}@example.com", "name": member}))
+    asyncio.run(memory_db.groups.insert_one({
+        "id": "g1", "name": "Study", "owner_id": "a", "member_ids": members, "created_at": "2025-01-01"
+    }))
+
+    async def busy_times(user_id, time_min, time_max):
+        # b is busy 14:00-16:00 in the second week only
+        return [{"start": "2025-03-10T14:00:00+00:00", "end": "2025-03-10T16:00:00+00:00"}] if user_id == "b" else []
+
+    monkeypatch.setattr(server, "get_user_calendar_busy_times", busy_times)
+    token = server.create_access_token({"user_id": "a"})
+    with TestClient(server.app) as client:
+        response = client.post("/api/schedule/suggest/series", headers={"Authorization": f"Bearer {token}"}, json={
+            "group_id": "g1",
+            "range_start": "2025-03-03T13:00:00Z",
+            "range_end": "2025-03-10T18:00:00Z",
+            "durations_mins": [60, 90],
+            "granularity_mins": 60,
+            "min_coverage": 0.0,
+            "recurrence": {"interval_days": 7, "occurrences": 2},
+            "max_results": 50,
+        })
+    assert response.status_code == 200
+    suggestions = response.json()
+    best = suggestions[0]
+    assert best["worst_coverage_ratio"] == 1.0
+    assert [o["start"] for o in best["occurrences"]] == ["2025-03-03T16:00:00+00:00", "2025-03-10T16:00:00+00:00"]
+    worst = [s for s in suggestions if s["occurrences"][0]["start"] == "2025-03-03T14:00:00+00:00"]
+    assert {s["worst_coverage_ratio"] for s in worst} == {0.5}
+    assert [o["available_members"] for o in worst[0]["occurrences"]] == [2, 1]
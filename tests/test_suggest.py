@@ -0,0 +1,51 @@
+import asyncio
+
+from fastapi.testclient import TestClient
+
+import server
+
+
+def seed_group(memory_db):
+    users = [{"id": f"u{i}", "email": f"u{i}@example.com", "name": f"U{i}", "timezone": "UTC"} for i in range(3)]
+
+    async def seed():
+        await memory_db.users.insert_many(users)
+        await memory_db.groups.insert_one({"id": "g1", "name": "G", "owner_id": "u0", "member_ids": ["u1", "u2"]})
+
+    asyncio.run(seed())
+    return {"Authorization": f"Bearer {server.create_access_token({'user_id': 'u0'})}"}
+
+
+def test_naive_ranges_are_read_as_utc(memory_db):
+    headers = seed_group(memory_db)
+    naive = {"group_id": "g1", "range_start": "2025-03-03T08:00:00", "range_end": "2025-03-04T20:00:00"}
+    with TestClient(server.app) as client:
+        # Busy blocks from the calendar provider are offset-aware
+        slots = client.post("/api/schedule/suggest", headers=headers, json=naive)
+        aware = client.post("/api/schedule/suggest", headers=headers,
+                            json={**naive, "range_start": "2025-03-03T08:00:00Z", "range_end": "2025-03-04T20:00:00Z"})
+        series = client.post("/api/schedule/suggest/series", headers=headers, json=naive)
+        stream = client.post("/api/schedule/suggest/stream", headers=headers, json=naive)
+        invalid = client.post("/api/schedule/suggest", headers=headers, json={**naive, "range_start": "soon"})
+
+    assert slots.status_code == 200
+    assert slots.json() == aware.json()
+    assert series.status_code == 200
+    assert "event: final" in stream.text
+    assert invalid.status_code == 422
+
+
+def test_non_positive_duration_or_granularity_is_rejected(memory_db):
+    headers = seed_group(memory_db)
+    request = {"group_id": "g1", "range_start": "2025-03-03T08:00:00Z", "range_end": "2025-03-03T20:00:00Z"}
+    with TestClient(server.app) as client:
+        statuses = [
+            client.post(path, headers=headers, json={**request, field: value}).status_code
+            for path in ("/api/schedule/suggest", "/api/schedule/suggest/stream")
+            for field, value in (("granularity_mins", 0), ("duration_mins", 0), ("duration_mins", -30))
+        ]
+        series = client.post("/api/schedule/suggest/series", headers=headers,
+                             json={**request, "granularity_mins": 0}).status_code
+
+    assert statuses == [422] * 6
+    assert series == 400
@@ -0,0 +1,55 @@
+import asyncio
+import json
+
+from fastapi.testclient import TestClient
+
+import server
+
+
+def parse_events(body):
+    events = []
+    for chunk in body.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in chunk.split("\n"))
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+
+def test_stream_sends_provisional_then_final_rankings(memory_db, monkeypatch):
+    members = [f"user-{i}" for i in range(4)]
+    for member in members:
+        asyncio.run(memory_db.users.insert_one({"id": member, "email": f"{member}@example.com", "name": member}))
+    asyncio.run(memory_db.groups.insert_one({
+        "id": "g1", "name": "Study", "owner_id": members[0], "member_ids": members, "created_at": "2025-01-01"
+    }))
+
+    async def busy_times(user_id, time_min, time_max):
+        if user_id == "user-3":
+            await asyncio.sleep(0.2)
+            return [{"start": "2025-03-03T14:00:00+00:00", "end": "2025-03-03T16:00:00+00:00"}]
+        return []
+
+    monkeypatch.setattr(server, "get_user_calendar_busy_times", busy_times)
+    monkeypatch.setattr(server, "SUGGEST_STREAM_INTERVAL", 0.05)
+
+    token = server.create_access_token({"user_id": members[0]})
+    payload = {
+        "group_id": "g1",
+        "range_start": "2025-03-03T12:00:00Z",
+        "range_end": "2025-03-03T18:00:00Z",
+        "duration_mins": 60,
+        "max_results": 3,
+    }
+    with TestClient(server.app) as client:
+        response = client.post("/api/schedule/suggest/stream", json=payload,
+                               headers={"Authorization": f"Bearer {token}"})
+        expected = client.post("/api/schedule/suggest", json=payload,
+                               headers={"Authorization": f"Bearer {token}"}).json()
+
+    events = parse_events(response.text)
+    assert response.headers["content-type"].startswith("text/event-stream")
+    assert events[0][0] == "provisional"
+    assert events[0][1]["members_fetched"] == 3
+    assert events[0][1]["slots"][0]["start"] == "2025-03-03T14:00:00+00:00"
+    assert events[-1][0] == "final"
+    assert events[-1][1]["members_fetched"] == 4
+    assert events[-1][1]["slots"] == expected
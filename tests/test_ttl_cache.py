@@ -0,0 +1,33 @@
+from ttl_cache import TTLCache
+
+
+def test_expiry_eviction_and_clear():
+    now = [0.0]
+    cache = TTLCache(ttl=30, max_size=2, clock=lambda: now[0])
+
+    cache.set("a", 1)
+    cache.set("b", 2, ttl=5)
+    assert cache.get("a") == 1
+    cache.set("c", 3)  # evicts b, the least recently used
+    assert cache.get("b") is None
+
+    now[0] = 29
+    assert cache.get("a") == 1
+    now[0] = 31
+    assert cache.get("a") is None
+
+    cache.set("d", 4)
+    cache.clear()
+    assert cache.get("d") is None
+
+
+def test_fill_started_before_an_invalidation_is_dropped():
+    cache = TTLCache(ttl=30)
+    epoch = cache.epoch  # a lookup reads the source...
+    cache.pop("user")    # ...while the user is updated and invalidated
+    cache.set("user", "stale", epoch=epoch)
+    assert cache.get("user") is None
+
+    epoch = cache.epoch
+    cache.set("user", "fresh", epoch=epoch)
+    assert cache.get("user") == "fresh"